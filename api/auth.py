@@ -5,6 +5,7 @@ Handles:
 - JWT token acquisition via wallet signature
 - Request signing for authenticated endpoints
 """
+import os
 import time
 import uuid
 import json
@@ -24,7 +25,10 @@ class StandXAuth:
     
     BASE_URL = "https://api.standx.com"
     
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None):
+        # Overridable (argument or STANDX_API_URL) to run against a local simulator
+        self.base_url = base_url or os.environ.get("STANDX_API_URL", self.BASE_URL)
+        
         # Generate temporary Ed25519 key pair
         self._signing_key = SigningKey.generate()
         self._verify_key = self._signing_key.verify_key
@@ -119,7 +123,7 @@ class StandXAuth:
     
     async def _prepare_sign_in(self, client: httpx.AsyncClient, chain: str, address: str) -> str:
         """Request signature data from server."""
-        url = f"{self.BASE_URL}/v1/offchain/prepare-signin?chain={chain}"
+        url = f"{self.base_url}/v1/offchain/prepare-signin?chain={chain}"
         response = await client.post(
             url,
             json={"address": address, "requestId": self._request_id},
@@ -134,7 +138,7 @@ class StandXAuth:
     
     async def _login(self, client: httpx.AsyncClient, chain: str, signature: str, signed_data: str) -> dict:
         """Login with signature to get access token."""
-        url = f"{self.BASE_URL}/v1/offchain/login?chain={chain}"
+        url = f"{self.base_url}/v1/offchain/login?chain={chain}"
         response = await client.post(
             url,
             json={
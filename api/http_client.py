@@ -1,6 +1,8 @@
 """HTTP client for StandX Perps API."""
+import os
 import json
 import time
+import asyncio
 import logging
 from typing import Optional, List
 from dataclasses import dataclass
@@ -8,7 +10,12 @@ from datetime import datetime
 
 import httpx
 
+from log_sink import LogSink, get_sink
+from latency_store import LatencyStore
+from tracing import tracer
 from .auth import StandXAuth
+from .latency_stats import LatencyStats
+from .rate_limiter import RateLimiter, CANCEL, REDUCE, NEW_ORDER, QUERY
 
 
 logger = logging.getLogger(__name__)
@@ -39,29 +46,67 @@ class StandXHTTPClient:
     
     BASE_URL = "https://perps.standx.com"
     
-    def __init__(self, auth: StandXAuth, latency_log_file: str = None):
+    def __init__(
+        self,
+        auth: StandXAuth,
+        latency_log_file: str = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None,
+    ):
         self._auth = auth
+        # Overridable (argument or STANDX_PERPS_URL) to run against a local simulator
+        self.base_url = base_url or os.environ.get("STANDX_PERPS_URL", self.BASE_URL)
         self._client = httpx.AsyncClient(timeout=30.0)
-        self._latency_log_file = latency_log_file
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._latency_log_file = None
+        self._latency_sink: Optional[LogSink] = None
+        if latency_log_file:
+            self.set_latency_log_file(latency_log_file)
+        # Per-endpoint latency percentiles (rolling windows, fixed memory)
+        self.latency = LatencyStats()
+        self._latency_store: Optional[LatencyStore] = None
     
     def set_latency_log_file(self, filepath: str):
         """Set the file path for latency logging."""
         self._latency_log_file = filepath
+        self._latency_sink = get_sink(filepath) if filepath else None
+    
+    def set_latency_snapshot_file(self, filepath: str):
+        """Periodically write latency percentiles to this JSON file (read by monitor.py)."""
+        self.latency.snapshot_file = filepath
+    
+    async def persist_latency_if_due(self):
+        """Write the latency snapshot if recording flagged it as due (file IO in a worker thread)."""
+        if self.latency.persist_due:
+            await asyncio.to_thread(self.latency.persist)
+    
+    def set_latency_store(self, directory: str):
+        """Also record latencies into an hourly binary store (see latency_store.py)."""
+        if self._latency_store:
+            self._latency_store.close()
+        self._latency_store = LatencyStore(directory) if directory else None
     
     def _write_latency(self, endpoint: str, latency_ms: float):
-        """Write latency record to log file."""
-        if not self._latency_log_file:
-            return
+        """Queue latency record for the background log writer and the latency store."""
         try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            with open(self._latency_log_file, "a") as f:
-                f.write(f"{timestamp},{endpoint},{latency_ms:.0f}\n")
+            if self._latency_store:
+                self._latency_store.record(endpoint, latency_ms)
+            if self._latency_sink:
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                self._latency_sink.write(f"{timestamp},{endpoint},{latency_ms:.0f}")
         except:
             pass  # Don't let logging failure affect trading
     
     async def close(self):
-        """Close the HTTP client."""
+        """Close the HTTP client and flush the latency log, store and snapshot."""
         await self._client.aclose()
+        # These wait for writer threads / do file IO: keep them off the event loop
+        if self._latency_sink:
+            await asyncio.to_thread(self._latency_sink.flush)
+        if self._latency_store:
+            store, self._latency_store = self._latency_store, None
+            await asyncio.to_thread(store.close)
+        await asyncio.to_thread(self.latency.persist)
     
     async def new_order(
         self,
@@ -107,7 +152,8 @@ class StandXHTTPClient:
         if leverage is not None:
             payload["leverage"] = leverage
 
-        return await self._post("/api/new_order", payload, sign=True)
+        priority = REDUCE if reduce_only else NEW_ORDER
+        return await self._post("/api/new_order", payload, sign=True, priority=priority)
     
     async def cancel_order(self, cl_ord_id: str) -> dict:
         """
@@ -120,7 +166,7 @@ class StandXHTTPClient:
             API response
         """
         payload = {"cl_ord_id": cl_ord_id}
-        return await self._post("/api/cancel_order", payload, sign=True)
+        return await self._post("/api/cancel_order", payload, sign=True, priority=CANCEL)
     
     async def cancel_orders(self, cl_ord_ids: List[str]) -> dict:
         """
@@ -133,7 +179,7 @@ class StandXHTTPClient:
             API response
         """
         payload = {"cl_ord_id_list": cl_ord_ids}
-        return await self._post("/api/cancel_orders", payload, sign=True)
+        return await self._post("/api/cancel_orders", payload, sign=True, priority=CANCEL)
     
     async def query_open_orders(self, symbol: Optional[str] = None) -> List[Order]:
         """
@@ -207,23 +253,57 @@ class StandXHTTPClient:
         params = {"symbol": symbol}
         return await self._get("/api/query_symbol_price", params, auth=False)
     
-    async def _get(self, path: str, params: dict = None, auth: bool = True) -> dict:
+    async def query_symbol_info(self, symbol: Optional[str] = None) -> List[dict]:
+        """
+        Query symbol trading rules (tick size, lot size, decimals).
+        
+        Args:
+            symbol: Optional symbol filter
+            
+        Returns:
+            List of symbol info entries
+        """
+        params = {"symbol": symbol} if symbol else {}
+        response = await self._get("/api/query_symbol_info", params, auth=False)
+        if isinstance(response, list):
+            return response
+        return response.get("result", [])
+    
+    def get_rate_limit_stats(self) -> dict:
+        """Rate limiter counters (tokens, queue, 429/5xx, breaker state)."""
+        return self.rate_limiter.get_stats()
+    
+    def get_latency_stats(self, window: str = "5m") -> dict:
+        """Latency percentiles in ms by endpoint over window (1m, 5m, 1h, 2h or lifetime)."""
+        return self.latency.summary(window)
+    
+    async def _get(self, path: str, params: dict = None, auth: bool = True, priority: int = QUERY) -> dict:
         """Make a GET request."""
-        url = f"{self.BASE_URL}{path}"
+        url = f"{self.base_url}{path}"
         headers = {}
         
+        await self.rate_limiter.acquire(priority)
+        
         if auth:
             headers = self._auth.get_auth_headers()
         
-        response = await self._client.get(url, params=params, headers=headers)
+        try:
+            response = await self._client.get(url, params=params, headers=headers)
+        except httpx.TransportError as e:
+            self.rate_limiter.record_error(e)
+            raise
+        self.rate_limiter.record_response(response.status_code)
         response.raise_for_status()
         return response.json()
     
-    async def _post(self, path: str, payload: dict, sign: bool = False) -> dict:
-        """Make a POST request with latency tracking."""
-        url = f"{self.BASE_URL}{path}"
+    async def _post(self, path: str, payload: dict, sign: bool = False, priority: int = QUERY) -> dict:
+        """Make a POST request with rate limiting and latency tracking."""
+        url = f"{self.base_url}{path}"
         payload_str = json.dumps(payload)
         
+        # Wait for a token before signing so the signature timestamp is fresh
+        await self.rate_limiter.acquire(priority)
+        
         if sign:
             headers = self._auth.get_auth_headers(payload_str)
         else:
@@ -231,9 +311,17 @@ class StandXHTTPClient:
         
         logger.debug(f"POST {path}: {payload_str}")
         
+        traces = tracer.request_sent(path, payload) if tracer.enabled else None
         start_time = time.time()
-        response = await self._client.post(url, content=payload_str, headers=headers)
+        try:
+            response = await self._client.post(url, content=payload_str, headers=headers)
+        except httpx.TransportError as e:
+            self.rate_limiter.record_error(e)
+            raise
         latency_ms = (time.time() - start_time) * 1000
+        if traces:
+            tracer.request_acked(traces, response.status_code)
+        self.rate_limiter.record_response(response.status_code)
         
         # Log response for debugging
         if response.status_code >= 400:
@@ -246,5 +334,6 @@ class StandXHTTPClient:
         
         # Write latency to log file
         self._write_latency(path, latency_ms)
+        self.latency.record(path, latency_ms)
         
         return result
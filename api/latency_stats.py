@@ -0,0 +1,141 @@
+"""Per-endpoint REST latency histograms.
+
+Every request latency is recorded into two rolling histograms per
+endpoint (see histogram.py): a short one with 10s slots for the 1m/5m
+windows and a long one with 5min slots for 1h/2h. Recording is O(1) and
+memory is fixed (about 450KB per endpoint) however many requests are
+made. Windows are rounded up to whole slots, so "1m" covers the last
+60-70 seconds.
+
+A snapshot of all windows is written atomically to a JSON file every
+``persist_interval_sec`` so the monitor can read percentiles without
+parsing the text latency log. Recording only raises ``persist_due``; the
+owner writes the snapshot off the event loop (asyncio.to_thread), which
+is safe against concurrent records:
+
+    {"ts": ..., "windows": {"1m": {endpoint: summary}, ...},
+     "histograms": {endpoint: <2h histogram, Histogram.to_dict()>}}
+
+Summaries are count/mean/min/max/p50/p90/p99/p999 in milliseconds.
+"""
+import os
+import json
+import time
+import logging
+from typing import Dict, Optional
+
+from histogram import Histogram, RollingHistogram
+
+
+logger = logging.getLogger(__name__)
+
+
+# Window name -> seconds
+WINDOWS = {"1m": 60, "5m": 300, "1h": 3600, "2h": 7200}
+SHORT_WINDOW_SEC = 300
+LONG_WINDOW_SEC = 7200
+
+
+class _EndpointHistograms:
+    __slots__ = ("short", "long", "lifetime")
+
+    def __init__(self):
+        self.short = RollingHistogram(SHORT_WINDOW_SEC, slots=30)
+        self.long = RollingHistogram(LONG_WINDOW_SEC, slots=24)
+        self.lifetime = Histogram()
+
+    def window(self, window_sec: float) -> Histogram:
+        if window_sec <= SHORT_WINDOW_SEC:
+            return self.short.snapshot(window_sec=window_sec)
+        return self.long.snapshot(window_sec=window_sec)
+
+
+class LatencyStats:
+    """Rolling latency percentiles by endpoint, optionally persisted to JSON."""
+
+    def __init__(self, snapshot_file: Optional[str] = None, persist_interval_sec: float = 60.0):
+        self.snapshot_file = snapshot_file
+        self.persist_interval_sec = persist_interval_sec
+        self._endpoints: Dict[str, _EndpointHistograms] = {}
+        self._next_persist = time.monotonic() + persist_interval_sec
+        self.persist_due = False  # snapshot_file should be rewritten
+
+    def record(self, endpoint: str, latency_ms: float):
+        """Record one request latency; flags the snapshot as due, never does file IO."""
+        hists = self._endpoints.get(endpoint)
+        if hists is None:
+            hists = self._endpoints[endpoint] = _EndpointHistograms()
+        value_us = latency_ms * 1000
+        hists.short.record(value_us)
+        hists.long.record(value_us)
+        hists.lifetime.record(value_us)
+
+        if self.snapshot_file and not self.persist_due and time.monotonic() >= self._next_persist:
+            self.persist_due = True
+
+    def summary(self, window: str = "5m") -> Dict[str, dict]:
+        """
+        Latency percentiles by endpoint.
+
+        Args:
+            window: One of WINDOWS ("1m", "5m", "1h", "2h") or "lifetime"
+
+        Returns:
+            {endpoint: {"count", "mean", "min", "max", "p50", "p90", "p99", "p999"}} in ms
+        """
+        result = {}
+        for endpoint, hists in list(self._endpoints.items()):
+            hist = hists.lifetime if window == "lifetime" else hists.window(WINDOWS[window])
+            if hist.count:
+                result[endpoint] = hist.summary(scale=1000)
+        return result
+
+    def snapshot(self) -> dict:
+        """Summaries of every window plus the 2h histograms (lossless, mergeable)."""
+        histograms = {}
+        for endpoint, hists in list(self._endpoints.items()):
+            hist = hists.long.snapshot()
+            if hist.count:
+                histograms[endpoint] = hist.to_dict()
+        return {
+            "ts": time.time(),
+            "windows": {name: self.summary(name) for name in WINDOWS},
+            "histograms": histograms,
+        }
+
+    def persist(self, path: Optional[str] = None):
+        """Atomically write the snapshot (default: snapshot_file). Does file IO: use asyncio.to_thread."""
+        path = path or self.snapshot_file
+        if not path:
+            return
+        self.persist_due = False
+        self._next_persist = time.monotonic() + self.persist_interval_sec
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"Failed to write {path}: {e}")
+
+
+def read_snapshot(path: str, window: str = "2h", max_age_sec: Optional[float] = None) -> Optional[Dict[str, dict]]:
+    """
+    Read one window of a persisted snapshot.
+
+    Args:
+        path: Snapshot file written by LatencyStats.persist
+        window: Window name in the snapshot
+        max_age_sec: Treat older snapshots as missing (bot not running)
+
+    Returns:
+        {endpoint: summary} or None if the file is missing, unreadable or stale
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if max_age_sec is not None and time.time() - data.get("ts", 0) > max_age_sec:
+        return None
+    return data.get("windows", {}).get(window)
@@ -0,0 +1,193 @@
+"""Client-side rate limiting for StandX REST calls.
+
+A token bucket shared by all requests of one client. When tokens run out,
+requests wait in a priority queue so cancels go first, then reduce-only
+orders, then new orders, then queries. A circuit breaker trips on
+repeated 429/5xx responses or transport errors (timeouts, connection
+failures) and rejects everything but risk-reducing requests (cancels and
+reduce-only orders) until it cools down.
+"""
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+# Priority classes (lower = more important)
+CANCEL = 0
+REDUCE = 1
+NEW_ORDER = 2
+QUERY = 3
+
+PRIORITY_NAMES = {CANCEL: "cancel", REDUCE: "reduce", NEW_ORDER: "new_order", QUERY: "query"}
+
+# Never rejected by the breaker or a full queue: they only reduce risk
+RISK_REDUCING = (CANCEL, REDUCE)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a request is rejected because the circuit breaker is open."""
+
+
+class RateLimiter:
+    """Priority-aware token bucket with a circuit breaker."""
+
+    def __init__(
+        self,
+        rate_per_sec: float = 10.0,
+        burst: int = 20,
+        max_queue: int = 100,
+        breaker_threshold: int = 5,
+        breaker_cooldown_sec: float = 5.0,
+        breaker_max_cooldown_sec: float = 60.0,
+    ):
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self.max_queue = max_queue
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown_sec = breaker_cooldown_sec
+        self.breaker_max_cooldown_sec = breaker_max_cooldown_sec
+
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._waiters: list = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._wake_handle: Optional[asyncio.TimerHandle] = None
+
+        # Circuit breaker
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._cooldown = breaker_cooldown_sec
+
+        # Counters per priority name
+        self.stats = {
+            name: {"requests": 0, "queued": 0, "rejected": 0, "wait_ms_max": 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+        self.throttled = 0  # 429 responses
+        self.server_errors = 0  # 5xx responses
+        self.transport_errors = 0  # timeouts / connection errors
+        self.breaker_trips = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_per_sec)
+        self._last_refill = now
+
+    @property
+    def breaker_open(self) -> bool:
+        return time.monotonic() < self._open_until
+
+    async def acquire(self, priority: int = QUERY):
+        """
+        Wait for a token. Higher priority waiters are served first.
+
+        Raises:
+            CircuitOpenError: breaker is open or the wait queue is full
+                (cancels and reduce-only orders are never rejected)
+        """
+        stats = self.stats[PRIORITY_NAMES[priority]]
+        if priority not in RISK_REDUCING and self.breaker_open:
+            stats["rejected"] += 1
+            raise CircuitOpenError(
+                f"Circuit open for {self._open_until - time.monotonic():.1f}s, "
+                f"{PRIORITY_NAMES[priority]} request rejected"
+            )
+
+        stats["requests"] += 1
+        self._refill()
+        if not self._waiters and self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return
+
+        if len(self._waiters) >= self.max_queue and priority not in RISK_REDUCING:
+            stats["rejected"] += 1
+            raise CircuitOpenError(f"Rate limit queue full, {PRIORITY_NAMES[priority]} request rejected")
+
+        stats["queued"] += 1
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule_wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                # Token was granted as we were cancelled: give it back
+                self._tokens += 1.0
+            raise
+        wait_ms = (time.monotonic() - start) * 1000
+        stats["wait_ms_max"] = max(stats["wait_ms_max"], wait_ms)
+
+    def _schedule_wake(self):
+        if self._wake_handle is not None or not self._waiters:
+            return
+        self._refill()
+        delay = max(0.0, (1.0 - self._tokens) / self.rate_per_sec)
+        self._wake_handle = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self):
+        """Hand out available tokens to waiters in priority order."""
+        self._wake_handle = None
+        self._refill()
+        while self._waiters and self._tokens >= 1.0:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # waiter was cancelled
+            self._tokens -= 1.0
+            future.set_result(None)
+        self._schedule_wake()
+
+    def record_response(self, status_code: int):
+        """Feed a response status into the circuit breaker."""
+        if status_code == 429 or status_code >= 500:
+            if status_code == 429:
+                self.throttled += 1
+            else:
+                self.server_errors += 1
+            self._record_failure()
+        else:
+            if self._consecutive_failures:
+                self._consecutive_failures = 0
+            if not self.breaker_open:
+                self._cooldown = self.breaker_cooldown_sec
+
+    def record_error(self, error: Exception):
+        """Feed a transport error (timeout, connection failure) into the circuit breaker."""
+        self.transport_errors += 1
+        logger.debug(f"[RateLimit] Transport error: {type(error).__name__}: {error}")
+        self._record_failure()
+
+    def _record_failure(self):
+        self._consecutive_failures += 1
+        if self._consecutive_failures >= self.breaker_threshold and not self.breaker_open:
+            self._open_until = time.monotonic() + self._cooldown
+            self.breaker_trips += 1
+            logger.error(
+                f"[RateLimit] Circuit breaker tripped after {self._consecutive_failures} "
+                f"consecutive failures (429/5xx/transport), pausing all but cancel/reduce "
+                f"requests for {self._cooldown:.0f}s"
+            )
+            # Back off harder if it trips again right after cooling down
+            self._cooldown = min(self._cooldown * 2, self.breaker_max_cooldown_sec)
+
+    def get_stats(self) -> dict:
+        """Counters for monitoring how close we are to the limits."""
+        self._refill()
+        return {
+            "tokens": round(self._tokens, 2),
+            "burst": self.burst,
+            "rate_per_sec": self.rate_per_sec,
+            "queue_len": len(self._waiters),
+            "breaker_open": self.breaker_open,
+            "breaker_trips": self.breaker_trips,
+            "throttled_429": self.throttled,
+            "server_errors_5xx": self.server_errors,
+            "transport_errors": self.transport_errors,
+            "by_priority": {name: dict(s) for name, s in self.stats.items()},
+        }
@@ -0,0 +1,210 @@
+"""Symbol metadata (tick size, lot size, decimals) for StandX Perps.
+
+Loaded once at startup from the exchange, with a local JSON file as
+fallback/cache. Prices and quantities are quantized in integer tick units
+and formatted from those integers, so the string sent to the exchange and
+the float kept in State are exactly the same value.
+"""
+import json
+import math
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional, Dict
+from dataclasses import dataclass, asdict, field
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SymbolInfo:
+    """Trading rules for one symbol."""
+    symbol: str
+    price_decimals: int
+    qty_decimals: int
+    tick_size: Optional[float] = None  # default: 10^-price_decimals
+    lot_size: Optional[float] = None  # default: 10^-qty_decimals
+    min_qty: float = 0.0
+
+    # Precomputed integer scales (not serialized)
+    _price_scale: int = field(default=0, repr=False, compare=False)
+    _tick_units: int = field(default=0, repr=False, compare=False)
+    _qty_scale: int = field(default=0, repr=False, compare=False)
+    _lot_units: int = field(default=0, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._price_scale = 10 ** self.price_decimals
+        self._qty_scale = 10 ** self.qty_decimals
+        if self.tick_size is None:
+            self.tick_size = 1 / self._price_scale
+        if self.lot_size is None:
+            self.lot_size = 1 / self._qty_scale
+        self._tick_units = max(1, round(self.tick_size * self._price_scale))
+        self._lot_units = max(1, round(self.lot_size * self._qty_scale))
+
+    @staticmethod
+    def _format(units: int, scale: int, decimals: int) -> str:
+        if decimals == 0:
+            return str(units)
+        sign = "-" if units < 0 else ""
+        units = abs(units)
+        return f"{sign}{units // scale}.{units % scale:0{decimals}d}"
+
+    def price_units(self, price: float, side: str) -> int:
+        """Price in units of 10^-price_decimals, aligned to tick (floor for buy, ceil for sell)."""
+        ticks = price * self._price_scale / self._tick_units
+        # Tolerate float noise so an already aligned price stays put
+        if side == "buy":
+            n = math.floor(ticks + 1e-6)
+        else:
+            n = math.ceil(ticks - 1e-6)
+        return n * self._tick_units
+
+    def format_price(self, price: float, side: str) -> str:
+        """Tick-aligned price string (floor for buy, ceil for sell)."""
+        return self._format(self.price_units(price, side), self._price_scale, self.price_decimals)
+
+    def format_qty(self, qty: float) -> str:
+        """Quantity string floored to lot size (zero if below one lot)."""
+        n = math.floor(qty * self._qty_scale / self._lot_units + 1e-6)
+        return self._format(n * self._lot_units, self._qty_scale, self.qty_decimals)
+
+    def format_min_qty(self) -> str:
+        """Smallest order quantity the exchange accepts, rounded up to lot size."""
+        n = max(1, math.ceil(self.min_qty * self._qty_scale / self._lot_units - 1e-6))
+        return self._format(n * self._lot_units, self._qty_scale, self.qty_decimals)
+
+    def below_min_qty(self, qty_str: str) -> bool:
+        """True if a formatted quantity is zero or below min_qty."""
+        qty = float(qty_str)
+        return qty <= 0 or qty < self.min_qty - 1e-12
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in asdict(self).items() if not k.startswith("_")}
+
+
+def default_symbol_info(symbol: str) -> SymbolInfo:
+    """Fallback rules used before metadata is loaded (previous hard-coded values)."""
+    if symbol.startswith("BTC"):
+        return SymbolInfo(symbol=symbol, price_decimals=2, qty_decimals=3)
+    return SymbolInfo(symbol=symbol, price_decimals=1, qty_decimals=3)
+
+
+def _decimals(value: str) -> int:
+    """Number of decimals in a numeric string, e.g. "0.010" -> 2."""
+    value = str(value).rstrip("0")
+    return len(value.split(".")[1]) if "." in value else 0
+
+
+def parse_symbol_info(item: dict) -> SymbolInfo:
+    """Build SymbolInfo from a query_symbol_info entry."""
+    if "price_tick_decimals" in item:
+        price_decimals = int(item["price_tick_decimals"])
+        tick_size = None
+    else:
+        tick_size = float(item["tick_size"])
+        price_decimals = _decimals(item["tick_size"])
+    if "qty_tick_decimals" in item:
+        qty_decimals = int(item["qty_tick_decimals"])
+        lot_size = None
+    else:
+        lot_size = float(item["lot_size"])
+        qty_decimals = _decimals(item["lot_size"])
+    return SymbolInfo(
+        symbol=item["symbol"],
+        price_decimals=price_decimals,
+        qty_decimals=qty_decimals,
+        tick_size=tick_size,
+        lot_size=lot_size,
+        min_qty=float(item.get("min_order_qty", 0) or 0),
+    )
+
+
+class SymbolInfoCache:
+    """Symbol metadata for all symbols, loaded once and shared."""
+
+    def __init__(self, cache_file: Optional[str] = "symbols.json"):
+        self._cache_file = cache_file
+        self._symbols: Dict[str, SymbolInfo] = {}
+        self._load_lock: Optional[asyncio.Lock] = None
+        self.loaded = False
+
+    async def load(self, client, force: bool = False) -> bool:
+        """
+        Load metadata from the exchange, falling back to the local cache file.
+
+        Concurrent callers (several accounts starting together) share one
+        query: once loaded, later calls return immediately unless force.
+
+        Args:
+            client: StandXHTTPClient
+            force: Query again even if already loaded
+
+        Returns:
+            True if metadata was loaded from either source
+        """
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self.loaded and not force:
+                return True
+            return await self._load(client)
+
+    async def _load(self, client) -> bool:
+        try:
+            items = await client.query_symbol_info()
+            self._symbols = {}
+            for item in items:
+                try:
+                    info = parse_symbol_info(item)
+                    self._symbols[info.symbol] = info
+                except (KeyError, ValueError) as e:
+                    logger.warning(f"Skipping symbol info {item.get('symbol')}: {e}")
+            self.loaded = bool(self._symbols)
+            if self.loaded:
+                logger.info(f"Loaded symbol info for {len(self._symbols)} symbols")
+                self.save_file()
+                return True
+        except Exception as e:
+            logger.warning(f"Failed to query symbol info: {e}")
+        return self.load_file()
+
+    def load_file(self, path: Optional[str] = None) -> bool:
+        """Load metadata from a local JSON file."""
+        path = path or self._cache_file
+        if not path or not Path(path).exists():
+            return False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._symbols = {item["symbol"]: SymbolInfo(**item) for item in data}
+            self.loaded = True
+            logger.info(f"Loaded symbol info for {len(self._symbols)} symbols from {path}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load symbol info from {path}: {e}")
+            return False
+
+    def save_file(self, path: Optional[str] = None):
+        """Write metadata to a local JSON file."""
+        path = path or self._cache_file
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([info.to_dict() for info in self._symbols.values()], f, indent=2)
+        except Exception as e:
+            logger.warning(f"Failed to save symbol info to {path}: {e}")
+
+    def get(self, symbol: str) -> SymbolInfo:
+        """Metadata for a symbol, or the built-in fallback if unknown."""
+        info = self._symbols.get(symbol)
+        if info is None:
+            info = default_symbol_info(symbol)
+            self._symbols[symbol] = info
+            logger.warning(
+                f"No symbol info for {symbol}, using defaults: "
+                f"{info.price_decimals} price / {info.qty_decimals} qty decimals"
+            )
+        return info
@@ -4,8 +4,10 @@ Handles two WebSocket connections:
 1. Market stream (wss://perps.standx.com/ws-stream/v1) - price data
 2. User stream (wss://perps.standx.com/ws-api/v1) - order/position updates
 
-Both clients support auto-reconnection.
+Both clients support auto-reconnection. The URLs can be overridden (constructor
+argument or STANDX_WS_STREAM_URL / STANDX_WS_API_URL) to use a local simulator.
 """
+import os
 import json
 import asyncio
 import logging
@@ -14,6 +16,7 @@ from typing import Optional, Callable
 import websockets
 from websockets.client import WebSocketClientProtocol
 
+from tracing import tracer
 from .auth import StandXAuth
 
 
@@ -26,7 +29,8 @@ class MarketWSClient:
     WS_URL = "wss://perps.standx.com/ws-stream/v1"
     RECONNECT_DELAY = 5  # seconds
     
-    def __init__(self):
+    def __init__(self, url: Optional[str] = None):
+        self.url = url or os.environ.get("STANDX_WS_STREAM_URL", self.WS_URL)
         self._ws: Optional[WebSocketClientProtocol] = None
         self._running = False
         self._callbacks: dict[str, list[Callable]] = {}
@@ -36,11 +40,11 @@ class MarketWSClient:
     
     async def connect(self):
         """Connect to market data stream."""
-        logger.info(f"Connecting to market stream: {self.WS_URL}")
+        logger.info(f"Connecting to market stream: {self.url}")
         for attempt in range(3):
             try:
                 self._ws = await asyncio.wait_for(websockets.connect(
-                    self.WS_URL,
+                    self.url,
                     ping_interval=None,
                     ping_timeout=60,
                     close_timeout=10,
@@ -100,6 +104,7 @@ class MarketWSClient:
             
             try:
                 message = await self._ws.recv()
+                recv_at = tracer.clock() if tracer.enabled else 0.0
                 data = json.loads(message)
                 self._msg_count += 1
                 
@@ -118,11 +123,16 @@ class MarketWSClient:
                 # Dispatch to callbacks
                 channel = data.get("channel")
                 if channel in self._callbacks:
-                    for callback in self._callbacks[channel]:
-                        try:
-                            callback(data)
-                        except Exception as e:
-                            logger.error(f"Callback error: {e}")
+                    if recv_at and channel == "price":
+                        tracer.price_dispatch(data, recv_at)
+                    try:
+                        for callback in self._callbacks[channel]:
+                            try:
+                                callback(data)
+                            except Exception as e:
+                                logger.error(f"Callback error: {e}")
+                    finally:
+                        tracer.current_price = None
                             
             except websockets.ConnectionClosed as e:
                 logger.warning(f"Market stream connection closed: {e}")
@@ -150,7 +160,8 @@ class UserWSClient:
     WS_URL = "wss://perps.standx.com/ws-api/v1"
     RECONNECT_DELAY = 5  # seconds
     
-    def __init__(self, auth: StandXAuth):
+    def __init__(self, auth: StandXAuth, url: Optional[str] = None):
+        self.url = url or os.environ.get("STANDX_WS_API_URL", self.WS_URL)
         self._auth = auth
         self._ws: Optional[WebSocketClientProtocol] = None
         self._running = False
@@ -161,11 +172,11 @@ class UserWSClient:
         """Connect to user data stream."""
         import uuid
 
-        logger.info(f"Connecting to user stream: {self.WS_URL}")
+        logger.info(f"Connecting to user stream: {self.url}")
         for attempt in range(3):
             try:
                 self._ws = await asyncio.wait_for(websockets.connect(
-                    self.WS_URL,
+                    self.url,
                     ping_interval=None,
                     ping_timeout=60,
                     close_timeout=10,
@@ -258,6 +269,7 @@ class UserWSClient:
             
             try:
                 message = await self._ws.recv()
+                recv_at = tracer.clock() if tracer.enabled else 0.0
                 data = json.loads(message)
                 
                 # Handle server ping (JSON-based)
@@ -267,6 +279,8 @@ class UserWSClient:
                 
                 # Dispatch to callbacks based on channel
                 channel = data.get("channel")
+                if recv_at and channel == "order":
+                    tracer.order_update(data.get("data", {}), recv_at)
                 if channel in self._callbacks:
                     for callback in self._callbacks[channel]:
                         try:
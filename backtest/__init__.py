@@ -0,0 +1,4 @@
+"""Offline backtest / replay of the market making logic."""
+from backtest.clock import VirtualTimeLoop, patch_clock
+from backtest.exchange import SimExchange, SimClient, LatencyModel, FillModel, Fill
+from backtest.engine import Backtest, BacktestReport, load_ticks
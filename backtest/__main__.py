@@ -0,0 +1,66 @@
+"""Backtest CLI.
+
+Usage:
+    python -m backtest --config config.yaml --ticks prices.csv
+    python -m backtest --config config.yaml --ticks tape/BTC-USD/2026101*.tape
+    python -m backtest -c config.yaml -t prices.csv --latency-ms 80 --through-bps 1 --json report.json
+"""
+import json
+import logging
+import argparse
+
+from config import load_config
+from backtest.engine import Backtest, load_ticks
+from backtest.exchange import LatencyModel, FillModel
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="StandX Maker Bot - backtest")
+    parser.add_argument("--config", "-c", default="config.yaml", help="Strategy config (first symbol is used)")
+    parser.add_argument("--ticks", "-t", nargs="+", required=True, help="Tape files (.tape) or CSV files (ts,last_price)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="REST round trip (default: 50)")
+    parser.add_argument("--latency-jitter-ms", type=float, default=10.0, help="REST round trip jitter (default: 10)")
+    parser.add_argument("--ws-latency-ms", type=float, default=20.0, help="User WS delay (default: 20)")
+    parser.add_argument("--through-bps", type=float, default=0.0, help="Price must trade this far through an order to fill (default: 0 = touch)")
+    parser.add_argument("--fill-prob", type=float, default=1.0, help="Fill probability per eligible tick (default: 1)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for latency/fill models")
+    parser.add_argument("--json", help="Write the report (with fills and inventory path) to this file")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Show Maker logs")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+    )
+    if not args.verbose:
+        # Per-order cancel warnings would flood the output over a long replay
+        logging.getLogger("core").setLevel(logging.ERROR)
+
+    config = load_config(args.config)
+    ticks = sorted(tick for path in args.ticks for tick in load_ticks(path))
+    backtest = Backtest(
+        config,
+        ticks,
+        latency=LatencyModel(
+            rest_ms=args.latency_ms,
+            rest_jitter_ms=args.latency_jitter_ms,
+            ws_ms=args.ws_latency_ms,
+            seed=args.seed,
+        ),
+        fill_model=FillModel(through_bps=args.through_bps, fill_prob=args.fill_prob, seed=args.seed),
+    )
+    report = backtest.run()
+    print(report.format())
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(detail=True), f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Replay a recorded price stream through the real Maker and State.
+
+The Maker, State and volatility estimators run unmodified on a
+VirtualTimeLoop against a SimClient/SimExchange, wired exactly like
+main.py: prices go to Maker.on_price_update, order and position updates
+from the simulated user stream go to State.
+"""
+import csv
+import time
+import asyncio
+import logging
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import core.maker
+import core.state
+from config import Config
+from tape import TAPE_SUFFIX, open_tape
+from api.symbol_info import SymbolInfo, SymbolInfoCache
+from core.state import State
+from core.maker import Maker
+from backtest.clock import VirtualTimeLoop, patch_clock
+from backtest.exchange import SimExchange, SimClient, LatencyModel, FillModel, Fill
+
+
+logger = logging.getLogger(__name__)
+
+
+# StandX Maker Points: an order earns points once it has rested this long
+POINTS_MIN_REST_SEC = 3.0
+
+
+def load_ticks(path: str) -> List[Tuple[float, float]]:
+    """
+    Load a price stream from a tape file (see tape.py) or CSV.
+
+    CSV rows are ``ts,last_price[,...]`` with ts in epoch seconds or
+    milliseconds; a header row and extra columns are ignored.
+    """
+    if path.endswith(TAPE_SUFFIX):
+        records = open_tape(path)
+        return list(zip(records["recv_ts"].tolist(), records["last"].tolist()))
+
+    ticks = []
+    with open(path, "r", newline="") as f:
+        for row in csv.reader(f):
+            try:
+                ts, price = float(row[0]), float(row[1])
+            except (ValueError, IndexError):
+                continue  # header / blank line
+            if ts > 1e11:
+                ts /= 1000
+            ticks.append((ts, price))
+    ticks.sort(key=lambda t: t[0])
+    return ticks
+
+
+def _merge(intervals: Iterable[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Union of intervals as a sorted list of disjoint intervals."""
+    merged: List[Tuple[float, float]] = []
+    for start, end in sorted(i for i in intervals if i[1] > i[0]):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _length(intervals: List[Tuple[float, float]]) -> float:
+    return sum(end - start for start, end in intervals)
+
+
+def _intersect(a: List[Tuple[float, float]], b: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Intersection of two merged interval lists."""
+    out, i, j = [], 0, 0
+    while i < len(a) and j < len(b):
+        start, end = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if start < end:
+            out.append((start, end))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+
+@dataclass
+class BacktestReport:
+    """Result of a replay. Percentages are of the replayed duration."""
+    symbol: str
+    ticks: int
+    duration_sec: float
+    wall_sec: float
+
+    # Order flow
+    placed: int
+    cancel_requests: int
+    cancelled: int
+    cancel_too_late: int
+    rejected: int
+    reduce_orders: int
+
+    # Fills and inventory
+    fills: int
+    maker_fills: int
+    buy_volume: float
+    sell_volume: float
+    final_position: float
+    max_abs_position: float
+    realized_pnl: float
+    unrealized_pnl: float
+
+    # Quoting
+    time_on_book_pct: Dict[str, float]  # side -> % of time with an order on the book
+    avg_rest_sec: Dict[str, float]  # side -> mean life of an order
+    points_uptime_pct: Dict[str, float]  # buy / sell / both: orders resting >= 3s
+    requote_gap_ms_p50: Optional[float] = None
+
+    fill_log: List[Fill] = field(default_factory=list, repr=False)
+    inventory_path: List[Tuple[float, float]] = field(default_factory=list, repr=False)
+
+    @property
+    def speedup(self) -> float:
+        return self.duration_sec / self.wall_sec if self.wall_sec > 0 else float("inf")
+
+    def to_dict(self, detail: bool = False) -> dict:
+        data = asdict(self)
+        data["speedup"] = round(self.speedup, 1)
+        if not detail:
+            data.pop("fill_log")
+            data.pop("inventory_path")
+        return data
+
+    def format(self) -> str:
+        """Human readable summary."""
+        lines = [
+            "=" * 60,
+            f"Backtest {self.symbol}: {self.ticks} ticks, {self.duration_sec / 3600:.2f}h "
+            f"replayed in {self.wall_sec:.2f}s ({self.speedup:,.0f}x)",
+            "=" * 60,
+            f"Orders placed:     {self.placed}",
+            f"Cancels:           {self.cancelled} ok / {self.cancel_too_late} too late "
+            f"({self.cancel_requests} requests)",
+            f"Rejected:          {self.rejected}",
+            f"Reduce orders:     {self.reduce_orders}",
+            f"Fills:             {self.fills} ({self.maker_fills} maker), "
+            f"buy {self.buy_volume:.4f} / sell {self.sell_volume:.4f}",
+            f"Position:          final {self.final_position:+.4f}, max |{self.max_abs_position:.4f}|",
+            f"PnL:               realized ${self.realized_pnl:,.2f}, unrealized ${self.unrealized_pnl:,.2f}",
+        ]
+        for side in ("buy", "sell"):
+            lines.append(
+                f"{side.capitalize():<5} on book:     {self.time_on_book_pct[side]:.1f}%, "
+                f"avg rest {self.avg_rest_sec[side]:.1f}s"
+            )
+        lines.append(
+            f"Points uptime:     buy {self.points_uptime_pct['buy']:.1f}% / "
+            f"sell {self.points_uptime_pct['sell']:.1f}% / both {self.points_uptime_pct['both']:.1f}%"
+        )
+        if self.requote_gap_ms_p50 is not None:
+            lines.append(f"Requote gap p50:   {self.requote_gap_ms_p50:.0f}ms")
+        return "\n".join(lines)
+
+
+@contextmanager
+def _replaced(module, name: str, value):
+    original = getattr(module, name)
+    setattr(module, name, value)
+    try:
+        yield
+    finally:
+        setattr(module, name, original)
+
+
+class Backtest:
+    """Replays ticks through Maker/State against a simulated exchange."""
+
+    def __init__(
+        self,
+        config: Config,
+        ticks: List[Tuple[float, float]],
+        latency: Optional[LatencyModel] = None,
+        fill_model: Optional[FillModel] = None,
+        symbol_info: Optional[SymbolInfo] = None,
+    ):
+        if not ticks:
+            raise ValueError("No ticks to replay")
+        self.config = config
+        self.ticks = ticks
+        self.exchange = SimExchange(config.symbol, latency, fill_model, symbol_info)
+        self.client = SimClient(self.exchange)
+        self.state: Optional[State] = None
+        self.maker: Optional[Maker] = None
+
+    def run(self) -> BacktestReport:
+        """Replay all ticks and return the report."""
+        loop = VirtualTimeLoop(start=self.ticks[0][0])
+        wall_start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                stack.enter_context(patch_clock(loop, core.state, core.maker))
+                # No alerts from simulated failures
+                stack.enter_context(_replaced(core.maker, "send_notify", lambda *args, **kwargs: None))
+                loop.run_until_complete(self._replay())
+        finally:
+            loop.close()
+        return self._report(time.perf_counter() - wall_start)
+
+    async def _replay(self):
+        self.state = State()
+        self.maker = Maker(self.config, self.client, self.state, SymbolInfoCache(cache_file=None))
+        self.exchange.on_order(self._on_order)
+        self.exchange.on_position(self._on_position)
+
+        await self.maker.initialize()
+        maker_task = asyncio.create_task(self.maker.run(), name="maker")
+
+        loop = asyncio.get_running_loop()
+        for ts, price in self.ticks:
+            delay = ts - loop.time()
+            # Always yield so the maker sees every tick it was woken for
+            await asyncio.sleep(delay if delay > 0 else 0)
+            self.exchange.on_price(price)
+            self.maker.on_price_update(price)
+
+        await self.maker.stop()
+        await maker_task
+        self.exchange.finish()
+
+    def _on_order(self, data: dict):
+        """Same handling as main.py's user WS order callback."""
+        order_data = data.get("data", {})
+        self.maker.on_order_update(order_data.get("cl_ord_id", ""), order_data.get("status"))
+
+    def _on_position(self, data: dict):
+        """Same handling as main.py's user WS position callback."""
+        pos_data = data.get("data", {})
+        entry_price = pos_data.get("entry_price")
+        self.maker.on_position_update(float(pos_data.get("qty", 0)), float(entry_price) if entry_price else None)
+
+    def _report(self, wall_sec: float) -> BacktestReport:
+        ex = self.exchange
+        start, end = self.ticks[0][0], self.ticks[-1][0]
+        duration = max(end - start, 1e-9)
+
+        on_book, points, avg_rest = {}, {}, {}
+        for side in ("buy", "sell"):
+            intervals = [(a, b) for s, a, b in ex.rest_intervals if s == side]
+            on_book[side] = _merge(intervals)
+            points[side] = _merge((a + POINTS_MIN_REST_SEC, b) for a, b in intervals)
+            avg_rest[side] = _length(intervals) / len(intervals) if intervals else 0.0
+        both = _intersect(points["buy"], points["sell"])
+
+        gaps = sorted(self.maker.get_requote_gaps_ms())
+        last_price = self.ticks[-1][1]
+        return BacktestReport(
+            symbol=self.config.symbol,
+            ticks=len(self.ticks),
+            duration_sec=end - start,
+            wall_sec=wall_sec,
+            placed=ex.stats.placed,
+            cancel_requests=ex.stats.cancel_requests,
+            cancelled=ex.stats.cancelled,
+            cancel_too_late=ex.stats.cancel_too_late,
+            rejected=ex.stats.rejected,
+            reduce_orders=ex.stats.reduce_orders,
+            fills=len(ex.fills),
+            maker_fills=sum(1 for f in ex.fills if f.maker),
+            buy_volume=sum(f.qty for f in ex.fills if f.side == "buy"),
+            sell_volume=sum(f.qty for f in ex.fills if f.side == "sell"),
+            final_position=ex.position,
+            max_abs_position=max((abs(p) for _, p in ex.inventory), default=0.0),
+            realized_pnl=ex.realized_pnl,
+            unrealized_pnl=(last_price - ex.entry_price) * ex.position,
+            time_on_book_pct={s: _length(on_book[s]) / duration * 100 for s in on_book},
+            avg_rest_sec=avg_rest,
+            points_uptime_pct={
+                "buy": _length(points["buy"]) / duration * 100,
+                "sell": _length(points["sell"]) / duration * 100,
+                "both": _length(both) / duration * 100,
+            },
+            requote_gap_ms_p50=gaps[len(gaps) // 2] if gaps else None,
+            fill_log=list(ex.fills),
+            inventory_path=list(ex.inventory),
+        )
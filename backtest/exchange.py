@@ -0,0 +1,327 @@
+"""Simulated StandX exchange and HTTP client for replays.
+
+SimClient implements the subset of StandXHTTPClient the Maker uses. Each
+request travels to the exchange in half of a sampled round trip, is applied
+to the simulated book, and the response comes back in the other half, so
+fills can race cancels just like live. Order and position updates are
+delivered to the registered callbacks after a separate WS latency, in the
+same message shape as UserWSClient.
+"""
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from api.http_client import Order, Position
+from api.symbol_info import SymbolInfo, default_symbol_info
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LatencyModel:
+    """Gaussian latency with a floor, in milliseconds."""
+    rest_ms: float = 50.0  # REST round trip
+    rest_jitter_ms: float = 10.0
+    ws_ms: float = 20.0  # exchange -> user WS
+    ws_jitter_ms: float = 5.0
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def _sample(self, mean_ms: float, jitter_ms: float) -> float:
+        return max(0.0, self._rng.gauss(mean_ms, jitter_ms)) / 1000
+
+    def rest(self) -> float:
+        """REST round trip in seconds."""
+        return self._sample(self.rest_ms, self.rest_jitter_ms)
+
+    def ws(self) -> float:
+        """User WS delivery delay in seconds."""
+        return self._sample(self.ws_ms, self.ws_jitter_ms)
+
+
+@dataclass
+class FillModel:
+    """
+    When a resting order gets filled by the last price.
+
+    An order is eligible once the price trades through it by through_bps
+    (0 = touching the price is enough), then fills with fill_prob per
+    eligible tick to account for queue position.
+    """
+    through_bps: float = 0.0
+    fill_prob: float = 1.0
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def fills(self, side: str, order_price: float, price: float) -> bool:
+        edge = order_price * self.through_bps / 10000
+        if side == "buy":
+            crossed = price <= order_price - edge
+        else:
+            crossed = price >= order_price + edge
+        return crossed and (self.fill_prob >= 1.0 or self._rng.random() < self.fill_prob)
+
+
+@dataclass
+class SimOrder:
+    cl_ord_id: str
+    side: str
+    price: float
+    qty: float
+    placed_at: float
+    reduce_only: bool = False
+
+
+@dataclass
+class Fill:
+    ts: float
+    cl_ord_id: str
+    side: str
+    price: float
+    qty: float
+    maker: bool
+    position: float  # position after the fill
+
+
+@dataclass
+class ExchangeStats:
+    placed: int = 0
+    rejected: int = 0
+    cancel_requests: int = 0
+    cancelled: int = 0
+    cancel_too_late: int = 0  # cancel arrived after the order filled
+    reduce_orders: int = 0
+
+
+class SimExchange:
+    """Single-symbol matching against a replayed last price."""
+
+    def __init__(
+        self,
+        symbol: str,
+        latency: Optional[LatencyModel] = None,
+        fill_model: Optional[FillModel] = None,
+        symbol_info: Optional[SymbolInfo] = None,
+    ):
+        self.symbol = symbol
+        self.latency = latency or LatencyModel()
+        self.fill_model = fill_model or FillModel()
+        self.symbol_info = symbol_info or default_symbol_info(symbol)
+
+        self.last_price: Optional[float] = None
+        self.orders: Dict[str, SimOrder] = {}
+        self.position = 0.0
+        self.entry_price = 0.0
+        self.realized_pnl = 0.0
+
+        self.stats = ExchangeStats()
+        self.fills: List[Fill] = []
+        self.inventory: List[Tuple[float, float]] = []  # (ts, position) after each change
+        self.rest_intervals: List[Tuple[str, float, float]] = []  # (side, placed, removed)
+
+        self._callbacks: Dict[str, List[Callable[[dict], None]]] = {}
+
+    # -- user stream --------------------------------------------------------
+
+    def on_order(self, callback: Callable[[dict], None]):
+        self._callbacks.setdefault("order", []).append(callback)
+
+    def on_position(self, callback: Callable[[dict], None]):
+        self._callbacks.setdefault("position", []).append(callback)
+
+    def _publish(self, channel: str, data: dict):
+        loop = asyncio.get_running_loop()
+        for callback in self._callbacks.get(channel, []):
+            loop.call_later(self.latency.ws(), callback, {"channel": channel, "data": data})
+
+    # -- matching -----------------------------------------------------------
+
+    def _now(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def on_price(self, price: float):
+        """Apply a new last price, filling resting orders it trades through."""
+        self.last_price = price
+        for order in [o for o in self.orders.values() if self.fill_model.fills(o.side, o.price, price)]:
+            self._fill(order, order.price, maker=True)
+
+    def _remove(self, order: SimOrder):
+        del self.orders[order.cl_ord_id]
+        self.rest_intervals.append((order.side, order.placed_at, self._now()))
+
+    def _reducible(self, side: str, qty: float) -> float:
+        """Part of qty a reduce-only order may trade: 0 when flat or on the position's side."""
+        if self.position == 0 or (side == "buy") == (self.position > 0):
+            return 0.0
+        return min(qty, abs(self.position))
+
+    def _fill(self, order: SimOrder, price: float, maker: bool):
+        if order.cl_ord_id in self.orders:
+            self._remove(order)
+        qty = order.qty
+        if order.reduce_only:
+            qty = self._reducible(order.side, qty)
+            if qty <= 0:
+                # Position closed while it rested: the exchange cancels it
+                self._publish("order", {
+                    "cl_ord_id": order.cl_ord_id, "side": order.side, "status": "cancelled", "symbol": self.symbol,
+                })
+                return
+        self._apply_trade(order.side, price, qty)
+        self.fills.append(Fill(self._now(), order.cl_ord_id, order.side, price, qty, maker, self.position))
+        self._publish("order", {
+            "cl_ord_id": order.cl_ord_id, "side": order.side, "status": "filled",
+            "symbol": self.symbol, "price": str(price), "qty": str(qty),
+        })
+        self._publish("position", {
+            "symbol": self.symbol, "qty": str(self.position), "entry_price": str(self.entry_price),
+        })
+
+    def _apply_trade(self, side: str, price: float, qty: float):
+        signed = qty if side == "buy" else -qty
+        new_position = self.position + signed
+        if self.position == 0 or (self.position > 0) == (signed > 0):
+            # Opening / adding: average the entry price
+            self.entry_price = (
+                (self.entry_price * abs(self.position) + price * qty) / abs(new_position)
+            )
+        else:
+            closed = min(qty, abs(self.position))
+            direction = 1 if self.position > 0 else -1
+            self.realized_pnl += (price - self.entry_price) * closed * direction
+            if abs(new_position) < 1e-12:
+                new_position, self.entry_price = 0.0, 0.0
+            elif (new_position > 0) != (self.position > 0):
+                self.entry_price = price  # flipped
+        self.position = new_position
+        self.inventory.append((self._now(), self.position))
+
+    # -- request handlers (run at request arrival) --------------------------
+
+    def new_order(
+        self, side: str, qty: float, price: float, cl_ord_id: str, order_type: str, reduce_only: bool = False,
+    ) -> dict:
+        if reduce_only:
+            # Never opens or flips a position: clamp to its size, reject when flat or same side
+            if self._reducible(side, qty) <= 0:
+                self.stats.rejected += 1
+                return {"code": 400, "message": "reduce only order would increase position"}
+            qty = self._reducible(side, qty)
+
+        if order_type == "market":
+            self.stats.reduce_orders += 1
+            if self.last_price is None:
+                return {"code": 400, "message": "no price"}
+            order = SimOrder(cl_ord_id, side, self.last_price, qty, self._now(), reduce_only)
+            self._fill(order, self.last_price, maker=False)
+            return {"code": 0}
+
+        if cl_ord_id in self.orders or qty <= 0:
+            self.stats.rejected += 1
+            return {"code": 400, "message": "invalid order"}
+
+        self.stats.placed += 1
+        order = SimOrder(cl_ord_id, side, price, qty, self._now(), reduce_only)
+        self.orders[cl_ord_id] = order
+        self._publish("order", {"cl_ord_id": cl_ord_id, "side": side, "status": "new", "symbol": self.symbol})
+        if self.last_price is not None and (
+            (side == "buy" and price >= self.last_price) or (side == "sell" and price <= self.last_price)
+        ):
+            # Marketable on arrival: takes liquidity
+            self._fill(order, self.last_price, maker=False)
+        return {"code": 0}
+
+    def cancel(self, cl_ord_ids: List[str]) -> dict:
+        self.stats.cancel_requests += 1
+        results = []
+        for cl_ord_id in cl_ord_ids:
+            order = self.orders.get(cl_ord_id)
+            if order is None:
+                self.stats.cancel_too_late += 1
+                results.append({"cl_ord_id": cl_ord_id, "code": 404})
+                continue
+            self._remove(order)
+            self.stats.cancelled += 1
+            results.append({"cl_ord_id": cl_ord_id, "code": 0})
+            self._publish("order", {
+                "cl_ord_id": cl_ord_id, "side": order.side, "status": "cancelled", "symbol": self.symbol,
+            })
+        return {"code": 0, "result": results}
+
+    def finish(self):
+        """Close the books at the end of the replay (for time-on-book)."""
+        for order in list(self.orders.values()):
+            self._remove(order)
+
+
+class SimClient:
+    """Drop-in for StandXHTTPClient backed by a SimExchange."""
+
+    def __init__(self, exchange: SimExchange):
+        self.exchange = exchange
+
+    async def _round_trip(self, handler, *args):
+        half = self.exchange.latency.rest() / 2
+        await asyncio.sleep(half)
+        result = handler(*args)
+        await asyncio.sleep(half)
+        return result
+
+    async def new_order(
+        self,
+        symbol: str,
+        side: str,
+        qty: str,
+        price: str,
+        cl_ord_id: str,
+        order_type: str = "limit",
+        time_in_force: str = "gtc",
+        reduce_only: bool = False,
+        leverage: int = None,
+    ) -> dict:
+        return await self._round_trip(
+            self.exchange.new_order, side, float(qty), float(price), cl_ord_id, order_type, reduce_only
+        )
+
+    async def cancel_order(self, cl_ord_id: str) -> dict:
+        return await self._round_trip(self.exchange.cancel, [cl_ord_id])
+
+    async def cancel_orders(self, cl_ord_ids: List[str]) -> dict:
+        return await self._round_trip(self.exchange.cancel, list(cl_ord_ids))
+
+    async def query_open_orders(self, symbol: Optional[str] = None) -> List[Order]:
+        return await self._round_trip(lambda: [
+            Order(id=i, cl_ord_id=o.cl_ord_id, side=o.side, price=str(o.price), qty=str(o.qty),
+                  status="new", symbol=self.exchange.symbol)
+            for i, o in enumerate(self.exchange.orders.values())
+        ])
+
+    async def query_positions(self, symbol: Optional[str] = None) -> List[Position]:
+        ex = self.exchange
+
+        def positions():
+            if ex.position == 0:
+                return []
+            upnl = (ex.last_price - ex.entry_price) * ex.position if ex.last_price else 0.0
+            return [Position(qty=ex.position, entry_price=ex.entry_price, upnl=upnl)]
+
+        return await self._round_trip(positions)
+
+    async def query_symbol_info(self, symbol: Optional[str] = None) -> List[dict]:
+        info = self.exchange.symbol_info
+        return [{
+            "symbol": info.symbol,
+            "tick_size": f"{info.tick_size:.{info.price_decimals}f}",
+            "lot_size": f"{info.lot_size:.{info.qty_decimals}f}",
+            "min_order_qty": info.min_qty,
+        }]
+
+    async def close(self):
+        pass
@@ -0,0 +1,3 @@
+"""Microbenchmarks of the bot's hot paths."""
+from bench.harness import BenchResult, measure, measure_async, environment
+from bench.cases import benchmarks
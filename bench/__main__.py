@@ -0,0 +1,101 @@
+"""Benchmark CLI.
+
+Usage:
+    python -m bench
+    python -m bench -k update_price tick --min-time 0.3
+    python -m bench --out bench_results.json --compare baseline.json
+
+Results are written as JSON (environment, commit and one entry per
+benchmark with ops_per_sec, mean_ns, p50_ns, p99_ns) so runs from
+different commits can be compared with --compare.
+"""
+import sys
+import json
+import asyncio
+import logging
+import argparse
+
+from bench.cases import benchmarks
+from bench.harness import measure, measure_async, environment
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="StandX Maker Bot - microbenchmarks")
+    parser.add_argument("-k", dest="filters", nargs="+", default=[], help="Only run benchmarks whose name contains one of these")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds per benchmark (default: 1)")
+    parser.add_argument("--out", "-o", default="bench_results.json", help="Result file (default: bench_results.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Flag p50 changes above this percent (default: 10)")
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    return parser.parse_args()
+
+
+def _format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f}ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f}us"
+    return f"{ns:.0f}ns"
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Print p50 / ops changes against a baseline; returns the number of regressions."""
+    old = baseline.get("results", {})
+    regressions = 0
+    print(f"\nCompared with {baseline.get('env', {}).get('commit')} (p50, + = slower):")
+    for name, result in results.items():
+        before = old.get(name)
+        if not before:
+            print(f"  {name:<45} new")
+            continue
+        change = (result["p50_ns"] / before["p50_ns"] - 1) * 100
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  improved"
+        print(
+            f"  {name:<45} {_format_ns(before['p50_ns']):>9} -> {_format_ns(result['p50_ns']):>9}"
+            f" ({change:+.1f}%){flag}"
+        )
+    return regressions
+
+
+def main():
+    args = parse_args()
+    # The tick path logs every order action; keep the console (and timings) clean
+    logging.disable(logging.CRITICAL)
+
+    registry = benchmarks()
+    names = [n for n in registry if not args.filters or any(f in n for f in args.filters)]
+    if args.list:
+        print("\n".join(names))
+        return
+    if not names:
+        sys.exit(f"No benchmark matches {args.filters}")
+
+    results = {}
+    print(f"{'benchmark':<45} {'ops/s':>12} {'p50':>9} {'p99':>9}")
+    for name in names:
+        with registry[name]() as fn:
+            timer = measure_async if asyncio.iscoroutinefunction(fn) else measure
+            result = timer(name, fn, args.min_time)
+        results[name] = result.to_dict()
+        print(f"{name:<45} {result.ops_per_sec:>12,.0f} {_format_ns(result.p50_ns):>9} {_format_ns(result.p99_ns):>9}")
+
+    report = {"env": environment(), "min_time": args.min_time, "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Benchmark cases for the tick path.
+
+Each case is a context manager yielding the operation to time, so it can
+build realistic state up front and undo any patching afterwards. State
+timestamps come from a fake clock that advances a fixed step per call,
+which keeps the price window at a chosen size no matter how fast the
+benchmark runs.
+"""
+import json
+import random
+import itertools
+from types import SimpleNamespace
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import core.state
+from config import Config, WalletConfig, LadderLevel
+from api.auth import StandXAuth
+from api.symbol_info import SymbolInfoCache
+from core.state import State, OpenOrder, LIVE
+from core.maker import Maker
+from core.volatility import create_estimator
+
+
+WINDOW_SEC = 5
+WINDOW_SIZES = (10, 100, 1000, 10000)
+ESTIMATORS = ("range", "ewma", "rv", "multi")
+LADDER_SIZES = (1, 3, 5)
+START_PRICE = 100000.0
+
+# Message as received on the market stream
+PRICE_MESSAGE = json.dumps({
+    "seq": 1234567,
+    "channel": "price",
+    "symbol": "BTC-USD",
+    "data": {
+        "base": "BTC",
+        "index_price": "100012.35",
+        "last_price": "100010.5",
+        "mark_price": "100011.92",
+        "mid_price": "100010.55",
+        "quote": "USD",
+        "spread": ["100010.5", "100010.6"],
+        "symbol": "BTC-USD",
+        "time": "2026-10-18T08:00:00.123456Z",
+    },
+})
+
+# Body of a typical new_order request
+ORDER_PAYLOAD = json.dumps({
+    "symbol": "BTC-USD",
+    "side": "buy",
+    "order_type": "limit",
+    "qty": "0.010",
+    "price": "99910.00",
+    "time_in_force": "gtc",
+    "reduce_only": False,
+    "cl_ord_id": "mm-buy0-1a2b3c4d",
+    "leverage": 1,
+})
+
+
+def _config(levels: int = 1, estimator: str = "range") -> Config:
+    return Config(
+        wallet=WalletConfig(chain="bsc", private_key=""),
+        symbol="BTC-USD",
+        order_distance_bps=10,
+        cancel_distance_bps=5,
+        rebalance_distance_bps=20,
+        order_size_btc=0.01,
+        max_position_btc=0.1,
+        volatility_window_sec=WINDOW_SEC,
+        volatility_threshold_bps=1e9,
+        volatility_estimator=estimator,
+        levels=[LadderLevel(10 + 5 * i, 0.01) for i in range(levels)],
+    )
+
+
+def _prices(n: int = 4096, seed: int = 1) -> List[float]:
+    """Random walk with 0.5bps steps."""
+    rng = random.Random(seed)
+    price, prices = START_PRICE, []
+    for _ in range(n):
+        price *= 1 + rng.gauss(0, 0.5) / 10000
+        prices.append(round(price, 2))
+    return prices
+
+
+@contextmanager
+def _fake_clock(step: float) -> Iterator[None]:
+    """Point core.state at a clock advancing ``step`` seconds per call."""
+    original = core.state.time
+    core.state.time = SimpleNamespace(time=itertools.count(1_800_000_000.0, step).__next__)
+    try:
+        yield
+    finally:
+        core.state.time = original
+
+
+def _filled_state(window: int, estimator: str = "range") -> Tuple[State, Callable[[], None]]:
+    """State with a full window; returns it and a one-tick update function."""
+    state = State()
+    state.volatility_estimator = create_estimator(_config(estimator=estimator), state.price_window)
+    prices = _prices()
+    mask = len(prices) - 1
+    counter = itertools.count()
+
+    def update():
+        state.update_price(prices[next(counter) & mask], WINDOW_SEC)
+
+    for _ in range(window + 1):
+        update()
+    return state, update
+
+
+@contextmanager
+def update_price(window: int, estimator: str = "range"):
+    # One sample every WINDOW_SEC / window seconds keeps `window` samples
+    with _fake_clock(WINDOW_SEC / window):
+        _, update = _filled_state(window, estimator)
+        yield update
+
+
+@contextmanager
+def get_volatility_bps(estimator: str, window: int = 1000):
+    with _fake_clock(WINDOW_SEC / window):
+        state, _ = _filled_state(window, estimator)
+        yield state.get_volatility_bps
+
+
+def _quoted_state(levels: int, price: float = START_PRICE) -> State:
+    """State with a live order on every ladder slot, all inside their bands."""
+    config = _config(levels)
+    state = State()
+    for i, level in enumerate(config.levels):
+        state.set_distance_bands(level.cancel_distance_bps, level.rebalance_distance_bps, level=i)
+        for side in ("buy", "sell"):
+            offset = level.distance_bps / 10000 * (-1 if side == "buy" else 1)
+            state.add_order(OpenOrder(f"mm-{side}{i}-{i:08x}", side, round(price * (1 + offset), 2), level.size, i, LIVE))
+    state.last_price = price
+    return state
+
+
+@contextmanager
+def get_orders_to_cancel(levels: int):
+    state = _quoted_state(levels)
+    yield state.get_orders_to_cancel
+
+
+@contextmanager
+def sign_request():
+    auth = StandXAuth()
+    yield lambda: auth.sign_request(ORDER_PAYLOAD)
+
+
+@contextmanager
+def get_auth_headers():
+    auth = StandXAuth()
+    auth._token = "x" * 600  # JWT sized
+    yield lambda: auth.get_auth_headers(ORDER_PAYLOAD)
+
+
+@contextmanager
+def decode_price_message():
+    # What MarketWSClient.run does per message before dispatching
+    loads = json.loads
+    yield lambda: loads(PRICE_MESSAGE)
+
+
+class StubClient:
+    """Instant exchange: every order and cancel succeeds, cancels confirm immediately."""
+
+    def __init__(self, state: State):
+        self.state = state
+
+    async def new_order(self, symbol, side, qty, price, cl_ord_id, **kwargs) -> dict:
+        return {"code": 0}
+
+    async def cancel_orders(self, cl_ord_ids: List[str]) -> dict:
+        for cl_ord_id in cl_ord_ids:
+            self.state.apply_order_update(cl_ord_id, "cancelled")  # user WS confirmation
+        return {"code": 0, "result": [{"cl_ord_id": i, "code": 0} for i in cl_ord_ids]}
+
+    async def cancel_order(self, cl_ord_id: str) -> dict:
+        return await self.cancel_orders([cl_ord_id])
+
+    async def query_positions(self, symbol=None) -> list:
+        return []
+
+    async def query_open_orders(self, symbol=None) -> list:
+        return []
+
+
+def _maker(levels: int) -> Tuple[Maker, State]:
+    state = _quoted_state(levels)
+    maker = Maker(_config(levels), None, state, SymbolInfoCache(cache_file=None))
+    maker.client = StubClient(state)
+    # Flat window: the volatility gate is open
+    state.price_window.push(0.0, START_PRICE)
+    state.price_window.push(0.0, START_PRICE)
+    return maker, state
+
+
+@contextmanager
+def tick_quiet(levels: int):
+    """_tick with every slot quoted and in band: checks only, no requests."""
+    maker, _ = _maker(levels)
+    yield maker._tick
+
+
+@contextmanager
+def tick_requote(levels: int):
+    """_tick after a 100bps jump: every order is requoted (cancel + new)."""
+    maker, state = _maker(levels)
+    prices = itertools.cycle((START_PRICE * 1.01, START_PRICE))
+
+    async def tick():
+        state.last_price = next(prices)
+        await maker._tick()
+
+    yield tick
+
+
+@contextmanager
+def on_price_update(levels: int):
+    """Maker.on_price_update on a quiet book (the per-message path)."""
+    with _fake_clock(WINDOW_SEC / 100):
+        maker, state = _maker(levels)
+        prices = [START_PRICE * (1 + d / 10000) for d in (-0.5, 0.0, 0.5, 0.0)]
+        counter = itertools.count()
+        update = maker.on_price_update
+
+        def tick():
+            update(prices[next(counter) & 3])
+
+        yield tick
+
+
+def benchmarks() -> Dict[str, Callable]:
+    """All benchmarks by name, in report order."""
+    registry: Dict[str, Callable] = {}
+    for window in WINDOW_SIZES:
+        registry[f"state.update_price[window={window}]"] = lambda w=window: update_price(w)
+    for estimator in ESTIMATORS[1:]:
+        registry[f"state.update_price[window=1000,{estimator}]"] = lambda e=estimator: update_price(1000, e)
+    for estimator in ESTIMATORS:
+        registry[f"state.get_volatility_bps[{estimator}]"] = lambda e=estimator: get_volatility_bps(e)
+    for levels in LADDER_SIZES:
+        registry[f"state.get_orders_to_cancel[levels={levels}]"] = lambda n=levels: get_orders_to_cancel(n)
+    registry["auth.sign_request"] = sign_request
+    registry["auth.get_auth_headers"] = get_auth_headers
+    registry["ws.decode_price_message"] = decode_price_message
+    for levels in LADDER_SIZES:
+        registry[f"maker.on_price_update[levels={levels}]"] = lambda n=levels: on_price_update(n)
+        registry[f"maker.tick[quiet,levels={levels}]"] = lambda n=levels: tick_quiet(n)
+        registry[f"maker.tick[requote,levels={levels}]"] = lambda n=levels: tick_requote(n)
+    return registry
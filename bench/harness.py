@@ -0,0 +1,139 @@
+"""Timing harness: ops/sec and per-op p50/p99.
+
+Operations are timed in batches sized so one batch takes at least
+``BATCH_NS``; the per-op time of a batch is its duration divided by its
+size. Operations slower than that (e.g. a maker tick) are timed one by
+one, so their p50/p99 are true per-call percentiles, while for sub-
+microsecond operations they describe the spread of batch means.
+"""
+import time
+import asyncio
+import platform
+import subprocess
+from dataclasses import dataclass, asdict
+from typing import Callable, List
+
+
+BATCH_NS = 20_000  # minimum duration of one timed batch
+MIN_BATCHES = 50
+MAX_BATCH = 1 << 16
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ops: int  # calls timed (after warmup)
+    batch: int  # calls per timed batch
+    ops_per_sec: float
+    mean_ns: float
+    p50_ns: float
+    p99_ns: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _result(name: str, batch: int, samples: List[float], total_ns: int) -> BenchResult:
+    ops = batch * len(samples)
+    ordered = sorted(samples)
+    return BenchResult(
+        name=name,
+        ops=ops,
+        batch=batch,
+        ops_per_sec=ops / total_ns * 1e9,
+        mean_ns=total_ns / ops,
+        p50_ns=_percentile(ordered, 50),
+        p99_ns=_percentile(ordered, 99),
+    )
+
+
+def measure(name: str, fn: Callable[[], object], min_time: float = 1.0) -> BenchResult:
+    """
+    Time a synchronous callable.
+
+    Args:
+        name: Benchmark name
+        fn: Operation to time, called without arguments
+        min_time: Seconds of timed batches (after calibration)
+    """
+    clock = time.perf_counter_ns
+
+    # Calibrate the batch size (doubles as warmup)
+    batch = 1
+    while True:
+        start = clock()
+        for _ in range(batch):
+            fn()
+        if clock() - start >= BATCH_NS or batch >= MAX_BATCH:
+            break
+        batch *= 2
+
+    samples = []
+    loops = range(batch)
+    total_ns = 0
+    deadline = clock() + int(min_time * 1e9)
+    while len(samples) < MIN_BATCHES or clock() < deadline:
+        start = clock()
+        for _ in loops:
+            fn()
+        elapsed = clock() - start
+        total_ns += elapsed
+        samples.append(elapsed / batch)
+    return _result(name, batch, samples, total_ns)
+
+
+async def _measure_async(name: str, fn, min_time: float) -> BenchResult:
+    clock = time.perf_counter_ns
+
+    batch = 1
+    while True:
+        start = clock()
+        for _ in range(batch):
+            await fn()
+        if clock() - start >= BATCH_NS or batch >= MAX_BATCH:
+            break
+        batch *= 2
+
+    samples = []
+    loops = range(batch)
+    total_ns = 0
+    deadline = clock() + int(min_time * 1e9)
+    while len(samples) < MIN_BATCHES or clock() < deadline:
+        start = clock()
+        for _ in loops:
+            await fn()
+        elapsed = clock() - start
+        total_ns += elapsed
+        samples.append(elapsed / batch)
+    return _result(name, batch, samples, total_ns)
+
+
+def measure_async(name: str, fn, min_time: float = 1.0) -> BenchResult:
+    """Time a coroutine function, awaited inside a fresh event loop."""
+    return asyncio.run(_measure_async(name, fn, min_time))
+
+
+def environment() -> dict:
+    """Interpreter, machine and commit, stored next to the results."""
+    info = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    try:
+        info["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+        info["dirty"] = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, timeout=5
+        ).stdout.strip())
+    except (OSError, subprocess.SubprocessError):
+        info["commit"] = None
+    return info
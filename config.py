@@ -1,7 +1,8 @@
 """Configuration loader for StandX Maker Bot."""
 import yaml
 from pathlib import Path
-from dataclasses import dataclass
+from typing import List, Optional
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -10,6 +11,15 @@ class WalletConfig:
     private_key: str
 
 
+@dataclass
+class LadderLevel:
+    """One quote level per side: distance from last_price and size."""
+    distance_bps: float
+    size: float
+    cancel_distance_bps: Optional[float] = None  # 默认使用全局 cancel_distance_bps
+    rebalance_distance_bps: Optional[float] = None  # 默认按全局 rebalance 与挂单距离之差平移
+
+
 @dataclass
 class Config:
     wallet: WalletConfig
@@ -22,6 +32,25 @@ class Config:
     volatility_window_sec: int
     volatility_threshold_bps: int
     leverage: int = 1  # 杠杆倍数，默认 1 倍
+    volatility_estimator: str = "range"  # range | ewma | rv | multi
+    volatility_ewma_halflife_sec: float = 5.0
+    volatility_horizons_sec: list = field(default_factory=lambda: [1, 5, 30])
+    levels: List[LadderLevel] = field(default_factory=list)  # 空 = 单档 (order_distance_bps, order_size_btc)
+    profile_ticks: bool = False  # 记录每次 tick 各步骤耗时，定期输出统计
+    trace_latency: bool = False  # 追踪行情到下单/撤单确认的各段延迟（进程内任一配置开启即全局生效）
+    rate_limit_per_sec: float = 10.0  # REST 限流：每秒请求数（账户级，多币种时取第一个配置）
+    rate_limit_burst: int = 20  # REST 限流：突发请求数上限
+
+    def __post_init__(self):
+        if not self.levels:
+            self.levels = [LadderLevel(self.order_distance_bps, self.order_size_btc)]
+        for level in self.levels:
+            if level.cancel_distance_bps is None:
+                level.cancel_distance_bps = self.cancel_distance_bps
+            if level.rebalance_distance_bps is None:
+                level.rebalance_distance_bps = (
+                    level.distance_bps + self.rebalance_distance_bps - self.order_distance_bps
+                )
 
     @classmethod
     def from_dict(cls, data: dict) -> "Config":
@@ -36,16 +65,51 @@ class Config:
             volatility_window_sec=data["volatility_window_sec"],
             volatility_threshold_bps=data["volatility_threshold_bps"],
             leverage=data.get("leverage", 1),  # 默认 1 倍杠杆
+            volatility_estimator=data.get("volatility_estimator", "range"),
+            volatility_ewma_halflife_sec=data.get("volatility_ewma_halflife_sec", 5.0),
+            volatility_horizons_sec=data.get("volatility_horizons_sec", [1, 5, 30]),
+            levels=[LadderLevel(**level) for level in data.get("levels") or []],
+            profile_ticks=data.get("profile_ticks", False),
+            trace_latency=data.get("trace_latency", False),
+            rate_limit_per_sec=data.get("rate_limit_per_sec", 10.0),
+            rate_limit_burst=data.get("rate_limit_burst", 20),
         )
 
 
-def load_config(path: str = "config.yaml") -> Config:
-    """Load configuration from YAML file."""
+def _read_yaml(path: str) -> dict:
     config_path = Path(path)
     if not config_path.exists():
         raise FileNotFoundError(f"Config file not found: {path}")
     
     with open(config_path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+        return yaml.safe_load(f)
+
+
+def configs_from_dict(data: dict) -> List[Config]:
+    """
+    Build one Config per symbol section.
     
-    return Config.from_dict(data)
+    If the file has a ``symbols`` list, each entry is merged over the
+    top-level keys (wallet and shared defaults), otherwise the file is a
+    single-symbol config.
+    """
+    sections = data.get("symbols")
+    if not sections:
+        return [Config.from_dict(data)]
+    
+    defaults = {k: v for k, v in data.items() if k != "symbols"}
+    configs = [Config.from_dict({**defaults, **section}) for section in sections]
+    names = [c.symbol for c in configs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate symbol in config: {names}")
+    return configs
+
+
+def load_config(path: str = "config.yaml") -> Config:
+    """Load configuration from YAML file (first symbol section if several)."""
+    return configs_from_dict(_read_yaml(path))[0]
+
+
+def load_configs(path: str = "config.yaml") -> List[Config]:
+    """Load all symbol sections of a YAML config file."""
+    return configs_from_dict(_read_yaml(path))
@@ -0,0 +1,334 @@
+"""Per-account wiring for StandX Maker Bot.
+
+One account (wallet) can make markets on several symbols in one process:
+- one StandXAuth login and one StandXHTTPClient connection pool
+- one UserWSClient whose order/position messages are routed by symbol
+- one Maker/State pair per symbol
+
+Price data comes from a MarketFeed, which owns a single MarketWSClient
+subscription per symbol and fans each price out to every interested
+maker, so it can be shared by several accounts.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from config import Config
+from api.auth import StandXAuth
+from api.http_client import StandXHTTPClient
+from api.rate_limiter import RateLimiter
+from api.symbol_info import SymbolInfoCache
+from api.ws_client import MarketWSClient, UserWSClient
+from core.state import State
+from core.maker import Maker
+from referral import check_if_referred, apply_referral, REFERRAL_CODE
+from tracing import tracer
+
+
+logger = logging.getLogger(__name__)
+
+
+class MarketFeed:
+    """Routes price messages from one market stream to makers by symbol."""
+
+    def __init__(self, market_ws: MarketWSClient):
+        self.market_ws = market_ws
+        self._makers: Dict[str, List[Maker]] = {}
+        self._subscribed: set = set()
+        market_ws.on_price(self._on_price)
+
+    async def add(self, symbol: str, maker: Maker):
+        """Route prices of symbol to maker, subscribing on first use."""
+        self._makers.setdefault(symbol, []).append(maker)
+        if symbol not in self._subscribed:
+            self._subscribed.add(symbol)
+            await self.market_ws.subscribe_price(symbol)
+
+    def remove(self, maker: Maker):
+        """Stop routing prices to maker (the subscription is kept)."""
+        for makers in self._makers.values():
+            if maker in makers:
+                makers.remove(maker)
+
+    def _on_price(self, data: dict):
+        price_data = data.get("data", {})
+        symbol = data.get("symbol") or price_data.get("symbol")
+        makers = self._makers.get(symbol)
+        if makers is None:
+            # Single-symbol streams may omit the symbol
+            if len(self._makers) != 1:
+                return
+            makers = next(iter(self._makers.values()))
+        last_price = price_data.get("last_price")
+        if last_price:
+            price = float(last_price)
+            for maker in makers:
+                # One failing maker must not starve the others
+                try:
+                    maker.on_price_update(price)
+                except Exception as e:
+                    logger.error(f"Price update failed for {maker.config.symbol}: {e}")
+            logger.debug(f"Price update: {symbol} {last_price}")
+
+
+def log_name(config_path: str) -> str:
+    """Log file stem for a config file, e.g. config-bot2.yaml -> config-bot2."""
+    return config_path.replace(".yaml", "").replace(".yml", "")
+
+
+class AccountRunner:
+    """All symbols of one wallet sharing auth, HTTP client and user stream."""
+
+    LATENCY_PERSIST_CHECK_SEC = 1.0  # how often a due latency snapshot is written
+
+    def __init__(
+        self,
+        config_path: str,
+        configs: List[Config],
+        feed: MarketFeed,
+        symbols: Optional[SymbolInfoCache] = None,
+    ):
+        self.config_path = config_path
+        self.configs = configs
+        self.feed = feed
+        self.symbols = symbols or SymbolInfoCache()
+        self.name = log_name(config_path)
+        if any(config.trace_latency for config in configs):
+            # Hooks live in the shared WS/HTTP clients, so tracing is process-wide
+            tracer.enabled = True
+
+        self.auth: Optional[StandXAuth] = None
+        self.http_client: Optional[StandXHTTPClient] = None
+        self.user_ws: Optional[UserWSClient] = None
+        self.makers: Dict[str, Maker] = {}
+        self.states: Dict[str, State] = {}
+        self._tasks: List[asyncio.Task] = []
+
+        # Supervision info (see runner.py)
+        self.running = False
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+
+    async def start(self):
+        """Authenticate, connect the user stream and initialize every maker.
+
+        Can be called again after stop()/cleanup() to restart the account.
+        """
+        wallet = self.configs[0].wallet
+        self.makers = {}
+        self.states = {}
+
+        # Initialize authentication
+        logger.info(f"[{self.name}] Initializing authentication...")
+        self.auth = StandXAuth()
+        await self.auth.authenticate(wallet.chain, wallet.private_key)
+        logger.info(f"[{self.name}] Authentication successful")
+
+        await self._ensure_referral()
+
+        # Initialize clients
+        # One rate limiter per wallet: account-level settings come from the first section
+        first = self.configs[0]
+        self.http_client = StandXHTTPClient(
+            self.auth,
+            rate_limiter=RateLimiter(rate_per_sec=first.rate_limit_per_sec, burst=first.rate_limit_burst),
+        )
+
+        # Set latency log file based on config name
+        latency_log_file = f"latency_{self.name}.log"
+        self.http_client.set_latency_log_file(latency_log_file)
+        self.http_client.set_latency_snapshot_file(f"latency_{self.name}.json")
+        self.http_client.set_latency_store(f"latency_{self.name}")
+        logger.info(f"[{self.name}] Latency logging to: {latency_log_file}")
+
+        self.user_ws = UserWSClient(self.auth)
+
+        # One state + maker per symbol
+        for config in self.configs:
+            logger.info(f"[{self.name}] Symbol: {config.symbol}, Order size: {config.order_size_btc}")
+            state = State()
+            maker = Maker(config, self.http_client, state, self.symbols)
+
+            # Set reduce position log file
+            if len(self.configs) == 1:
+                reduce_log_file = f"reduce_{self.name}.log"
+            else:
+                reduce_log_file = f"reduce_{self.name}_{config.symbol}.log"
+            maker.set_reduce_log_file(reduce_log_file)
+            logger.info(f"[{self.name}] Reduce position logging to: {reduce_log_file}")
+            if maker.profiler:
+                maker.profiler.name = f"[{self.name}] {config.symbol}"
+
+            self.states[config.symbol] = state
+            self.makers[config.symbol] = maker
+
+        await self.user_ws.connect()
+        self.user_ws.on_order(self._on_order)
+        self.user_ws.on_position(self._on_position)
+
+        # Initialize state from exchange, then start receiving prices
+        for symbol, maker in self.makers.items():
+            await maker.initialize()
+            await self.feed.add(symbol, maker)
+
+    async def _ensure_referral(self):
+        """Check and apply referral if needed."""
+        try:
+            is_referred = await check_if_referred(self.auth)
+            if not is_referred:
+                logger.info(f"Account not referred, applying referral code: {REFERRAL_CODE}")
+                result = await apply_referral(self.auth, "0xdalang")
+                if result.get("success") or result.get("code") == 0:
+                    logger.info("Referral applied successfully")
+                else:
+                    logger.warning(f"Referral failed: {result}")
+            else:
+                logger.debug("Account already referred")
+        except Exception as e:
+            logger.warning(f"Referral check/apply failed: {e}")
+
+    def _state_for_order(self, order_data: dict) -> Optional[str]:
+        """Symbol an order update belongs to (by symbol, else by cl_ord_id)."""
+        symbol = order_data.get("symbol")
+        if symbol in self.states:
+            return symbol
+        cl_ord_id = order_data.get("cl_ord_id", "")
+        for symbol, state in self.states.items():
+            if state.get_order_by_id(cl_ord_id):
+                return symbol
+        return None
+
+    def _on_order(self, data: dict):
+        """Route user WS order updates to the owning symbol's state."""
+        order_data = data.get("data", {})
+        status = order_data.get("status")
+        cl_ord_id = order_data.get("cl_ord_id", "")
+        side = order_data.get("side")
+
+        logger.info(f"[{self.name}] Order update: cl_ord_id={cl_ord_id}, status={status}, side={side}")
+
+        symbol = self._state_for_order(order_data)
+        if symbol is None:
+            return
+
+        # Reconcile order lifecycle; clears it if filled or cancelled and
+        # triggers a check to potentially place a new order
+        if self.makers[symbol].on_order_update(cl_ord_id, status):
+            logger.info(f"Order {status}: cleared {symbol} {side} {cl_ord_id} from state")
+
+    def _on_position(self, data: dict):
+        """Route user WS position updates to the owning symbol's state."""
+        pos_data = data.get("data", {})
+        qty = float(pos_data.get("qty", 0))
+        symbol = pos_data.get("symbol", "")
+        entry_price = pos_data.get("entry_price")
+
+        state = self.states.get(symbol)
+        if state is not None:
+            logger.info(f"[{self.name}] Position update: {symbol} qty={qty} entry={entry_price}")
+            self.makers[symbol].on_position_update(qty, float(entry_price) if entry_price else None)
+
+    async def run(self):
+        """Run the user stream and all makers until one of them exits."""
+        self._tasks = [asyncio.create_task(self.user_ws.run(), name=f"user_ws:{self.name}")]
+        for symbol, maker in self.makers.items():
+            self._tasks.append(asyncio.create_task(maker.run(), name=f"maker:{self.name}:{symbol}"))
+        self._tasks.append(asyncio.create_task(self._persist_latency(), name=f"latency:{self.name}"))
+
+        self.running = True
+        try:
+            done, _ = await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.running = False
+        for task in done:
+            if not task.cancelled() and task.exception():
+                raise task.exception()
+
+    async def _persist_latency(self):
+        """Write the latency snapshot when recording flags it, off the order path."""
+        while True:
+            await asyncio.sleep(self.LATENCY_PERSIST_CHECK_SEC)
+            if self.http_client is not None:
+                await self.http_client.persist_latency_if_due()
+
+    async def stop(self):
+        """Stop makers and the user stream."""
+        for maker in self.makers.values():
+            self.feed.remove(maker)
+            await maker.stop()
+        if self.user_ws:
+            await self.user_ws.close()
+            self.user_ws = None
+
+        # Cancel pending tasks with timeout
+        pending = [task for task in self._tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            # Wait up to 3 seconds for tasks to finish
+            await asyncio.wait(pending, timeout=3.0)
+
+    async def cleanup(self):
+        """Cancel all open orders of every symbol and close the HTTP client."""
+        if self.http_client is None:
+            return
+        try:
+            orders_to_cancel = [
+                order.cl_ord_id
+                for state in self.states.values()
+                for order in state.get_orders()
+            ]
+
+            if orders_to_cancel:
+                logger.info(f"[{self.name}] Cancelling {len(orders_to_cancel)} orders on exit: {orders_to_cancel}")
+                await self.http_client.cancel_orders(orders_to_cancel)
+                for state in self.states.values():
+                    state.clear_all_orders()
+                logger.info(f"[{self.name}] All orders cancelled successfully")
+        except Exception as e:
+            logger.error(f"[{self.name}] Failed to cancel orders on exit: {e}")
+
+        await self.http_client.close()
+        self.http_client = None
+
+    def status(self) -> dict:
+        """Health snapshot of this account for the runner/supervisor."""
+        return {
+            "name": self.name,
+            "running": self.running,
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+            "symbols": {
+                symbol: {
+                    "last_price": state.last_price,
+                    "position": state.position,
+                    "orders": len(state.get_orders()),
+                    "tick_profile": self.makers[symbol].profiler.snapshot() if self.makers[symbol].profiler else None,
+                }
+                for symbol, state in self.states.items()
+            },
+            "rate_limit": self.http_client.get_rate_limit_stats() if self.http_client else None,
+            "latency": self.http_client.get_latency_stats() if self.http_client else None,
+        }
+
+    def export_profiles(self) -> List[str]:
+        """Write the tick profile of every profiled maker; returns the files written."""
+        paths = []
+        for symbol, maker in self.makers.items():
+            if not maker.profiler:
+                continue
+            if len(self.makers) == 1:
+                path = f"tick_profile_{self.name}.json"
+            else:
+                path = f"tick_profile_{self.name}_{symbol}.json"
+            maker.profiler.export(path)
+            paths.append(path)
+        return paths
+
+    def export_traces(self) -> Optional[str]:
+        """Write the latency traces if tracing is enabled; returns the file written."""
+        if not tracer.enabled:
+            return None
+        path = f"latency_trace_{self.name}.json"
+        tracer.export(path)
+        return path
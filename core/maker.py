@@ -4,72 +4,125 @@ Event-driven design:
 - Price updates trigger order checks
 - Order placement runs when conditions are met
 """
+import time
 import uuid
 import logging
 import asyncio
-from typing import Optional
-
-import requests
+from collections import deque, OrderedDict
+from typing import Dict, Optional, Tuple
 
 from config import Config
+from notify import send_notify
+from log_sink import LogSink, get_sink
 from api.http_client import StandXHTTPClient
-from core.state import State, OpenOrder
+from api.rate_limiter import CircuitOpenError
+from api.symbol_info import SymbolInfoCache, default_symbol_info
+from core.state import State, OpenOrder, PENDING_NEW, LIVE, PENDING_CANCEL, FINAL_ORDER_STATUSES
+from core.volatility import create_estimator
+from core.profiler import TickProfiler
+import tracing
+from tracing import tracer
 
 
 logger = logging.getLogger(__name__)
 
 
-def send_notify(title: str, message: str, priority: str = "normal"):
-    """Send notification via Telegram.
+def _cancel_results(cl_ord_ids: list[str], response) -> dict[str, bool]:
+    """
+    Map a cancel_orders response to per-order success.
     
-    Requires environment variables:
-        NOTIFY_URL: Notification service URL
-        NOTIFY_API_KEY: API key for the notification service
+    A non-zero top-level code fails the whole batch. If the response lists
+    per-order results, those decide; orders it does not mention are treated
+    as failed. Otherwise a successful response covers every order.
     """
-    import os
-    notify_url = os.environ.get("NOTIFY_URL", "")
-    notify_api_key = os.environ.get("NOTIFY_API_KEY", "")
+    if isinstance(response, dict) and response.get("code") not in (None, 0):
+        return {cl_ord_id: False for cl_ord_id in cl_ord_ids}
     
-    if not notify_url:
-        return  # Notification not configured
+    items = response.get("result") if isinstance(response, dict) else response
+    if isinstance(items, list) and any(isinstance(item, dict) and "cl_ord_id" in item for item in items):
+        ok = {
+            item["cl_ord_id"]: item.get("code", 0) == 0
+            for item in items
+            if isinstance(item, dict) and "cl_ord_id" in item
+        }
+        return {cl_ord_id: ok.get(cl_ord_id, False) for cl_ord_id in cl_ord_ids}
     
-    try:
-        headers = {}
-        if notify_api_key:
-            headers["X-API-Key"] = notify_api_key
-        
-        requests.post(
-            notify_url,
-            json={"title": title, "message": message, "channel": "alert", "priority": priority},
-            headers=headers,
-            timeout=5,
-        )
-    except:
-        pass  # Don't let notification failure affect trading
+    return {cl_ord_id: True for cl_ord_id in cl_ord_ids}
 
 
 class Maker:
     """Market making logic."""
     
-    def __init__(self, config: Config, client: StandXHTTPClient, state: State):
+    # Position reduction: start above 70% of max position, reduce to 50%
+    REDUCE_THRESHOLD_RATIO = 0.7
+    REDUCE_TARGET_RATIO = 0.5
+    # REST consistency check interval for the WS-fed position cache
+    POSITION_SYNC_SEC = 30.0
+    # A reduce order whose position update has not arrived by then is settled by a REST sync
+    REDUCE_SETTLE_SEC = 5.0
+    # Orders stuck pending_new / pending_cancel longer than this after their
+    # request finished are dropped (in-flight requests never expire)
+    PENDING_TIMEOUT_SEC = 10.0
+    # Requotes waiting for both WS confirmations, and confirmation times kept to match them
+    MAX_REQUOTES_TRACKED = 100
+    MAX_CONFIRMS_TRACKED = 1000
+    
+    def __init__(
+        self,
+        config: Config,
+        client: StandXHTTPClient,
+        state: State,
+        symbols: Optional[SymbolInfoCache] = None,
+    ):
         self.config = config
         self.client = client
         self.state = state
+        self.symbols = symbols or SymbolInfoCache()
+        self.symbol_info = default_symbol_info(config.symbol)
+        self.state.volatility_estimator = create_estimator(config, state.price_window)
+        for i, level in enumerate(config.levels):
+            self.state.set_distance_bands(level.cancel_distance_bps, level.rebalance_distance_bps, level=i)
         self._running = False
         self._pending_check = asyncio.Event()
+        self._volatility_ok: Optional[bool] = None
+        # Reduce order in flight: (cl_ord_id, expected position, sent at). While
+        # set, no further reduce is sent and price ticks do not wake for one
+        self._reduce_inflight: Optional[Tuple[str, float, float]] = None
+        self._requote_gaps_ms: deque = deque(maxlen=1000)
+        # Same-tick requotes: old cl_ord_id -> replacement cl_ord_id, until both are confirmed
+        self._requotes: Dict[str, str] = {}
+        # User WS confirmation times (monotonic): cl_ord_id -> [first update, final update]
+        self._confirmed_at: OrderedDict = OrderedDict()
         self._reduce_log_file = None  # Will be set by main.py
+        self._reduce_log_sink: Optional[LogSink] = None
+        # Per-step tick timing, None (no overhead) unless profile_ticks is set
+        self.profiler: Optional[TickProfiler] = TickProfiler(config.symbol) if config.profile_ticks else None
+        # cl_ord_ids of new_order requests in flight (tracked or not), so their
+        # user WS update is not mistaken for an untracked order
+        self._placing: set = set()
+        # Untracked orders reported live by the user WS, being cancelled
+        self._late_cancels: Dict[str, asyncio.Task] = {}
+        # Ladder levels already warned about being raised to min_qty
+        self._min_qty_warned: set = set()
+        # Price message that woke the maker, for tick-to-trade tracing (trace_latency)
+        self._wake_trace: Optional[tracing.PriceTrace] = None
     
     async def initialize(self):
         """Initialize state from exchange."""
         logger.info("Initializing state from exchange...")
 
+        # Symbol metadata (tick/lot size), shared across makers via the cache
+        if not self.symbols.loaded:
+            await self.symbols.load(self.client)
+        self.symbol_info = self.symbols.get(self.config.symbol)
+
         # Get current position (with error handling)
         try:
             positions = await self.client.query_positions(self.config.symbol)
             if positions:
-                self.state.update_position(positions[0].qty)
+                self.state.update_position(positions[0].qty, positions[0].entry_price, synced=True)
             else:
-                self.state.update_position(0.0)
+                self.state.update_position(0.0, synced=True)
         except Exception as e:
             logger.warning(f"Failed to query positions, using default: {e}")
             self.state.update_position(0.0)
@@ -81,36 +134,162 @@ class Maker:
             logger.warning(f"Failed to query open orders, starting fresh: {e}")
             orders = []
         
-        for order in orders:
-            if order.side == "buy":
-                self.state.set_order("buy", OpenOrder(
-                    cl_ord_id=order.cl_ord_id,
-                    side="buy",
-                    price=float(order.price),
-                    qty=float(order.qty),
-                ))
-            elif order.side == "sell":
-                self.state.set_order("sell", OpenOrder(
+        self.load_orders(orders)
+        
+        logger.info(
+            f"Initialized: position={self.state.position}, "
+            f"buy_orders={len(self.state.get_orders('buy'))}, "
+            f"sell_orders={len(self.state.get_orders('sell'))}"
+        )
+    
+    def load_orders(self, orders: list, as_of: Optional[float] = None) -> bool:
+        """
+        Merge exchange open orders into the tracked orders.
+        
+        Orders we are placing or cancelling (pending_new / pending_cancel)
+        are kept as they are, and orders known to have finished are not
+        brought back. Untracked open orders are adopted into free ladder
+        slots, closest to the market first; extras get no level and are
+        cancelled by the next tick. Live orders missing from the snapshot
+        are dropped, unless their status changed after ``as_of`` (the time
+        the snapshot was requested), since the snapshot may predate them.
+        
+        Returns:
+            True if any order was added or dropped
+        """
+        open_ids = {o.cl_ord_id for o in orders}
+        changed = False
+        for tracked in self.state.get_orders():
+            if (
+                tracked.status == LIVE
+                and tracked.cl_ord_id not in open_ids
+                and (as_of is None or tracked.status_at < as_of)
+            ):
+                logger.info(f"Order {tracked.cl_ord_id} no longer open on the exchange, dropping")
+                self.state.remove_order(tracked.cl_ord_id)
+                changed = True
+        
+        for side in ("buy", "sell"):
+            free_levels = [
+                i for i in range(len(self.config.levels)) if not self.state.has_order(side, i)
+            ]
+            side_orders = sorted(
+                (
+                    o for o in orders
+                    if o.side == side
+                    and self.state.get_order_by_id(o.cl_ord_id) is None
+                    and not self.state.is_done(o.cl_ord_id)
+                ),
+                key=lambda o: float(o.price),
+                reverse=(side == "buy"),
+            )
+            for i, order in enumerate(side_orders):
+                self.state.add_order(OpenOrder(
                     cl_ord_id=order.cl_ord_id,
-                    side="sell",
+                    side=side,
                     price=float(order.price),
                     qty=float(order.qty),
+                    level=free_levels[i] if i < len(free_levels) else None,
                 ))
+                changed = True
+        return changed
+    
+    def on_order_update(self, cl_ord_id: str, status: str) -> bool:
+        """
+        Called for every user WS order update.
         
-        logger.info(
-            f"Initialized: position={self.state.position}, "
-            f"buy_order={self.state.has_order('buy')}, "
-            f"sell_order={self.state.has_order('sell')}"
-        )
+        Reconciles State, wakes the maker if a tracked order finished and
+        records the confirmation time for the requote gap metric. A ladder
+        order reported open that is neither tracked nor being placed (its
+        request failed or its pending state expired, but it reached the
+        book) is cancelled, so it cannot rest unmanaged.
+        
+        Returns:
+            True if a tracked order finished
+        """
+        now = time.monotonic()
+        times = self._confirmed_at.get(cl_ord_id)
+        if times is None:
+            times = self._confirmed_at[cl_ord_id] = [now, None]
+            if len(self._confirmed_at) > self.MAX_CONFIRMS_TRACKED:
+                self._confirmed_at.popitem(last=False)
+        if status in FINAL_ORDER_STATUSES:
+            times[1] = now
+        if self._requotes:
+            self._match_requotes()
+        
+        inflight = self._reduce_inflight
+        if inflight and inflight[0] == cl_ord_id and status in FINAL_ORDER_STATUSES and status != "filled":
+            logger.info(f"Reduce order {cl_ord_id} {status}, position unchanged")
+            self._reduce_inflight = None
+        
+        finished = self.state.apply_order_update(cl_ord_id, status)
+        if finished:
+            self._pending_check.set()
+        else:
+            self._cancel_if_untracked(cl_ord_id)
+        return finished
+    
+    def _cancel_if_untracked(self, cl_ord_id: str):
+        """Cancel a ladder order the user WS reported open if nothing tracks or is placing it."""
+        times = self._confirmed_at.get(cl_ord_id)
+        if (
+            times is None
+            or times[1] is not None  # finished
+            or not cl_ord_id.startswith("mm-")
+            or cl_ord_id in self._placing
+            or cl_ord_id in self._late_cancels
+            or self.state.get_order_by_id(cl_ord_id) is not None
+            or self.state.is_done(cl_ord_id)
+        ):
+            return
+        self._late_cancels[cl_ord_id] = asyncio.create_task(self._cancel_untracked(cl_ord_id))
+    
+    async def _cancel_untracked(self, cl_ord_id: str):
+        """Cancel an order the exchange has live but State does not track."""
+        logger.warning(f"Untracked order {cl_ord_id} is live on the exchange, cancelling")
+        try:
+            response = await self.client.cancel_orders([cl_ord_id])
+            if not _cancel_results([cl_ord_id], response)[cl_ord_id]:
+                logger.error(f"Failed to cancel untracked order {cl_ord_id}: {response}")
+        except Exception as e:
+            logger.error(f"Failed to cancel untracked order {cl_ord_id}: {e}")
+        finally:
+            self._late_cancels.pop(cl_ord_id, None)
+    
+    def on_position_update(self, qty: float, entry_price: Optional[float] = None):
+        """Called for every user WS position update; settles an in-flight reduce."""
+        self.state.update_position(qty, entry_price)
+        inflight = self._reduce_inflight
+        if inflight and abs(qty) <= abs(inflight[1]) + 1e-9:
+            logger.info(f"Reduce order {inflight[0]} settled: position {qty:+.4f}")
+            self._reduce_inflight = None
     
     def on_price_update(self, price: float):
         """
         Called when price updates from WebSocket.
         Triggers order check if needed.
+        
+        The maker is only woken when price leaves an order's precomputed band,
+        a side has no order, the volatility gate flips, or a position
+        reduction may be due. Otherwise the tick would be a no-op.
         """
         self.state.update_price(price, self.config.volatility_window_sec)
         
+        volatility_ok = self.state.get_volatility_bps() <= self.config.volatility_threshold_bps
+        gate_changed = volatility_ok != self._volatility_ok
+        self._volatility_ok = volatility_ok
+        
+        reduce_due = (
+            self._reduce_inflight is None
+            and abs(self.state.position) > self.config.max_position_btc * self.REDUCE_THRESHOLD_RATIO
+        )
+        if not gate_changed and not reduce_due and self.state.is_quiet():
+            return
+        
         # Signal that we need to check orders
+        if tracer.current_price and self._wake_trace is None:
+            self._wake_trace = tracer.current_price
         self._pending_check.set()
     
     async def run(self):
@@ -142,100 +321,324 @@ class Maker:
         self._pending_check.set()  # Wake up the loop
     
     async def _tick(self):
-        """Single iteration of the maker logic."""
-        # Wait for price data
-        if self.state.last_price is None:
-            logger.debug("Waiting for price data...")
-            return
+        """
+        Single iteration of the maker logic.
+        
+        With a profiler (profile_ticks) every step is timed; otherwise the
+        instrumentation is a skipped ``if`` per step. With tracing enabled
+        (trace_latency) the requests sent by this tick are linked to the
+        price message that woke it.
+        """
+        prof = self.profiler
+        start = t = prof.clock() if prof else 0.0
+        trace_token = None
+        if tracer.enabled:
+            trace_token = tracing.tick_context.set((self._wake_trace, tracer.clock()))
+            self._wake_trace = None
+        try:
+            # Drop orders whose ack or WS confirmation never arrived
+            if self.state.expire_pending(self.PENDING_TIMEOUT_SEC):
+                logger.warning("Expired pending orders, slots will be refilled")
+            if prof:
+                t = prof.lap("expire", t)
+            
+            # Wait for price data
+            if self.state.last_price is None:
+                logger.debug("Waiting for price data...")
+                return
+            
+            # Step 1: Check position
+            if abs(self.state.position) >= self.config.max_position_btc:
+                logger.warning(
+                    f"Position too large: {self.state.position} >= {self.config.max_position_btc}, "
+                    "pausing market making"
+                )
+                return
+            if prof:
+                t = prof.lap("position_check", t)
+            
+            # Step 1.5: Check if should reduce position (> 50% and profitable)
+            reduced = await self._check_and_reduce_position()
+            if prof:
+                t = prof.lap("reduce", t)
+            if reduced:
+                return  # Skip this tick after reducing
+            
+            # Step 2: Check and cancel orders that are too close or too far
+            # (per-level thresholds, see Config.levels)
+            orders_to_cancel = self.state.get_orders_to_cancel()
+            if prof:
+                t = prof.lap("cancel_eval", t)
+            
+            # Step 3: Check volatility (configured estimator, updated per tick)
+            volatility = self.state.get_volatility_bps()
+            volatility_ok = volatility <= self.config.volatility_threshold_bps
+            if prof:
+                t = prof.lap("volatility", t)
+            
+            if orders_to_cancel:
+                if volatility_ok:
+                    # Cancel and replace in the same tick to minimize time off the book
+                    await self._requote(orders_to_cancel)
+                    if prof:
+                        prof.lap("requote", t)
+                else:
+                    await self._cancel_orders(orders_to_cancel)
+                    if prof:
+                        prof.lap("cancel_rest", t)
+                return
+            
+            if not volatility_ok:
+                logger.debug(
+                    f"Volatility too high ({self.config.volatility_estimator}): "
+                    f"{volatility:.2f}bps > {self.config.volatility_threshold_bps}bps"
+                )
+                return
+            
+            # Step 4: Place missing orders
+            await self._place_missing_orders()
+            if prof:
+                prof.lap("place", t)
+        finally:
+            if prof:
+                prof.finish(start)
+            if trace_token is not None:
+                tracing.tick_context.reset(trace_token)
+    
+    async def _cancel_orders(self, orders: list[OpenOrder], track: bool = True) -> list[OpenOrder]:
+        """
+        Cancel orders with a single batch request.
+        
+        Orders are marked pending_cancel before the request. Per-order
+        results are mapped back into State: cancelled orders stay
+        pending_cancel until the user WS confirms them, failed ones go back
+        to live and are retried next tick. With track=False State is left
+        untouched.
         
-        # Step 1: Check position
-        if abs(self.state.position) >= self.config.max_position_btc:
-            logger.warning(
-                f"Position too large: {self.state.position} >= {self.config.max_position_btc}, "
-                "pausing market making"
+        Returns:
+            Orders that were cancelled
+        """
+        cl_ord_ids = [order.cl_ord_id for order in orders]
+        logger.info(f"Cancelling orders: {cl_ord_ids}")
+        if track:
+            for order in orders:
+                order.in_flight = True
+                self.state.set_status(order.cl_ord_id, PENDING_CANCEL)
+        try:
+            response = await self.client.cancel_orders(cl_ord_ids)
+        except Exception as e:
+            logger.error(f"Failed to cancel orders {cl_ord_ids}: {e}")
+            if track:
+                for cl_ord_id in cl_ord_ids:
+                    self.state.set_status(cl_ord_id, LIVE, expect=PENDING_CANCEL)
+            send_notify(
+                "StandX 撤单失败",
+                f"{self.config.symbol} 撤单失败: {e}",
+                priority="high"
             )
-            return
+            return []
+        finally:
+            if track:
+                for order in orders:
+                    order.in_flight = False
         
-        # Step 1.5: Check if should reduce position (> 50% and profitable)
-        reduced = await self._check_and_reduce_position()
-        if reduced:
-            return  # Skip this tick after reducing
+        results = _cancel_results(cl_ord_ids, response)
+        cancelled = []
+        for order in orders:
+            if results[order.cl_ord_id]:
+                if track:
+                    # Restart the pending clock: now waiting for WS confirmation
+                    self.state.set_status(order.cl_ord_id, PENDING_CANCEL, expect=PENDING_CANCEL)
+                cancelled.append(order)
+            elif track:
+                self.state.set_status(order.cl_ord_id, LIVE, expect=PENDING_CANCEL)
         
-        # Step 2: Check and cancel orders that are too close or too far
-        orders_to_cancel = self.state.get_orders_to_cancel(
-            self.config.cancel_distance_bps,
-            self.config.rebalance_distance_bps
-        )
+        failed = [cl_ord_id for cl_ord_id, ok in results.items() if not ok]
+        if failed:
+            logger.error(f"Failed to cancel orders {failed}: {response}")
+            send_notify(
+                "StandX 撤单失败",
+                f"{self.config.symbol} 撤单失败: {failed}",
+                priority="high"
+            )
+        return cancelled
+    
+    async def _requote(self, orders: list[OpenOrder]):
+        """
+        Cancel orders and place their replacements concurrently.
         
-        if orders_to_cancel:
-            for order in orders_to_cancel:
-                logger.info(f"Cancelling order: {order.cl_ord_id}")
-                try:
-                    await self.client.cancel_order(order.cl_ord_id)
-                    self.state.set_order(order.side, None)
-                except Exception as e:
-                    logger.error(f"Failed to cancel order {order.cl_ord_id}: {e}")
-                    send_notify(
-                        "StandX 撤单失败",
-                        f"{self.config.symbol} 撤单失败: {e}",
-                        priority="high"
-                    )
-            
-            # Don't place new orders this tick
-            return
+        Both legs are pipelined in one tick. State is reconciled once both
+        results are known:
+        - cancel ok, new ok: the replacement takes the slot, the old order
+          stays tracked as pending_cancel until the user WS confirms it
+        - cancel ok, new failed: the slot is left empty for the next tick
+        - cancel failed, new ok: the replacement is cancelled again so the
+          slot is not doubled; if that fails too it is tracked outside the
+          ladder and cancelled on the next tick
+        - both failed: the old order stays tracked
         
-        # Step 3: Check volatility
-        volatility = self.state.get_volatility_bps()
-        if volatility > self.config.volatility_threshold_bps:
-            logger.debug(
-                f"Volatility too high: {volatility:.2f}bps > {self.config.volatility_threshold_bps}bps"
+        The off-book gap is recorded per slot once the user WS has confirmed
+        both the cancel and the replacement (see on_order_update).
+        """
+        last_price = self.state.last_price
+        replacements = []
+        for order in orders:
+            if order.level is None or order.level >= len(self.config.levels):
+                continue
+            level = self.config.levels[order.level]
+            price = self._level_price(order.side, level.distance_bps, last_price)
+            replacements.append(
+                self._place_order(order.side, price, order.level, level.size, track=False)
             )
-            return
         
-        # Step 4: Place missing orders
-        await self._place_missing_orders()
+        cancelled, *placed = await asyncio.gather(
+            self._cancel_orders(orders),
+            *replacements,
+        )
+        
+        cancelled_slots = {(o.side, o.level): o for o in cancelled}
+        orphans = []
+        for new_order in placed:
+            if new_order is None:
+                continue
+            old_order = cancelled_slots.get((new_order.side, new_order.level))
+            if old_order is not None:
+                self.state.add_order(new_order)
+                self._track_requote(old_order.cl_ord_id, new_order.cl_ord_id)
+                logger.info(f"[Requote] {new_order.side}[{new_order.level}] -> {new_order.cl_ord_id}")
+            else:
+                orphans.append(new_order)
+        
+        if orphans:
+            # Old order is still live: roll back the replacement
+            rolled_back = await self._cancel_orders(orphans, track=False)
+            for order in orphans:
+                if order in rolled_back:
+                    self.state.remove_order(order.cl_ord_id)  # remember it as finished
+                else:
+                    order.level = None
+                    self.state.add_order(order)
+        for new_order in placed:
+            if new_order is not None:
+                self._placing.discard(new_order.cl_ord_id)
+                self._cancel_if_untracked(new_order.cl_ord_id)
+    
+    def _track_requote(self, old_id: str, new_id: str):
+        """Wait for the WS confirmations of a requote (they may already be in)."""
+        self._requotes[old_id] = new_id
+        if len(self._requotes) > self.MAX_REQUOTES_TRACKED:
+            del self._requotes[next(iter(self._requotes))]  # confirmation never arrived
+        self._match_requotes()
+    
+    def _match_requotes(self):
+        """
+        Record the off-book gap of every requote whose legs are both confirmed.
+        
+        The gap runs from the old order's final update (off the book) to the
+        replacement's first update (on the book); an overlap counts as 0.
+        """
+        for old_id, new_id in list(self._requotes.items()):
+            old_times = self._confirmed_at.get(old_id)
+            new_times = self._confirmed_at.get(new_id)
+            if old_times is None or old_times[1] is None or new_times is None:
+                continue
+            del self._requotes[old_id]
+            gap_ms = max(0.0, new_times[0] - old_times[1]) * 1000
+            self._requote_gaps_ms.append(gap_ms)
+            logger.debug(f"[Requote] {old_id} -> {new_id}: off-book gap {gap_ms:.0f}ms")
+    
+    def get_requote_gaps_ms(self) -> list[float]:
+        """Recent off-book gaps of same-tick requotes (cancel confirmed to replacement confirmed) in milliseconds."""
+        return list(self._requote_gaps_ms)
+    
+    @staticmethod
+    def _level_price(side: str, distance_bps: float, last_price: float) -> float:
+        """Quote price for a side at distance_bps from last_price."""
+        if side == "buy":
+            return last_price * (1 - distance_bps / 10000)
+        return last_price * (1 + distance_bps / 10000)
     
     async def _place_missing_orders(self):
-        """Place buy and sell orders if missing."""
+        """Place orders for every empty ladder slot on both sides, concurrently."""
         last_price = self.state.last_price
         if last_price is None:
             return
         
-        # Calculate order prices
-        buy_price = last_price * (1 - self.config.order_distance_bps / 10000)
-        sell_price = last_price * (1 + self.config.order_distance_bps / 10000)
-        
-        # Place buy order if missing
-        if not self.state.has_order("buy"):
-            await self._place_order("buy", buy_price)
+        placements = []
+        for i, level in enumerate(self.config.levels):
+            # Calculate order prices
+            buy_price = self._level_price("buy", level.distance_bps, last_price)
+            sell_price = self._level_price("sell", level.distance_bps, last_price)
+            
+            # Place buy order if missing
+            if not self.state.has_order("buy", i):
+                placements.append(self._place_order("buy", buy_price, i, level.size))
+            
+            # Place sell order if missing
+            if not self.state.has_order("sell", i):
+                placements.append(self._place_order("sell", sell_price, i, level.size))
         
-        # Place sell order if missing
-        if not self.state.has_order("sell"):
-            await self._place_order("sell", sell_price)
+        # Slots are independent; _place_order handles its own errors
+        if placements:
+            await asyncio.gather(*placements)
     
-    async def _place_order(self, side: str, price: float):
-        """Place a single order."""
-        import math
-        cl_ord_id = f"mm-{side}-{uuid.uuid4().hex[:8]}"
-
-        # Different tick sizes for different symbols
-        if self.config.symbol.startswith("BTC"):
-            tick_size = 0.01
-            price_decimals = 2
-        else:
-            tick_size = 0.1
-            price_decimals = 1
+    async def _place_order(
+        self,
+        side: str,
+        price: float,
+        level: int = 0,
+        qty: Optional[float] = None,
+        track: bool = True,
+    ) -> Optional[OpenOrder]:
+        """
+        Place a single order for a ladder slot.
+        
+        Args:
+            track: Add the order to State on success. The requote path passes
+                False and reconciles State itself once both legs are known;
+                until then a placed order's cl_ord_id stays in _placing.
+        
+        Returns:
+            The placed order, or None on failure
+        """
+        if qty is None:
+            qty = self.config.order_size_btc
+        cl_ord_id = f"mm-{side}{level}-{uuid.uuid4().hex[:8]}"
 
-        # Align price to tick (floor for buy, ceil for sell)
-        if side == "buy":
-            aligned_price = math.floor(price / tick_size) * tick_size
-        else:
-            aligned_price = math.ceil(price / tick_size) * tick_size
-        price_str = f"{aligned_price:.{price_decimals}f}"
-        qty_str = f"{self.config.order_size_btc:.3f}"
+        # Align price to tick (floor for buy, ceil for sell) and qty to lot
+        info = self.symbol_info
+        price_str = info.format_price(price, side)
+        qty_str = info.format_qty(qty)
+        if info.below_min_qty(qty_str):
+            # The exchange would reject it every tick: quote the minimum instead
+            min_qty_str = info.format_min_qty()
+            if level not in self._min_qty_warned:
+                self._min_qty_warned.add(level)
+                logger.warning(
+                    f"Level {level} size {qty} is below min_qty {info.min_qty} for {self.config.symbol}, "
+                    f"quoting {min_qty_str}"
+                )
+            qty_str = min_qty_str
 
         logger.info(f"Placing {side} order: {qty_str} @ {price_str} (leverage: {self.config.leverage}x, cl_ord_id: {cl_ord_id})")
 
+        # Track the exact price/qty the exchange receives; the slot stays
+        # occupied (pending_new) until the request finishes, however long
+        # the rate limiter queue and HTTP timeout take
+        order = OpenOrder(
+            cl_ord_id=cl_ord_id,
+            side=side,
+            price=float(price_str),
+            qty=float(qty_str),
+            level=level,
+            status=PENDING_NEW if track else LIVE,
+            in_flight=track,
+        )
+        if track:
+            self.state.add_order(order)
+        self._placing.add(cl_ord_id)
+        placed = False
+
         try:
             response = await self.client.new_order(
                 symbol=self.config.symbol,
@@ -247,14 +650,12 @@ class Maker:
             )
             
             if response.get("code") == 0:
-                # Update local state
-                self.state.set_order(side, OpenOrder(
-                    cl_ord_id=cl_ord_id,
-                    side=side,
-                    price=price,
-                    qty=self.config.order_size_btc,
-                ))
+                # Update local state (no-op if the user WS already confirmed or finished it)
+                if track:
+                    self.state.set_status(cl_ord_id, LIVE, expect=PENDING_NEW)
                 logger.info(f"Order placed successfully: {cl_ord_id}")
+                placed = True
+                return order
             else:
                 error_msg = response.get("message", str(response))
                 logger.error(f"Order failed: {response}")
@@ -264,6 +665,10 @@ class Maker:
                     priority="high"
                 )
                 
+        except CircuitOpenError as e:
+            # Rejected by the rate limiter before sending: nothing can reach
+            # the exchange, so free the slot now (removed below)
+            logger.warning(f"{side} order {cl_ord_id} not sent: {e}")
         except Exception as e:
             logger.error(f"Failed to place {side} order: {e}")
             send_notify(
@@ -271,23 +676,51 @@ class Maker:
                 f"{self.config.symbol} {side} 下单异常: {e}",
                 priority="high"
             )
+            if track:
+                # The request may still have reached the exchange: keep the
+                # slot pending so a user WS update can adopt the order; if none
+                # arrives it expires after PENDING_TIMEOUT_SEC
+                self.state.set_status(cl_ord_id, PENDING_NEW, expect=PENDING_NEW)
+                return None
+        finally:
+            order.in_flight = False
+            if track or not placed:
+                self._placing.discard(cl_ord_id)
+                self._cancel_if_untracked(cl_ord_id)
+        
+        if track:
+            self.state.remove_order(cl_ord_id)
+        return None
     
     def set_reduce_log_file(self, filepath: str):
         """Set the file path for reduce position logging."""
         self._reduce_log_file = filepath
+        self._reduce_log_sink = get_sink(filepath) if filepath else None
     
     def _write_reduce_log(self, action: str, qty_change: float, reason: str):
-        """Write reduce position log."""
-        if not self._reduce_log_file:
+        """Queue reduce position log record for the background log writer."""
+        if not self._reduce_log_sink:
             return
         try:
             from datetime import datetime
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            with open(self._reduce_log_file, "a") as f:
-                f.write(f"{timestamp},{action},{qty_change:+.4f},{reason}\n")
+            self._reduce_log_sink.write(f"{timestamp},{action},{qty_change:+.4f},{reason}")
         except:
             pass
     
+    async def _sync_position(self):
+        """Refresh the position cache from REST, logging any drift from the WS view."""
+        positions = await self.client.query_positions(self.config.symbol)
+        cached = self.state.position
+        if positions:
+            qty, entry_price = positions[0].qty, positions[0].entry_price
+        else:
+            qty, entry_price = 0.0, None
+        if abs(qty - cached) > 1e-9:
+            logger.warning(f"Position cache drift: ws={cached} rest={qty}, resyncing")
+        self.state.update_position(qty, entry_price, synced=True)
+        self._reduce_inflight = None  # REST position includes any settled reduce
+    
     async def _check_and_reduce_position(self) -> bool:
         """
         Check if position should be reduced and execute.
@@ -296,24 +729,45 @@ class Maker:
         - If abs(position) > max_position * 0.5 AND uPNL > 0
         - Reduce to max_position * 0.4 using market order
         
+        Only one reduce order is in flight at a time: until its order or
+        position update arrives (or REDUCE_SETTLE_SEC passes and a REST sync
+        settles it), the cached position is stale and no new reduce is sent.
+        
         Returns:
             True if reduction was executed, False otherwise
         """
+        if self._reduce_inflight is not None:
+            cl_ord_id, _, sent_at = self._reduce_inflight
+            if time.time() - sent_at < self.REDUCE_SETTLE_SEC:
+                return False
+            logger.warning(f"Reduce order {cl_ord_id} not settled by the user WS, syncing position")
+            try:
+                await self._sync_position()
+            except Exception as e:
+                logger.error(f"Failed to sync position after reduce: {e}")
+                return False
+        
         max_pos = self.config.max_position_btc
-        threshold = max_pos * 0.7
-        target = max_pos * 0.5
+        threshold = max_pos * self.REDUCE_THRESHOLD_RATIO
+        target = max_pos * self.REDUCE_TARGET_RATIO
         
         current_pos = abs(self.state.position)
         if current_pos <= threshold:
             return False
         
-        # Query current uPNL for this position
+        # uPNL from the WS-fed position cache and live price; REST only as a
+        # periodic consistency check or when the entry price is unknown
         try:
-            positions = await self.client.query_positions(self.config.symbol)
-            if not positions:
-                return False
+            upnl = self.state.get_upnl()
+            if upnl is None or time.time() - self.state.position_synced_at > self.POSITION_SYNC_SEC:
+                await self._sync_position()
+                current_pos = abs(self.state.position)
+                if current_pos <= threshold:
+                    return False
+                upnl = self.state.get_upnl()
+                if upnl is None:
+                    return False
             
-            upnl = positions[0].upnl
             if upnl <= 0:
                 logger.debug(f"Position {current_pos:.4f} > threshold but uPNL={upnl:.2f} <= 0, skip reduce")
                 return False
@@ -323,6 +777,17 @@ class Maker:
             if reduce_qty <= 0:
                 return False
             
+            # Format quantity (floored to lot size)
+            info = self.symbol_info
+            qty_str = info.format_qty(reduce_qty)
+            if info.below_min_qty(qty_str):
+                # Round a small reduce up to min_qty unless that is more than the position
+                qty_str = info.format_min_qty()
+                if float(qty_str) > current_pos:
+                    logger.debug(f"Reduce qty {reduce_qty:.4f} below min_qty {info.min_qty}, skip reduce")
+                    return False
+            reduce_qty = float(qty_str)
+            
             # Determine side: if position is long, sell to reduce; if short, buy to reduce
             if self.state.position > 0:
                 reduce_side = "sell"
@@ -335,12 +800,11 @@ class Maker:
             )
             
             # Place market order to reduce
-            import math
             cl_ord_id = f"reduce-{uuid.uuid4().hex[:8]}"
             
-            # Format quantity
-            qty_str = f"{reduce_qty:.3f}"
-            
+            signed_qty = -reduce_qty if reduce_side == "sell" else reduce_qty
+            inflight = (cl_ord_id, self.state.position + signed_qty, time.time())
+            self._reduce_inflight = inflight
             response = await self.client.new_order(
                 symbol=self.config.symbol,
                 side=reduce_side,
@@ -352,6 +816,9 @@ class Maker:
             )
             
             if response.get("code") == 0 or "id" in response:
+                if self._reduce_inflight is inflight:
+                    # Settle clock starts at the ack (unless the WS already settled it)
+                    self._reduce_inflight = (cl_ord_id, inflight[1], time.time())
                 logger.info(f"Reduce order placed: {cl_ord_id}")
                 self._write_reduce_log("REDUCE", -reduce_qty if reduce_side == "sell" else reduce_qty, f"profit_take_upnl_{upnl:.2f}")
                 send_notify(
@@ -361,6 +828,8 @@ class Maker:
                 )
                 return True
             else:
+                if self._reduce_inflight is inflight:
+                    self._reduce_inflight = None
                 logger.error(f"Reduce order failed: {response}")
                 return False
                 
@@ -0,0 +1,111 @@
+"""Per-step timing of Maker._tick.
+
+The maker holds ``profiler = None`` unless ``profile_ticks`` is enabled,
+so a disabled profiler costs one ``if`` per step. When enabled, each step
+duration goes into a rolling histogram (last 5 minutes), a summary is
+logged every LOG_INTERVAL_SEC and ``snapshot()`` / ``export()`` return
+the current statistics on demand.
+
+Steps, in tick order:
+    expire          expire_pending
+    position_check  max position check
+    reduce          _check_and_reduce_position
+    cancel_eval     get_orders_to_cancel
+    volatility      get_volatility_bps
+    cancel_rest     cancel request (volatility gate closed)
+    requote         cancel + replacement requests
+    place           _place_missing_orders
+    total           whole tick, every exit path
+"""
+import json
+import time
+import logging
+from typing import Dict, Optional
+
+from histogram import RollingHistogram, summaries
+
+
+logger = logging.getLogger(__name__)
+
+
+STEPS = (
+    "expire", "position_check", "reduce", "cancel_eval", "volatility",
+    "cancel_rest", "requote", "place", "total",
+)
+
+
+class TickProfiler:
+    """Rolling per-step histograms of tick durations (microseconds)."""
+
+    WINDOW_SEC = 300.0
+    LOG_INTERVAL_SEC = 60.0
+
+    def __init__(self, name: str = "", window_sec: float = WINDOW_SEC, log_interval_sec: float = LOG_INTERVAL_SEC):
+        self.name = name
+        self.window_sec = window_sec
+        self.histograms: Dict[str, RollingHistogram] = {step: RollingHistogram(window_sec) for step in STEPS}
+        self.log_interval_sec = log_interval_sec
+        self._next_log = time.monotonic() + log_interval_sec
+        self.ticks = 0
+
+    # Real time even when a replay swaps core.maker's clock
+    clock = staticmethod(time.perf_counter)
+
+    def lap(self, step: str, since: float) -> float:
+        """Record the time since ``since`` (clock()) for a step; returns now."""
+        now = time.perf_counter()
+        self.histograms[step].record((now - since) * 1e6)
+        return now
+
+    def finish(self, start: float):
+        """Record the whole tick and log a summary when due."""
+        self.lap("total", start)
+        self.ticks += 1
+        if time.monotonic() >= self._next_log:
+            self._next_log = time.monotonic() + self.log_interval_sec
+            self.log_summary()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Per-step count/mean/min/max/p50/p90/p99/p999 in microseconds over the window."""
+        return summaries(self.histograms)
+
+    def log_summary(self):
+        stats = self.snapshot()
+        total = stats.get("total")
+        if not total:
+            return
+        steps = ", ".join(
+            f"{step} {s['p50']:.0f}/{s['p99']:.0f}" for step, s in stats.items() if step != "total"
+        )
+        logger.info(
+            f"[TickProfile] {self.name} {total['count']} ticks, total p50={total['p50']:.0f}us "
+            f"p99={total['p99']:.0f}us max={total['max']:.0f}us | p50/p99 us: {steps}"
+        )
+
+    def export(self, path: Optional[str] = None) -> dict:
+        """
+        Export the window's histograms (summary and buckets).
+
+        Args:
+            path: Also write the export to this JSON file
+
+        Returns:
+            {"name", "ticks", "window_sec", "steps": {step: {"summary", "histogram"}}}
+        """
+        steps = {}
+        for step, hist in self.histograms.items():
+            snapshot = hist.snapshot()
+            if snapshot.count:
+                steps[step] = {"summary": snapshot.summary(), "histogram": snapshot.to_dict()}
+        data = {
+            "name": self.name,
+            "ts": time.time(),
+            "ticks": self.ticks,
+            "window_sec": self.window_sec,
+            "steps": steps,
+        }
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            logger.info(f"Tick profile written to {path}")
+        return data
@@ -2,13 +2,17 @@
 
 Maintains:
 - Current last_price
-- Price window for volatility calculation
+- Price window for volatility calculation (ring buffer with running min/max)
 - Position
-- Open orders (buy/sell)
+- Open orders: a ladder of N levels per side, indexed by cl_ord_id, each
+  with a lifecycle status (pending_new -> live -> pending_cancel -> done)
+- Price bands per order, so price ticks that cross no boundary can be ignored
 """
 import time
+import bisect
 import logging
-from typing import Optional, Dict
+from collections import deque, OrderedDict
+from typing import Optional, Dict, Iterator, Tuple, Any, List
 from dataclasses import dataclass, field
 from threading import Lock
 
@@ -16,6 +20,16 @@ from threading import Lock
 logger = logging.getLogger(__name__)
 
 
+# Order lifecycle
+PENDING_NEW = "pending_new"  # new_order sent, no ack yet; occupies its slot
+LIVE = "live"  # acked by REST or confirmed by user WS
+PENDING_CANCEL = "pending_cancel"  # cancel sent, waiting for user WS confirmation
+DONE = "done"  # filled / cancelled / rejected; no longer tracked
+
+# Terminal statuses reported by the user WS order channel
+FINAL_ORDER_STATUSES = ("filled", "cancelled", "canceled", "rejected", "expired")
+
+
 @dataclass
 class OpenOrder:
     """Represents an open order we're tracking."""
@@ -23,6 +37,110 @@ class OpenOrder:
     side: str
     price: float
     qty: float
+    level: Optional[int] = 0  # ladder level, None = not part of the configured ladder
+    status: str = LIVE
+    # time of last status change (clock looked up per call so a replay can swap it)
+    status_at: float = field(default_factory=lambda: time.time())
+    # REST request (new or cancel) outstanding: never expired while set
+    in_flight: bool = False
+
+
+class PriceWindow:
+    """
+    Sliding time window of (timestamp, price) samples.
+
+    Samples live in preallocated ring arrays indexed by a monotonically
+    increasing sequence number. Two monotonic deques of sequence numbers
+    track the running min and max, so push, evict and range queries are
+    amortized O(1) and do not rebuild the window on every tick.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._mask = size - 1
+        self._ts = [0.0] * size
+        self._px = [0.0] * size
+        self._head = 0  # seq of oldest sample
+        self._tail = 0  # seq of next sample
+        self._min_q: deque = deque()  # seqs with increasing prices
+        self._max_q: deque = deque()  # seqs with decreasing prices
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        for seq in range(self._head, self._tail):
+            i = seq & self._mask
+            yield self._ts[i], self._px[i]
+
+    def _grow(self):
+        """Double capacity, re-slotting live samples by sequence number."""
+        old_mask = self._mask
+        size = (old_mask + 1) << 1
+        ts = [0.0] * size
+        px = [0.0] * size
+        for seq in range(self._head, self._tail):
+            ts[seq & (size - 1)] = self._ts[seq & old_mask]
+            px[seq & (size - 1)] = self._px[seq & old_mask]
+        self._ts, self._px, self._mask = ts, px, size - 1
+
+    def push(self, ts: float, price: float):
+        """Append a sample, updating the monotonic min/max deques."""
+        if self._tail - self._head > self._mask:
+            self._grow()
+        seq = self._tail
+        i = seq & self._mask
+        self._ts[i] = ts
+        self._px[i] = price
+        self._tail = seq + 1
+
+        px = self._px
+        mask = self._mask
+        min_q = self._min_q
+        while min_q and px[min_q[-1] & mask] >= price:
+            min_q.pop()
+        min_q.append(seq)
+        max_q = self._max_q
+        while max_q and px[max_q[-1] & mask] <= price:
+            max_q.pop()
+        max_q.append(seq)
+
+    def evict(self, cutoff: float):
+        """Drop samples with timestamp <= cutoff."""
+        ts = self._ts
+        mask = self._mask
+        head = self._head
+        tail = self._tail
+        while head < tail and ts[head & mask] <= cutoff:
+            head += 1
+        self._head = head
+        while self._min_q and self._min_q[0] < head:
+            self._min_q.popleft()
+        while self._max_q and self._max_q[0] < head:
+            self._max_q.popleft()
+
+    def clear(self):
+        """Drop all samples."""
+        self._head = self._tail
+        self._min_q.clear()
+        self._max_q.clear()
+
+    @property
+    def latest(self) -> Optional[float]:
+        """Most recent price, or None if empty."""
+        if self._tail == self._head:
+            return None
+        return self._px[(self._tail - 1) & self._mask]
+
+    @property
+    def min_price(self) -> Optional[float]:
+        return self._px[self._min_q[0] & self._mask] if self._min_q else None
+
+    @property
+    def max_price(self) -> Optional[float]:
+        return self._px[self._max_q[0] & self._mask] if self._max_q else None
 
 
 @dataclass
@@ -31,13 +149,27 @@ class State:
     
     # Price data
     last_price: Optional[float] = None
-    price_window: list = field(default_factory=list)  # [(timestamp, price), ...]
+    price_window: PriceWindow = field(default_factory=PriceWindow)  # (timestamp, price) samples
+    volatility_estimator: Any = None  # core.volatility.VolatilityEstimator, None = built-in range
     
-    # Position
+    # Position (fed by the user WS position channel, REST as consistency check)
     position: float = 0.0
+    entry_price: Optional[float] = None
+    position_synced_at: float = 0.0  # time of last REST consistency check
+    
+    # Open orders indexed by cl_ord_id, plus (side, level) -> cl_ord_id slots
+    orders: Dict[str, OpenOrder] = field(default_factory=dict)
+    _slots: Dict[Tuple[str, int], str] = field(default_factory=dict)
+    # Per side sorted price view: [(price, cl_ord_id), ...] ascending
+    _book: Dict[str, list] = field(default_factory=lambda: {"buy": [], "sell": []})
     
-    # Open orders (one buy, one sell max)
-    open_orders: Dict[str, Optional[OpenOrder]] = field(default_factory=lambda: {"buy": None, "sell": None})
+    # level -> (cancel_distance_bps, rebalance_distance_bps) used to precompute bands
+    _level_distances: Dict[int, Tuple[float, float]] = field(default_factory=dict)
+    # cl_ord_id -> (lo1, hi1, lo2, hi2): last_price ranges where the order needs no action
+    _bands: Dict[str, tuple] = field(default_factory=dict)
+    
+    # Recently finished cl_ord_ids, so late REST acks cannot resurrect them
+    _done: OrderedDict = field(default_factory=OrderedDict)
     
     # Lock for thread safety
     _lock: Lock = field(default_factory=Lock)
@@ -47,71 +179,326 @@ class State:
         with self._lock:
             now = time.time()
             self.last_price = price
-            self.price_window.append((now, price))
+            self.price_window.push(now, price)
             
             # Clean up old data
-            cutoff = now - window_sec
-            self.price_window = [(t, p) for t, p in self.price_window if t > cutoff]
+            self.price_window.evict(now - window_sec)
+            
+            if self.volatility_estimator is not None:
+                self.volatility_estimator.update(now, price)
     
     def get_volatility_bps(self) -> float:
         """
         Calculate volatility in bps over the price window.
         
+        Uses the configured volatility estimator if one is set,
+        otherwise the max-min range of the price window.
+        
         Returns:
             Volatility in basis points, or inf if insufficient data
         """
         with self._lock:
+            if self.volatility_estimator is not None:
+                return self.volatility_estimator.value_bps()
+            
             if len(self.price_window) < 2:
                 return float("inf")
             
-            prices = [p for _, p in self.price_window]
-            if prices[-1] == 0:
+            window = self.price_window
+            latest = window.latest
+            if latest == 0:
                 return float("inf")
             
-            volatility = (max(prices) - min(prices)) / prices[-1] * 10000
+            volatility = (window.max_price - window.min_price) / latest * 10000
             return volatility
     
-    def update_position(self, qty: float):
-        """Update position quantity."""
+    def update_position(self, qty: float, entry_price: Optional[float] = None, synced: bool = False):
+        """
+        Update position quantity and, if known, entry price.
+        
+        Args:
+            synced: True if the values come from a REST query
+        """
         with self._lock:
             self.position = qty
-            logger.info(f"Position updated: {qty}")
+            if entry_price:  # 0 / None = unknown, keep cached value
+                self.entry_price = entry_price
+            if qty == 0:
+                self.entry_price = None
+            if synced:
+                self.position_synced_at = time.time()
+            logger.info(f"Position updated: {qty} (entry: {self.entry_price})")
+    
+    def get_upnl(self) -> Optional[float]:
+        """
+        Unrealized PnL of the position at last_price.
+        
+        Returns:
+            uPNL in quote currency, or None if entry price or last price is unknown
+        """
+        with self._lock:
+            if self.position == 0:
+                return 0.0
+            if self.entry_price is None or self.last_price is None:
+                return None
+            return (self.last_price - self.entry_price) * self.position
+    
+    def set_distance_bands(self, cancel_distance_bps: float, rebalance_distance_bps: float, level: int = 0):
+        """Set cancel/rebalance thresholds for a ladder level and recompute its bands."""
+        with self._lock:
+            self._level_distances[level] = (cancel_distance_bps, rebalance_distance_bps)
+            for order in self.orders.values():
+                if order.level == level:
+                    self._bands[order.cl_ord_id] = self._order_band(order)
+    
+    def _order_band(self, order: OpenOrder) -> tuple:
+        """
+        Convert the bps thresholds into absolute last_price bounds for an order.
+        
+        The order is kept while cancel_bps <= |price - last| / last <= rebalance_bps,
+        i.e. while last_price lies in [price/(1+r), price/(1+c)] (order above price)
+        or [price/(1-c), price/(1-r)] (order below price). Bounds are shrunk by a
+        tiny epsilon so rounding can only cause a spurious wake, never a missed one.
+        Orders outside the configured ladder get an empty band.
+        """
+        distances = self._level_distances.get(order.level)
+        if distances is None:
+            return (1.0, 0.0, 1.0, 0.0)
+        price = order.price
+        c = distances[0] / 10000
+        r = distances[1] / 10000
+        eps = 1e-9
+        lo1 = price / (1 + r) * (1 + eps)
+        hi1 = price / (1 + c) * (1 - eps)
+        lo2 = price / (1 - c) * (1 + eps) if c < 1 else float("inf")
+        hi2 = price / (1 - r) * (1 - eps) if r < 1 else float("inf")
+        return (lo1, hi1, lo2, hi2)
+    
+    def is_quiet(self) -> bool:
+        """
+        Check whether the last price requires no order action.
+        
+        Returns:
+            True if every configured ladder slot has an order and last_price
+            lies inside every order's band; False if a slot is missing, bands
+            are not configured or any boundary was crossed.
+        """
+        with self._lock:
+            last = self.last_price
+            if last is None or not self._level_distances:
+                return False
+            if len(self._slots) < 2 * len(self._level_distances):
+                return False
+            for cl_ord_id, (lo1, hi1, lo2, hi2) in self._bands.items():
+                if self.orders[cl_ord_id].status != LIVE:
+                    return False  # waiting on an ack or confirmation
+                if not (lo1 <= last <= hi1 or lo2 <= last <= hi2):
+                    return False
+            return True
+    
+    def add_order(self, order: OpenOrder) -> bool:
+        """
+        Track an order, taking over its ladder slot.
+        
+        A previous order in the slot is dropped, unless it is pending cancel:
+        then it stays tracked (without a slot) until its cancel is confirmed.
+        
+        Returns:
+            False if the order already finished (e.g. filled before its ack)
+        """
+        with self._lock:
+            if order.cl_ord_id in self._done:
+                logger.info(f"Order {order.cl_ord_id} already done, not tracking")
+                return False
+            if order.level is not None:
+                old_id = self._slots.get((order.side, order.level))
+                if old_id is not None and old_id != order.cl_ord_id:
+                    if self.orders[old_id].status == PENDING_CANCEL:
+                        del self._slots[(order.side, order.level)]
+                    else:
+                        self._remove(old_id)
+            self._remove(order.cl_ord_id)
+            self.orders[order.cl_ord_id] = order
+            if order.level is not None:
+                self._slots[(order.side, order.level)] = order.cl_ord_id
+            bisect.insort(self._book[order.side], (order.price, order.cl_ord_id))
+            self._bands[order.cl_ord_id] = self._order_band(order)
+            logger.info(
+                f"Order set: {order.side}[{order.level}] {order.qty} @ {order.price} "
+                f"(cl_ord_id: {order.cl_ord_id}, {order.status})"
+            )
+            return True
     
-    def set_order(self, side: str, order: Optional[OpenOrder]):
-        """Set or clear an open order."""
+    def remove_order(self, cl_ord_id: str) -> Optional[OpenOrder]:
+        """
+        Mark an order done and stop tracking it.
+        
+        Returns:
+            The removed order, or None if it was not tracked
+        """
         with self._lock:
-            self.open_orders[side] = order
+            self._mark_done(cl_ord_id)
+            order = self._remove(cl_ord_id)
             if order:
-                logger.info(f"Order set: {side} {order.qty} @ {order.price} (cl_ord_id: {order.cl_ord_id})")
-            else:
-                logger.info(f"Order cleared: {side}")
+                order.status = DONE
+                logger.info(f"Order cleared: {order.side}[{order.level}] (cl_ord_id: {cl_ord_id})")
+            return order
+    
+    def is_done(self, cl_ord_id: str) -> bool:
+        """Check whether an order is known to have finished recently."""
+        with self._lock:
+            return cl_ord_id in self._done
+    
+    def _mark_done(self, cl_ord_id: str):
+        """Remember a finished cl_ord_id. Caller must hold the lock."""
+        self._done[cl_ord_id] = None
+        if len(self._done) > 1000:
+            self._done.popitem(last=False)
+    
+    def set_status(self, cl_ord_id: str, status: str, expect: Optional[str] = None) -> bool:
+        """
+        Move a tracked order to a new lifecycle status.
+        
+        Args:
+            expect: Only transition if the current status matches
+            
+        Returns:
+            True if the transition happened
+        """
+        if status == DONE:
+            return self.remove_order(cl_ord_id) is not None
+        with self._lock:
+            order = self.orders.get(cl_ord_id)
+            if order is None or (expect is not None and order.status != expect):
+                return False
+            order.status = status
+            order.status_at = time.time()
+            return True
+    
+    def apply_order_update(self, cl_ord_id: str, status: str) -> bool:
+        """
+        Reconcile a user WS order update.
+        
+        Terminal statuses finish the order; any other status confirms a
+        pending new order as live.
+        
+        Returns:
+            True if a tracked order finished (a slot may need refilling)
+        """
+        if status in FINAL_ORDER_STATUSES:
+            return self.remove_order(cl_ord_id) is not None
+        self.set_status(cl_ord_id, LIVE, expect=PENDING_NEW)
+        return False
     
-    def get_order(self, side: str) -> Optional[OpenOrder]:
-        """Get current order for a side."""
+    def expire_pending(self, timeout_sec: float) -> List[OpenOrder]:
+        """
+        Drop orders stuck pending longer than timeout_sec.
+        
+        Orders whose request is still in flight are kept however long the
+        HTTP timeout and rate limiter queue take; the clock counts from the
+        last status change. Pending cancels are assumed done (the REST
+        cancel was acked but the WS confirmation was missed) and remembered
+        as finished. Pending news are assumed lost but not remembered, so a
+        late user WS update still shows the order as live and untracked.
+        
+        Returns:
+            Expired orders
+        """
+        cutoff = time.time() - timeout_sec
         with self._lock:
-            return self.open_orders.get(side)
+            stale = [
+                o for o in self.orders.values()
+                if o.status in (PENDING_NEW, PENDING_CANCEL) and not o.in_flight and o.status_at < cutoff
+            ]
+            for order in stale:
+                logger.warning(f"Order {order.cl_ord_id} stuck in {order.status}, expiring")
+                if order.status == PENDING_CANCEL:
+                    self._mark_done(order.cl_ord_id)
+                self._remove(order.cl_ord_id)
+                order.status = DONE
+            return stale
+    
+    def _remove(self, cl_ord_id: str) -> Optional[OpenOrder]:
+        """Remove an order from all indexes. Caller must hold the lock."""
+        order = self.orders.pop(cl_ord_id, None)
+        if order is None:
+            return None
+        if order.level is not None and self._slots.get((order.side, order.level)) == cl_ord_id:
+            del self._slots[(order.side, order.level)]
+        book = self._book[order.side]
+        i = bisect.bisect_left(book, (order.price, cl_ord_id))
+        if i < len(book) and book[i][1] == cl_ord_id:
+            del book[i]
+        self._bands.pop(cl_ord_id, None)
+        return order
     
-    def has_order(self, side: str) -> bool:
-        """Check if we have an order on a side."""
+    def get_order_by_id(self, cl_ord_id: str) -> Optional[OpenOrder]:
+        """Get a tracked order by client order ID."""
         with self._lock:
-            return self.open_orders.get(side) is not None
+            return self.orders.get(cl_ord_id)
+    
+    def get_orders(self, side: Optional[str] = None) -> List[OpenOrder]:
+        """
+        Get tracked orders, closest to the market first.
+        
+        Args:
+            side: Optional side filter
+        """
+        with self._lock:
+            result = []
+            for s in ((side,) if side else ("buy", "sell")):
+                book = self._book[s]
+                ids = reversed(book) if s == "buy" else book
+                result.extend(self.orders[cl_ord_id] for _, cl_ord_id in ids)
+            return result
+    
+    def set_order(self, side: str, order: Optional[OpenOrder], level: int = 0):
+        """Set or clear the order in a ladder slot."""
+        if order is not None:
+            self.add_order(order)
+            return
+        with self._lock:
+            cl_ord_id = self._slots.get((side, level))
+            if cl_ord_id is not None:
+                self._remove(cl_ord_id)
+                logger.info(f"Order cleared: {side}[{level}]")
+    
+    def get_order(self, side: str, level: int = 0) -> Optional[OpenOrder]:
+        """Get current order for a ladder slot."""
+        with self._lock:
+            cl_ord_id = self._slots.get((side, level))
+            return self.orders.get(cl_ord_id) if cl_ord_id else None
+    
+    def has_order(self, side: str, level: int = 0) -> bool:
+        """Check if a ladder slot is occupied (pending new, live or pending cancel)."""
+        with self._lock:
+            return (side, level) in self._slots
     
     def clear_all_orders(self):
         """Clear all tracked orders."""
         with self._lock:
-            self.open_orders = {"buy": None, "sell": None}
+            self.orders = {}
+            self._slots = {}
+            self._book = {"buy": [], "sell": []}
+            self._bands = {}
             logger.info("All orders cleared")
     
-    def get_orders_to_cancel(self, cancel_distance_bps: float, rebalance_distance_bps: float) -> list[OpenOrder]:
+    def get_orders_to_cancel(
+        self,
+        cancel_distance_bps: Optional[float] = None,
+        rebalance_distance_bps: Optional[float] = None,
+    ) -> list[OpenOrder]:
         """
         Get orders that need to be cancelled due to price distance.
         
         Args:
-            cancel_distance_bps: Min distance - cancel if closer than this (too close)
-            rebalance_distance_bps: Max distance - cancel if farther than this (too far)
+            cancel_distance_bps: Min distance - cancel if closer than this (too close).
+                Defaults to the per-level threshold set via set_distance_bands.
+            rebalance_distance_bps: Max distance - cancel if farther than this (too far).
+                Defaults to the per-level threshold set via set_distance_bands.
             
         Returns:
-            List of orders to cancel
+            List of live orders to cancel (orders outside the configured ladder included)
         """
         with self._lock:
             if self.last_price is None:
@@ -119,22 +506,30 @@ class State:
             
             to_cancel = []
             
-            for side, order in self.open_orders.items():
-                if order is None:
+            for order in self.orders.values():
+                if order.status != LIVE:
+                    continue  # pending orders are reconciled by their ack/confirmation
+                
+                distances = self._level_distances.get(order.level, (None, None))
+                cancel_bps = cancel_distance_bps if cancel_distance_bps is not None else distances[0]
+                rebalance_bps = rebalance_distance_bps if rebalance_distance_bps is not None else distances[1]
+                if cancel_bps is None or rebalance_bps is None:
+                    logger.warning(f"Order outside ladder: {order.side} @ {order.price} (cl_ord_id: {order.cl_ord_id})")
+                    to_cancel.append(order)
                     continue
                 
                 # Calculate distance in bps
                 distance_bps = abs(order.price - self.last_price) / self.last_price * 10000
                 
-                if distance_bps < cancel_distance_bps:
+                if distance_bps < cancel_bps:
                     logger.warning(
-                        f"Order too close: {side} @ {order.price}, "
+                        f"Order too close: {order.side}[{order.level}] @ {order.price}, "
                         f"last_price={self.last_price}, distance={distance_bps:.2f}bps"
                     )
                     to_cancel.append(order)
-                elif distance_bps > rebalance_distance_bps:
+                elif distance_bps > rebalance_bps:
                     logger.warning(
-                        f"Order too far: {side} @ {order.price}, "
+                        f"Order too far: {order.side}[{order.level}] @ {order.price}, "
                         f"last_price={self.last_price}, distance={distance_bps:.2f}bps"
                     )
                     to_cancel.append(order)
@@ -0,0 +1,190 @@
+"""Incremental volatility estimators for the maker's volatility gate.
+
+Every estimator is fed one (timestamp, price) sample per price tick via
+``update`` in amortized O(1) and reports its current reading in bps via
+``value_bps``. A reading of ``inf`` means "not enough data yet", which keeps
+the gate closed just like the original range check.
+
+Available estimators (``Config.volatility_estimator``):
+- range: max-min over the window (original behaviour)
+- ewma: time-decayed EWMA of absolute log returns
+- rv: realized variance (sum of squared log returns) over the window
+- multi: realized variance over several horizons, worst case wins
+"""
+import math
+from collections import deque
+from typing import Optional, Sequence
+
+from core.state import PriceWindow
+
+
+BPS = 10000
+
+
+class VolatilityEstimator:
+    """Base class for incremental volatility estimators."""
+
+    def update(self, ts: float, price: float):
+        """Feed one price sample."""
+        raise NotImplementedError
+
+    def value_bps(self) -> float:
+        """Current volatility in bps, or inf if insufficient data."""
+        raise NotImplementedError
+
+
+class RangeEstimator(VolatilityEstimator):
+    """
+    Max-min price range over a sliding window, relative to the last price.
+
+    If ``window`` is given it is treated as shared and externally maintained
+    (e.g. ``State.price_window``), so ``update`` does no work.
+    """
+
+    def __init__(self, window_sec: float, window: Optional[PriceWindow] = None):
+        self.window_sec = window_sec
+        self._owns_window = window is None
+        self._window = window if window is not None else PriceWindow()
+
+    def update(self, ts: float, price: float):
+        if self._owns_window:
+            self._window.push(ts, price)
+            self._window.evict(ts - self.window_sec)
+
+    def value_bps(self) -> float:
+        window = self._window
+        if len(window) < 2:
+            return float("inf")
+        latest = window.latest
+        if latest == 0:
+            return float("inf")
+        return (window.max_price - window.min_price) / latest * BPS
+
+
+class EwmaAbsReturnEstimator(VolatilityEstimator):
+    """
+    Time-decayed EWMA of absolute log returns.
+
+    Each return is normalized by sqrt(dt) so the estimate does not depend on
+    the tick rate, then scaled back to ``window_sec`` for comparison with the
+    same bps threshold as the range estimator.
+    """
+
+    MIN_DT = 1e-3  # seconds, guards bursts with identical timestamps
+
+    def __init__(self, window_sec: float, halflife_sec: float):
+        self.window_sec = window_sec
+        self.halflife_sec = halflife_sec
+        self._decay = math.log(2) / halflife_sec
+        self._last_ts: Optional[float] = None
+        self._last_price: Optional[float] = None
+        self._ewma = 0.0
+        self._weight = 0.0  # bias correction for the first samples
+
+    def update(self, ts: float, price: float):
+        if price <= 0:
+            return
+        if self._last_price is not None:
+            dt = max(ts - self._last_ts, self.MIN_DT)
+            r = abs(math.log(price / self._last_price)) / math.sqrt(dt)
+            alpha = 1.0 - math.exp(-self._decay * dt)
+            self._ewma += alpha * (r - self._ewma)
+            self._weight += alpha * (1.0 - self._weight)
+        self._last_ts = ts
+        self._last_price = price
+
+    def value_bps(self) -> float:
+        if self._weight == 0.0:
+            return float("inf")
+        return self._ewma / self._weight * math.sqrt(self.window_sec) * BPS
+
+
+class RealizedVarianceEstimator(VolatilityEstimator):
+    """Square root of the sum of squared log returns over a sliding window."""
+
+    def __init__(self, window_sec: float):
+        self.window_sec = window_sec
+        self._returns: deque = deque()  # (timestamp, squared log return)
+        self._sum = 0.0
+        self._last_price: Optional[float] = None
+
+    def update(self, ts: float, price: float):
+        if price <= 0:
+            return
+        if self._last_price is not None:
+            r = math.log(price / self._last_price)
+            r2 = r * r
+            self._returns.append((ts, r2))
+            self._sum += r2
+        self._last_price = price
+
+        cutoff = ts - self.window_sec
+        returns = self._returns
+        while returns and returns[0][0] <= cutoff:
+            self._sum -= returns.popleft()[1]
+        if not returns:
+            self._sum = 0.0  # reset accumulated rounding error
+
+    def value_bps(self) -> float:
+        # The newest return is never evicted, so empty means < 2 samples
+        if not self._returns:
+            return float("inf")
+        return math.sqrt(max(self._sum, 0.0)) * BPS
+
+
+class MultiHorizonEstimator(VolatilityEstimator):
+    """
+    Realized variance over several horizons, e.g. 1s/5s/30s.
+
+    Each horizon is rescaled to ``window_sec`` with the square-root-of-time
+    rule, and the largest reading wins, so a short spike or a slow drift
+    both close the gate.
+    """
+
+    def __init__(self, window_sec: float, horizons_sec: Sequence[float]):
+        self.window_sec = window_sec
+        self._estimators = [RealizedVarianceEstimator(h) for h in horizons_sec]
+        self._scales = [math.sqrt(window_sec / h) for h in horizons_sec]
+
+    def update(self, ts: float, price: float):
+        for est in self._estimators:
+            est.update(ts, price)
+
+    def value_bps(self) -> float:
+        return max(
+            est.value_bps() * scale
+            for est, scale in zip(self._estimators, self._scales)
+        )
+
+
+ESTIMATORS = ("range", "ewma", "rv", "multi")
+
+
+def create_estimator(config, window: Optional[PriceWindow] = None) -> VolatilityEstimator:
+    """
+    Build the estimator selected by ``config.volatility_estimator``.
+
+    Args:
+        config: Bot config
+        window: Optional shared price window for the range estimator
+
+    Returns:
+        Volatility estimator instance
+    """
+    kind = config.volatility_estimator
+    window_sec = config.volatility_window_sec
+    if kind == "range":
+        return RangeEstimator(window_sec, window)
+    if kind == "ewma":
+        halflife_sec = config.volatility_ewma_halflife_sec
+        if not halflife_sec or halflife_sec <= 0:
+            raise ValueError(f"volatility_ewma_halflife_sec must be positive, got {halflife_sec}")
+        return EwmaAbsReturnEstimator(window_sec, halflife_sec)
+    if kind == "rv":
+        return RealizedVarianceEstimator(window_sec)
+    if kind == "multi":
+        horizons_sec = config.volatility_horizons_sec
+        if not horizons_sec or any(not h or h <= 0 for h in horizons_sec):
+            raise ValueError(f"volatility_horizons_sec must be a non-empty list of positive seconds, got {horizons_sec}")
+        return MultiHorizonEstimator(window_sec, horizons_sec)
+    raise ValueError(f"Unknown volatility estimator: {kind} (expected one of {ESTIMATORS})")
@@ -0,0 +1,219 @@
+"""Latency histograms with bounded relative error.
+
+Values are recorded as integer microseconds into log-linear buckets: exact
+below 64us, then 32 buckets per power of two, so any reported percentile
+is within ~3% of the true value while the whole range from 1us to hours
+fits in under a thousand counters. Recording is a few integer operations
+and never allocates.
+
+RollingHistogram keeps one histogram per time slot and drops slots older
+than its window, for "last N minutes" statistics.
+"""
+import time
+from operator import add
+from collections import deque
+from typing import Dict, Iterable, Optional, Sequence
+
+
+SUB_BITS = 5
+SUB_COUNT = 1 << SUB_BITS  # buckets per power of two
+MAX_VALUE_US = (1 << 36) - 1  # ~19h, larger values are clamped
+BUCKETS = ((MAX_VALUE_US.bit_length() - SUB_BITS) * SUB_COUNT) + SUB_COUNT
+
+DEFAULT_PERCENTILES = (50, 90, 99, 99.9)
+
+
+def bucket_index(value_us: int) -> int:
+    """Bucket of a non-negative integer value."""
+    if value_us < 2 * SUB_COUNT:
+        return value_us
+    shift = value_us.bit_length() - SUB_BITS - 1
+    return shift * SUB_COUNT + (value_us >> shift)
+
+
+def bucket_bounds(index: int) -> tuple:
+    """[low, high) value range of a bucket."""
+    if index < 2 * SUB_COUNT:
+        return index, index + 1
+    shift = index // SUB_COUNT - 1
+    low = (index - shift * SUB_COUNT) << shift
+    return low, low + (1 << shift)
+
+
+def _percentile_key(p: float) -> str:
+    return "p" + f"{p:g}".replace(".", "")
+
+
+class Histogram:
+    """Log-linear histogram of microsecond values."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value_us: float):
+        """Record one value in microseconds (negative values count as 0)."""
+        v = int(value_us)
+        if v < 0:
+            v = 0
+        elif v > MAX_VALUE_US:
+            v = MAX_VALUE_US
+        if v < 2 * SUB_COUNT:
+            self.counts[v] += 1
+        else:
+            shift = v.bit_length() - SUB_BITS - 1
+            self.counts[shift * SUB_COUNT + (v >> shift)] += 1
+        if self.count == 0 or v < self.min:
+            self.min = v
+        if v > self.max:
+            self.max = v
+        self.count += 1
+        self.total += v
+
+    def record_seconds(self, seconds: float):
+        """Record a duration given in seconds."""
+        self.record(seconds * 1e6)
+
+    def merge(self, other: "Histogram"):
+        """Add the counts of another histogram."""
+        if not other.count:
+            return
+        self.counts = list(map(add, self.counts, other.counts))
+        self.min = other.min if not self.count else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def reset(self):
+        self.counts = [0] * BUCKETS
+        self.count = self.total = self.min = self.max = 0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Value at percentile p (0-100), as the midpoint of its bucket, clamped to min/max."""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(round(p / 100 * self.count + 0.4999)))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c:
+                seen += c
+                if seen >= rank:
+                    low, high = bucket_bounds(i)
+                    return float(min(max((low + high - 1) / 2, self.min), self.max))
+        return float(self.max)
+
+    def summary(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES, scale: float = 1.0) -> dict:
+        """
+        Count, mean, min, max and percentiles.
+
+        Args:
+            percentiles: Percentiles to report, keys p50, p99, p999, ...
+            scale: Divisor applied to values (1000 reports milliseconds)
+        """
+        result = {
+            "count": self.count,
+            "mean": round(self.mean / scale, 3),
+            "min": round(self.min / scale, 3),
+            "max": round(self.max / scale, 3),
+        }
+        for p in percentiles:
+            result[_percentile_key(p)] = round(self.percentile(p) / scale, 3)
+        return result
+
+    def to_dict(self) -> dict:
+        """Lossless export: non-empty buckets as {index: count}."""
+        return {
+            "sub_bits": SUB_BITS,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "buckets": {str(i): c for i, c in enumerate(self.counts) if c},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        if data.get("sub_bits", SUB_BITS) != SUB_BITS:
+            raise ValueError(f"Incompatible histogram layout: sub_bits={data.get('sub_bits')}")
+        hist = cls()
+        for i, c in data.get("buckets", {}).items():
+            hist.counts[int(i)] = c
+        hist.count = data.get("count", 0)
+        hist.total = data.get("total", 0)
+        hist.min = data.get("min", 0)
+        hist.max = data.get("max", 0)
+        return hist
+
+
+class RollingHistogram:
+    """Histogram over the last window_sec, kept as `slots` rotating sub-histograms."""
+
+    def __init__(self, window_sec: float = 300.0, slots: int = 5, clock=time.monotonic):
+        self.slot_sec = window_sec / slots
+        self._slots = slots
+        self._clock = clock
+        self._ring: deque = deque()  # (slot start, Histogram), oldest first
+        self._current: Optional[Histogram] = None
+        self._current_end = 0.0
+        self.lifetime_count = 0
+
+    def _rotate(self, now: float):
+        start = now - (now % self.slot_sec)
+        self._current = Histogram()
+        self._current_end = start + self.slot_sec
+        self._ring.append((start, self._current))
+        while len(self._ring) > self._slots:
+            self._ring.popleft()
+
+    def record(self, value_us: float, now: Optional[float] = None):
+        if now is None:
+            now = self._clock()
+        if now >= self._current_end:
+            self._rotate(now)
+        self._current.record(value_us)
+        self.lifetime_count += 1
+
+    def _live(self, now: float, window_sec: Optional[float] = None) -> Iterable[Histogram]:
+        cutoff = now - (window_sec or self.slot_sec * self._slots)
+        # Copy the ring: snapshots may be taken from another thread while recording rotates it
+        return [hist for start, hist in list(self._ring) if start + self.slot_sec > cutoff]
+
+    def snapshot(self, now: Optional[float] = None, window_sec: Optional[float] = None) -> Histogram:
+        """
+        Merged histogram of the slots still inside the window.
+
+        Args:
+            now: Clock value to evaluate the window at
+            window_sec: Shorter window than the full one, rounded up to whole slots
+        """
+        merged = Histogram()
+        for hist in self._live(self._clock() if now is None else now, window_sec):
+            merged.merge(hist)
+        return merged
+
+    def summary(
+        self,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+        scale: float = 1.0,
+        window_sec: Optional[float] = None,
+    ) -> dict:
+        return self.snapshot(window_sec=window_sec).summary(percentiles, scale)
+
+
+def summaries(histograms: Dict[str, "RollingHistogram"], scale: float = 1.0) -> Dict[str, dict]:
+    """Summary of every non-empty rolling histogram in a dict."""
+    result = {}
+    for name, hist in histograms.items():
+        snapshot = hist.snapshot()
+        if snapshot.count:
+            result[name] = snapshot.summary(scale=scale)
+    return result
@@ -0,0 +1,449 @@
+"""Latency store: REST latencies in hourly binary segments with rollups.
+
+The text latency log is appended forever and has to be parsed in full to
+look at a recent window. The store keeps the same samples in a directory
+partitioned by UTC hour, so a windowed query only opens the hours it
+overlaps:
+
+    <dir>/endpoints.json      endpoint names, position = endpoint id
+    <dir>/<YYYYMMDDHH>.seg    raw samples, fixed-width little-endian records:
+                                  ts        f8  epoch seconds
+                                  latency   f4  milliseconds
+                                  endpoint  u4  endpoint id
+    <dir>/<YYYYMMDDHH>.min    per-minute rollups of that hour (ROLLUP records)
+    <dir>/hourly.roll         per-hour rollups (ROLLUP records)
+
+A rollup record is ``start f8, endpoint u4, first u4, count u4, sum f8,
+min f4, max f4`` (ms). ``first`` in minute rollups is the index of the
+first sample of that minute in the hour segment, which makes the minute
+rollups the time index of the segment: a query starting mid-hour seeks
+straight to the minute instead of scanning the hour. After a restart a
+minute or hour may have two rollup rows per endpoint; counts and sums
+simply add up. A torn record left by a crash is cut off before a file is
+appended to again, so later records and ``first`` indexes stay aligned.
+
+Samples are packed into memory buffers by ``record()`` and appended to
+disk by a background thread, like the market tape (see tape.py). Raw
+segments and minute rollups older than ``retention_hours`` are deleted;
+hourly rollups are kept.
+
+Usage:
+    python latency_store.py stats latency_config --hours 2
+    python latency_store.py import latency_config.log latency_config
+"""
+import os
+import glob
+import json
+import time
+import struct
+import logging
+import argparse
+import calendar
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from histogram import Histogram
+
+
+logger = logging.getLogger(__name__)
+
+
+RECORD = struct.Struct("<dfI")
+ROLLUP = struct.Struct("<dIIIdff")
+SEGMENT_SUFFIX = ".seg"
+MINUTE_SUFFIX = ".min"
+HOURLY_FILE = "hourly.roll"
+ENDPOINTS_FILE = "endpoints.json"
+
+
+def _hour_name(ts: float) -> str:
+    return time.strftime("%Y%m%d%H", time.gmtime(ts))
+
+
+def _hour_start(name: str) -> float:
+    return float(calendar.timegm(time.strptime(name, "%Y%m%d%H")))
+
+
+def _truncate_torn(path: str, record_size: int) -> int:
+    """Cut a partial record off the end of a file. Returns its size in bytes (0 if missing)."""
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+    torn = size % record_size
+    if torn:
+        os.truncate(path, size - torn)
+        logger.warning(f"Latency store {path}: dropped {torn} bytes of a torn record")
+    return size - torn
+
+
+class _Rollup:
+    """Running count/sum/min/max of one endpoint in one minute or hour."""
+
+    __slots__ = ("first", "count", "total", "min", "max")
+
+    def __init__(self, first: int = 0):
+        self.first = first
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        if not self.count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def pack(self, start: float, endpoint_id: int) -> bytes:
+        return ROLLUP.pack(start, endpoint_id, self.first, self.count, self.total, self.min, self.max)
+
+
+class LatencyStore:
+    """Buffered writer of latency samples into hourly segments with rollups."""
+
+    def __init__(self, directory: str, retention_hours: float = 48, flush_interval: float = 1.0):
+        """
+        Args:
+            directory: Store directory (one per account)
+            retention_hours: Hours of raw samples and minute rollups to keep
+            flush_interval: Seconds between handoffs to the writer thread
+        """
+        self.directory = directory
+        self.retention_hours = retention_hours
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+        _truncate_torn(os.path.join(directory, HOURLY_FILE), ROLLUP.size)
+
+        self._endpoints: List[str] = read_endpoints(directory)
+        self._endpoint_ids: Dict[str, int] = {name: i for i, name in enumerate(self._endpoints)}
+
+        self._hour = ""
+        self._hour_start = 0.0
+        self._hour_end = 0.0  # first timestamp of the next hour
+        self._minute_end = 0.0
+        self._seg_count = 0  # samples in the current hour segment (file + buffer)
+        self._segment = bytearray()
+        self._minutes = bytearray()  # packed minute rollups of the current hour
+        self._hourly = bytearray()  # packed hour rollups
+        self._minute_rollups: Dict[int, _Rollup] = {}
+        self._hour_rollups: Dict[int, _Rollup] = {}
+        self._handoff_at = 0.0
+
+        self._pending: deque = deque()  # (path, bytes) handed to the writer
+        self._prune_due = False
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.records = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name=f"latency-store:{directory}", daemon=True)
+        self._thread.start()
+
+    def _endpoint_id(self, endpoint: str) -> int:
+        endpoint_id = self._endpoint_ids.get(endpoint)
+        if endpoint_id is None:
+            # Rare (once per endpoint): written synchronously so readers always know the id
+            endpoint_id = self._endpoint_ids[endpoint] = len(self._endpoints)
+            self._endpoints.append(endpoint)
+            path = os.path.join(self.directory, ENDPOINTS_FILE)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._endpoints, f)
+            os.replace(tmp, path)
+        return endpoint_id
+
+    def record(self, endpoint: str, latency_ms: float, ts: Optional[float] = None):
+        """Append one sample to the buffers. Never does file IO except for a new endpoint."""
+        if self._closed:
+            self.dropped += 1
+            return
+        if ts is None:
+            ts = time.time()
+        if ts >= self._minute_end:
+            if ts >= self._hour_end:
+                self._rotate_hour(ts)
+            else:
+                self._close_minute()
+            self._minute_end = ts - ts % 60 + 60
+        endpoint_id = self._endpoint_id(endpoint)
+
+        self._segment += RECORD.pack(ts, latency_ms, endpoint_id)
+        rollup = self._minute_rollups.get(endpoint_id)
+        if rollup is None:
+            rollup = self._minute_rollups[endpoint_id] = _Rollup(self._seg_count)
+        rollup.add(latency_ms)
+        rollup = self._hour_rollups.get(endpoint_id)
+        if rollup is None:
+            rollup = self._hour_rollups[endpoint_id] = _Rollup()
+        rollup.add(latency_ms)
+        self._seg_count += 1
+        self.records += 1
+
+        if ts >= self._handoff_at:
+            self._handoff_at = ts + self.flush_interval
+            self._handoff()
+            self._wakeup.set()
+
+    def _close_minute(self):
+        if not self._minute_rollups:
+            return
+        start = self._minute_end - 60
+        for endpoint_id, rollup in self._minute_rollups.items():
+            self._minutes += rollup.pack(start, endpoint_id)
+        self._minute_rollups = {}
+
+    def _close_hour(self):
+        self._close_minute()
+        for endpoint_id, rollup in self._hour_rollups.items():
+            self._hourly += rollup.pack(self._hour_start, endpoint_id)
+        self._hour_rollups = {}
+        self._handoff()
+
+    def _rotate_hour(self, ts: float):
+        """Close the current hour and start the segment of ts."""
+        if self._hour:
+            self._close_hour()
+            self._prune_due = True
+        self._hour = _hour_name(ts)
+        self._hour_start = ts - ts % 3600
+        self._hour_end = self._hour_start + 3600
+        # Continue an existing segment (restart within the hour), whole records only
+        self._seg_count = _truncate_torn(self._path(SEGMENT_SUFFIX), RECORD.size) // RECORD.size
+        _truncate_torn(self._path(MINUTE_SUFFIX), ROLLUP.size)
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.directory, f"{self._hour}{suffix}")
+
+    def _handoff(self):
+        for suffix, buffer in ((SEGMENT_SUFFIX, self._segment), (MINUTE_SUFFIX, self._minutes)):
+            if buffer:
+                self._pending.append((self._path(suffix), bytes(buffer)))
+                buffer.clear()
+        if self._hourly:
+            self._pending.append((os.path.join(self.directory, HOURLY_FILE), bytes(self._hourly)))
+            self._hourly.clear()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        """Append queued chunks, one open/write per file; prune old hours when due."""
+        chunks: Dict[str, List[bytes]] = {}
+        pending = self._pending
+        while pending:
+            path, data = pending.popleft()
+            chunks.setdefault(path, []).append(data)
+        for path, parts in chunks.items():
+            try:
+                with open(path, "ab") as f:
+                    f.write(b"".join(parts))
+            except Exception as e:
+                if path.endswith(SEGMENT_SUFFIX):
+                    self.dropped += sum(len(p) for p in parts) // RECORD.size
+                logger.warning(f"Latency store write failed for {path}: {e}")
+        if self._prune_due:
+            self._prune_due = False
+            self._prune()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_hours * 3600
+        for suffix in (SEGMENT_SUFFIX, MINUTE_SUFFIX):
+            for path in glob.glob(os.path.join(self.directory, f"*{suffix}")):
+                try:
+                    if _hour_start(os.path.basename(path)[:-len(suffix)]) + 3600 <= cutoff:
+                        os.remove(path)
+                except (OSError, ValueError) as e:
+                    logger.debug(f"Latency store prune skipped {path}: {e}")
+
+    def close(self, timeout: float = 2.0):
+        """Write the open minute/hour rollups, flush and stop the writer thread."""
+        if self._closed:
+            return
+        if self._hour:
+            self._close_hour()
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+
+
+# -- reading -----------------------------------------------------------------
+
+def read_endpoints(directory: str) -> List[str]:
+    """Endpoint names by id."""
+    try:
+        with open(os.path.join(directory, ENDPOINTS_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _read_struct(path: str, layout: struct.Struct, first: int = 0) -> Iterator[tuple]:
+    """Records of a file from index ``first``; a torn last record is ignored."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(first * layout.size)
+            data = f.read()
+    except OSError:
+        return iter(())
+    end = len(data) - len(data) % layout.size
+    return layout.iter_unpack(data[:end])
+
+
+def _hours(directory: str, suffix: str, start: float, end: float) -> List[Tuple[float, str]]:
+    """(hour start, path) of the files overlapping [start, end), in order."""
+    result = []
+    for path in glob.glob(os.path.join(directory, f"*{suffix}")):
+        try:
+            hour = _hour_start(os.path.basename(path)[:-len(suffix)])
+        except ValueError:
+            continue
+        if hour < end and hour + 3600 > start:
+            result.append((hour, path))
+    return sorted(result)
+
+
+def _first_index(directory: str, hour: float, start: float) -> int:
+    """Index of the first sample at or after start in an hour segment, from the minute rollups."""
+    if start <= hour:
+        return 0
+    minute = start - start % 60
+    path = os.path.join(directory, f"{_hour_name(hour)}{MINUTE_SUFFIX}")
+    index = 0
+    for ts, _, first, count, _, _, _ in _read_struct(path, ROLLUP):
+        if ts >= minute:
+            return first
+        # The open minute is not rolled up yet: scan from the end of the last indexed one
+        index = max(index, first + count)
+    return index
+
+
+def read_samples(directory: str, start: float, end: float) -> Iterator[Tuple[float, float, str]]:
+    """
+    Raw samples in [start, end) as (ts, latency_ms, endpoint).
+
+    Only the hour segments overlapping the window are opened, and the first
+    one is entered at the minute of ``start`` using the minute rollups.
+    """
+    endpoints = read_endpoints(directory)
+    for hour, path in _hours(directory, SEGMENT_SUFFIX, start, end):
+        for ts, latency_ms, endpoint_id in _read_struct(path, RECORD, _first_index(directory, hour, start)):
+            if start <= ts < end:
+                name = endpoints[endpoint_id] if endpoint_id < len(endpoints) else str(endpoint_id)
+                yield ts, latency_ms, name
+
+
+def window_stats(directory: str, start: float, end: Optional[float] = None) -> Dict[str, dict]:
+    """
+    Percentiles by endpoint over [start, end) from the raw samples.
+
+    Returns:
+        {endpoint: {"count", "mean", "min", "max", "p50", "p90", "p99", "p999"}} in ms
+    """
+    histograms: Dict[str, Histogram] = {}
+    for _, latency_ms, endpoint in read_samples(directory, start, end or time.time() + 1):
+        hist = histograms.get(endpoint)
+        if hist is None:
+            hist = histograms[endpoint] = Histogram()
+        hist.record(latency_ms * 1000)
+    return {endpoint: hist.summary(scale=1000) for endpoint, hist in histograms.items()}
+
+
+def rollups(directory: str, start: float, end: float, resolution: str = "minute") -> List[dict]:
+    """
+    Precomputed rollups starting in [start, end), for long windows and charts.
+
+    Args:
+        resolution: "minute" (kept for retention_hours) or "hour" (kept forever)
+
+    Returns:
+        [{"ts", "endpoint", "count", "mean", "min", "max"}] (ms), duplicates
+        of the same period merged, ordered by time
+    """
+    if resolution == "hour":
+        paths = [os.path.join(directory, HOURLY_FILE)]
+    else:
+        paths = [path for _, path in _hours(directory, MINUTE_SUFFIX, start, end)]
+    endpoints = read_endpoints(directory)
+    merged: Dict[Tuple[float, int], _Rollup] = {}
+    for path in paths:
+        for ts, endpoint_id, _, count, total, low, high in _read_struct(path, ROLLUP):
+            if not start <= ts < end or not count:
+                continue
+            rollup = merged.get((ts, endpoint_id))
+            if rollup is None:
+                rollup = merged[(ts, endpoint_id)] = _Rollup()
+                rollup.min = low
+            rollup.min = min(rollup.min, low)
+            rollup.max = max(rollup.max, high)
+            rollup.count += count
+            rollup.total += total
+    return [
+        {
+            "ts": ts,
+            "endpoint": endpoints[endpoint_id] if endpoint_id < len(endpoints) else str(endpoint_id),
+            "count": r.count,
+            "mean": round(r.total / r.count, 3),
+            "min": round(r.min, 3),
+            "max": round(r.max, 3),
+        }
+        for (ts, endpoint_id), r in sorted(merged.items())
+    ]
+
+
+def import_log(log_file: str, directory: str) -> int:
+    """Convert a text latency log (``timestamp,endpoint,ms`` lines) into a store."""
+    store = LatencyStore(directory, retention_hours=float("inf"))
+    count = 0
+    try:
+        with open(log_file, "r") as f:
+            for line in f:
+                parts = line.strip().split(",")
+                if len(parts) < 3:
+                    continue
+                try:
+                    ts = datetime.strptime(parts[0], "%Y-%m-%d %H:%M:%S").timestamp()
+                    store.record(parts[1], float(parts[2]), ts)
+                    count += 1
+                except ValueError:
+                    pass
+    finally:
+        store.close()
+    return count
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="StandX latency store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    stats = sub.add_parser("stats", help="Latency percentiles of a recent window")
+    stats.add_argument("dir", help="Store directory (latency_<config>)")
+    stats.add_argument("--hours", type=float, default=2.0, help="Window in hours (default: 2)")
+    convert = sub.add_parser("import", help="Convert a text latency log")
+    convert.add_argument("log", help="latency_<config>.log")
+    convert.add_argument("dir", help="Store directory to append to")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    args = parse_args()
+    if args.command == "stats":
+        for endpoint, s in sorted(window_stats(args.dir, time.time() - args.hours * 3600).items()):
+            print(
+                f"{endpoint}: {s['count']} requests, avg {s['mean']:.0f}ms, p50 {s['p50']:.0f}ms, "
+                f"p99 {s['p99']:.0f}ms, max {s['max']:.0f}ms"
+            )
+    else:
+        print(f"Imported {import_log(args.log, args.dir)} samples into {args.dir}")
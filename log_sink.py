@@ -0,0 +1,114 @@
+"""Buffered append-only log files written from a background thread.
+
+Latency and reduce-position logs used to open, append and close their
+file synchronously on the event loop for every record. A LogSink instead
+accepts lines without blocking and a daemon thread appends them in
+batches, flushing when ``max_batch`` lines are pending or every
+``flush_interval`` seconds, and once more on close. At most
+``max_pending`` lines are queued; if the disk stalls, further lines are
+dropped and counted instead of growing memory without bound.
+
+``flush`` and ``close`` wait for the writer thread, so call them from
+async code via ``asyncio.to_thread``.
+"""
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Dict
+
+
+logger = logging.getLogger(__name__)
+
+
+class LogSink:
+    """Non-blocking line writer for one append-only file."""
+
+    def __init__(self, path: str, flush_interval: float = 1.0, max_batch: int = 500, max_pending: int = 100_000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._pending: deque = deque()  # deque.append/popleft are thread-safe
+        self._wakeup = threading.Event()
+        self._flushed = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name=f"log-sink:{path}", daemon=True)
+        self._thread.start()
+
+    def write(self, line: str):
+        """Queue a line (newline appended). Never blocks on file IO."""
+        pending = len(self._pending)
+        if self._closed or pending >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append(line)
+        if pending + 1 >= self.max_batch:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        """Append all pending lines to the file in one write."""
+        lines = []
+        pending = self._pending
+        while pending:
+            lines.append(pending.popleft())
+        if lines:
+            try:
+                with open(self.path, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+            except Exception as e:
+                self.dropped += len(lines)
+                logger.debug(f"Log sink write failed for {self.path}: {e}")
+        with self._flushed:
+            self._flushed.notify_all()
+
+    def flush(self, timeout: float = 2.0):
+        """Ask the writer thread to flush now and wait for it."""
+        if self._closed or not self._pending:
+            return
+        with self._flushed:
+            self._wakeup.set()
+            self._flushed.wait(timeout)
+
+    def close(self, timeout: float = 2.0):
+        """Flush remaining lines and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        if self.dropped:
+            logger.warning(f"Log sink {self.path}: {self.dropped} lines dropped")
+
+
+_sinks: Dict[str, LogSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_sink(path: str) -> LogSink:
+    """Get the shared sink for a file path, creating it on first use."""
+    with _sinks_lock:
+        sink = _sinks.get(path)
+        if sink is None:
+            sink = _sinks[path] = LogSink(path)
+        return sink
+
+
+def close_all_sinks():
+    """Flush and close every sink (called on shutdown and at exit)."""
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        sink.close()
+
+
+atexit.register(close_all_sinks)
@@ -13,9 +13,8 @@ import logging
 import os
 from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-import requests
 import httpx
 
 # Load .env file if exists
@@ -24,6 +23,10 @@ load_dotenv()
 
 from config import load_config, Config
 from api.auth import StandXAuth
+from api.latency_stats import WINDOWS, read_snapshot
+from histogram import RollingHistogram
+from latency_store import window_stats
+from notify import get_notifier
 
 
 logging.basicConfig(
@@ -40,10 +43,14 @@ STATUS_REPORT_INTERVAL_SEC = 2 * 60 * 60  # 2 hours
 EQUITY_DROP_THRESHOLD = 0.10  # 10% drop triggers alert
 POSITION_ALERT_MULTIPLIER = 5  # Alert if position > order_size * 5
 STATUS_LOG_FILE = "status.log"
+LATENCY_SNAPSHOT_MAX_AGE_SEC = 300  # older snapshots mean the bot is down, fall back to the log
+REQUEST_TIMEOUT_SEC = 10  # per HTTP request
+POLL_TIMEOUT_SEC = 30  # whole poll of one account
+MAX_CONCURRENT_REQUESTS = 16  # requests in flight across all accounts
 
 
 def send_notify(title: str, message: str, channel: str = "info", priority: str = "normal"):
-    """Send notification via Telegram.
+    """Queue a notification via Telegram without blocking the monitor loop.
     
     Requires environment variables:
         NOTIFY_URL: Notification service URL (e.g., http://localhost:8000/notify)
@@ -51,26 +58,11 @@ def send_notify(title: str, message: str, channel: str = "info", priority: str =
     
     See: https://github.com/frozen-cherry/tg-notify
     """
-    notify_url = os.environ.get("NOTIFY_URL", "")
-    notify_api_key = os.environ.get("NOTIFY_API_KEY", "")
-    
-    if not notify_url:
-        return  # Notification not configured
-    
-    try:
-        headers = {}
-        if notify_api_key:
-            headers["X-API-Key"] = notify_api_key
-        
-        requests.post(
-            notify_url,
-            json={"title": title, "message": message, "channel": channel, "priority": priority},
-            headers=headers,
-            timeout=10,
-        )
-        logger.info(f"Notification sent: [{priority}] {title}")
-    except Exception as e:
-        logger.error(f"Failed to send notification: {e}")
+    notifier = get_notifier()
+    if not notifier.enabled:
+        logger.info(f"[{priority}] {title}: {message}")
+        return
+    notifier.notify(title, message, channel=channel, priority=priority)
 
 
 @dataclass
@@ -87,53 +79,203 @@ class AccountState:
     maker_pts: float = 0.0
     holder_pts: float = 0.0
     uptime_12h: str = ""  # 12-hour uptime visualization ████░░░░
-    latency_stats: dict = field(default_factory=dict)  # {endpoint: (avg_ms, max_ms)}
+    latency_stats: dict = field(default_factory=dict)  # {endpoint: {count, mean, max, p50, p99, ...} ms}
     low_equity_alerted: bool = False
     high_position_alerted: bool = False
 
 
+def _short_endpoint(endpoint: str) -> str:
+    """Simplify endpoint name for display."""
+    return endpoint.replace("/api/", "").replace("_", " ")
+
+
+class LatencyLogTail:
+    """Incremental reader of one latency log with a rolling time window.
+    
+    Each poll only reads the bytes appended since the previous one (up to
+    the last complete line) and records them into per-endpoint rolling
+    histograms keyed by the log timestamps, which drop samples older than
+    the window in whole slots (window / SLOTS). The file is tracked by
+    inode and offset: a new inode (rotation) is read from its start, a
+    shrunk file (truncation) discards the samples and starts over. On the
+    first read the start of the window is found by bisecting the file, so
+    a long log is never scanned in full.
+    """
+    
+    SLOTS = 24
+    
+    def __init__(self, path: str, window_sec: float):
+        self.path = path
+        self.window_sec = window_sec
+        self._inode: Optional[int] = None
+        self._offset: Optional[int] = None  # None: seek to the window on next read
+        self._histograms: Dict[str, RollingHistogram] = {}
+        self._last_stamp = ""
+        self._last_ts = 0.0
+        self.lines = 0
+    
+    def _parse_ts(self, stamp: str) -> float:
+        # Consecutive lines mostly share the same second
+        if stamp != self._last_stamp:
+            self._last_ts = datetime.fromisoformat(stamp).timestamp()
+            self._last_stamp = stamp
+        return self._last_ts
+    
+    def _line_ts(self, line: bytes) -> Optional[float]:
+        try:
+            return self._parse_ts(line.split(b",", 1)[0].decode())
+        except (ValueError, UnicodeDecodeError):
+            return None
+    
+    def _seek_window(self, f, size: int, cutoff: float) -> int:
+        """Offset of a line boundary at or shortly before the first line newer than cutoff."""
+        lo, hi = 0, size
+        while hi - lo > 65536:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            f.readline()  # skip the partial line
+            ts = self._line_ts(f.readline())
+            if ts is None or ts < cutoff:
+                lo = mid
+            else:
+                hi = mid
+        if lo == 0:
+            return 0
+        f.seek(lo)
+        f.readline()
+        return f.tell()
+    
+    def poll(self) -> int:
+        """Read new lines; returns the number of samples added."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return 0
+        if st.st_ino != self._inode:
+            self._inode = st.st_ino
+            self._offset = None
+        elif self._offset is not None and st.st_size < self._offset:
+            self._histograms = {}
+            self._offset = None
+        if self._offset == st.st_size:
+            return 0
+        
+        cutoff = time.time() - self.window_sec
+        with open(self.path, "rb") as f:
+            if self._offset is None:
+                self._offset = self._seek_window(f, st.st_size, cutoff)
+            f.seek(self._offset)
+            data = f.read(st.st_size - self._offset)
+        end = data.rfind(b"\n") + 1  # leave a partial last line for the next poll
+        self._offset += end
+        
+        added = 0
+        for line in data[:end].decode(errors="replace").splitlines():
+            parts = line.split(",")
+            if len(parts) < 3:
+                continue
+            try:
+                ts = self._parse_ts(parts[0])
+                latency_ms = float(parts[2])
+            except ValueError:
+                continue
+            if ts < cutoff:
+                continue
+            endpoint = _short_endpoint(parts[1])
+            hist = self._histograms.get(endpoint)
+            if hist is None:
+                hist = self._histograms[endpoint] = RollingHistogram(self.window_sec, self.SLOTS, clock=time.time)
+            hist.record(latency_ms * 1000, now=ts)
+            added += 1
+        self.lines += added
+        return added
+    
+    def stats(self) -> dict:
+        """{endpoint: summary} in ms over the window."""
+        result = {}
+        for endpoint, hist in self._histograms.items():
+            snapshot = hist.snapshot()
+            if snapshot.count:
+                result[endpoint] = snapshot.summary(scale=1000)
+        return result
+
+
+# (log file, window seconds) -> tail reader, kept across polls
+_latency_tails: Dict[tuple, LatencyLogTail] = {}
+
+
 def read_latency_stats(config_path: str, window_hours: float = 2.0) -> dict:
     """
-    Read latency log file and compute stats for recent window, by endpoint.
+    Latency stats for recent window, by endpoint.
+    
+    Uses the percentile snapshot the bot writes (latency_<config>.json)
+    while it is fresh, which is the path taken while the bot runs. Once it
+    is stale (bot down), the latency log is tailed: the reader is kept
+    across polls and only parses lines appended since the last one. The
+    latency store (latency_<config>/) is scanned only if there is no log.
+    
+    Reads files synchronously; call it through asyncio.to_thread from the
+    event loop.
     
     Returns:
-        Dict of {endpoint: (avg_ms, max_ms)} or empty dict if no data
+        Dict of {endpoint: {"count", "mean", "min", "max", "p50", "p90", "p99", "p999"}}
+        in ms, or empty dict if no data
     """
-    import os
-    from datetime import datetime, timedelta
-    from collections import defaultdict
-    
     config_name = config_path.replace(".yaml", "").replace(".yml", "")
-    log_file = f"latency_{config_name}.log"
     
-    if not os.path.exists(log_file):
-        return {}
+    # Smallest snapshot window covering the requested one
+    window_sec = window_hours * 3600
+    window = next((name for name, sec in WINDOWS.items() if sec >= window_sec), None)
+    if window:
+        stats = read_snapshot(
+            f"latency_{config_name}.json", window, max_age_sec=LATENCY_SNAPSHOT_MAX_AGE_SEC
+        )
+        if stats is not None:
+            return {_short_endpoint(endpoint): s for endpoint, s in stats.items()}
     
-    try:
-        cutoff_time = datetime.now() - timedelta(hours=window_hours)
-        latencies_by_endpoint = defaultdict(list)
-        
-        with open(log_file, "r") as f:
-            for line in f:
-                parts = line.strip().split(",")
-                if len(parts) >= 3:
-                    timestamp_str, endpoint, latency_ms = parts[0], parts[1], parts[2]
-                    try:
-                        ts = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                        if ts >= cutoff_time:
-                            # Simplify endpoint name for display
-                            short_name = endpoint.replace("/api/", "").replace("_", " ")
-                            latencies_by_endpoint[short_name].append(float(latency_ms))
-                    except:
-                        pass
-        
-        result = {}
-        for endpoint, latencies in latencies_by_endpoint.items():
-            if latencies:
-                result[endpoint] = (sum(latencies) / len(latencies), max(latencies))
-        return result
-    except:
-        return {}
+    log_file = f"latency_{config_name}.log"
+    if os.path.exists(log_file):
+        tail = _latency_tails.get((log_file, window_sec))
+        if tail is None:
+            tail = _latency_tails[(log_file, window_sec)] = LatencyLogTail(log_file, window_sec)
+        try:
+            tail.poll()
+            return tail.stats()
+        except Exception as e:
+            logger.debug(f"Failed to read {log_file}: {e}")
+            return {}
+    
+    store_dir = f"latency_{config_name}"
+    if os.path.isdir(store_dir):
+        stats = window_stats(store_dir, time.time() - window_sec)
+        return {_short_endpoint(endpoint): s for endpoint, s in stats.items()}
+    return {}
+
+
+# Shared by all accounts: one connection pool, bounded number of requests in flight
+_http_client: Optional[httpx.AsyncClient] = None
+_request_slots: Optional[asyncio.Semaphore] = None
+
+
+async def _get(url: str, headers: dict) -> httpx.Response:
+    """GET through the shared client, at most MAX_CONCURRENT_REQUESTS at a time."""
+    global _http_client, _request_slots
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT_SEC,
+            limits=httpx.Limits(max_connections=MAX_CONCURRENT_REQUESTS),
+        )
+        _request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with _request_slots:
+        return await _http_client.get(url, headers=headers)
+
+
+async def close_http_client():
+    """Close the shared HTTP client."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 async def query_balance(auth: StandXAuth) -> Dict:
@@ -142,10 +284,9 @@ async def query_balance(auth: StandXAuth) -> Dict:
     headers = auth.get_auth_headers()
     headers["Accept"] = "application/json"
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json()
+    response = await _get(url, headers)
+    response.raise_for_status()
+    return response.json()
 
 
 async def query_position(auth: StandXAuth, symbol: str) -> Dict:
@@ -154,20 +295,19 @@ async def query_position(auth: StandXAuth, symbol: str) -> Dict:
     headers = auth.get_auth_headers()
     headers["Accept"] = "application/json"
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.get(url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Handle both list and dict response formats
-        if isinstance(data, list):
-            positions = data
-        else:
-            positions = data.get("positions", [])
-        
-        if positions:
-            return positions[0]
-        return {}
+    response = await _get(url, headers)
+    response.raise_for_status()
+    data = response.json()
+    
+    # Handle both list and dict response formats
+    if isinstance(data, list):
+        positions = data
+    else:
+        positions = data.get("positions", [])
+    
+    if positions:
+        return positions[0]
+    return {}
 
 
 def build_uptime_bar(hours_data: List[Dict]) -> str:
@@ -215,41 +355,35 @@ async def query_all_stats(auth: StandXAuth) -> Dict:
     
     headers = {"Authorization": f"Bearer {auth.token}", "Accept": "application/json"}
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # Trading campaign (Trader Points)
-        try:
-            r = await client.get("https://api.standx.com/v1/offchain/trading-campaign/points", headers=headers)
-            if r.status_code == 200:
-                stats["trader_pts"] = float(r.json().get("trading_point", 0) or 0) / 1_000_000
-        except:
-            pass
-        
-        # Maker campaign (Maker Points)
-        try:
-            r = await client.get("https://api.standx.com/v1/offchain/maker-campaign/points", headers=headers)
-            if r.status_code == 200:
-                stats["maker_pts"] = float(r.json().get("maker_point", 0) or 0) / 1_000_000
-        except:
-            pass
-        
-        # Perps campaign (Holder Points)
-        try:
-            r = await client.get("https://api.standx.com/v1/offchain/perps-campaign/points", headers=headers)
-            if r.status_code == 200:
-                stats["holder_pts"] = float(r.json().get("total_point", 0) or 0) / 1_000_000
-        except:
-            pass
-        
-        # Uptime (12 hours visualization)
-        try:
-            uptime_headers = auth.get_auth_headers("")
-            uptime_headers["Accept"] = "application/json"
-            r = await client.get("https://perps.standx.com/api/maker/uptime", headers=uptime_headers)
-            if r.status_code == 200:
-                hours = r.json().get("hours", [])
-                stats["uptime_12h"] = build_uptime_bar(hours)
-        except:
-            pass
+    # Trading campaign (Trader Points)
+    async def trader_points():
+        r = await _get("https://api.standx.com/v1/offchain/trading-campaign/points", headers)
+        if r.status_code == 200:
+            stats["trader_pts"] = float(r.json().get("trading_point", 0) or 0) / 1_000_000
+    
+    # Maker campaign (Maker Points)
+    async def maker_points():
+        r = await _get("https://api.standx.com/v1/offchain/maker-campaign/points", headers)
+        if r.status_code == 200:
+            stats["maker_pts"] = float(r.json().get("maker_point", 0) or 0) / 1_000_000
+    
+    # Perps campaign (Holder Points)
+    async def holder_points():
+        r = await _get("https://api.standx.com/v1/offchain/perps-campaign/points", headers)
+        if r.status_code == 200:
+            stats["holder_pts"] = float(r.json().get("total_point", 0) or 0) / 1_000_000
+    
+    # Uptime (12 hours visualization)
+    async def uptime():
+        uptime_headers = auth.get_auth_headers("")
+        uptime_headers["Accept"] = "application/json"
+        r = await _get("https://perps.standx.com/api/maker/uptime", uptime_headers)
+        if r.status_code == 200:
+            hours = r.json().get("hours", [])
+            stats["uptime_12h"] = build_uptime_bar(hours)
+    
+    # Concurrently; a failed query keeps its default
+    await asyncio.gather(trader_points(), maker_points(), holder_points(), uptime(), return_exceptions=True)
     
     return stats
 
@@ -277,27 +411,40 @@ async def init_account(config_path: str) -> AccountState:
     )
 
 
+async def _gather_or_cancel(*coros) -> list:
+    """
+    Run coroutines concurrently like asyncio.gather, but cancel the rest
+    as soon as one of them fails, so no request outlives a failed poll.
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
 async def poll_account(account: AccountState) -> bool:
     """Poll account status. Returns True if successful."""
     try:
-        # Query balance
-        balance_data = await query_balance(account.auth)
+        # Query balance, position and stats concurrently
+        balance_data, pos_data, stats = await _gather_or_cancel(
+            query_balance(account.auth),
+            query_position(account.auth, account.config.symbol),
+            query_all_stats(account.auth),
+        )
         account.current_equity = float(balance_data.get("equity", 0) or 0)
         account.upnl = float(balance_data.get("upnl", 0) or 0)
-        
-        # Query position
-        pos_data = await query_position(account.auth, account.config.symbol)
         account.position = float(pos_data.get("qty", 0) or 0)
-        
-        # Query stats
-        stats = await query_all_stats(account.auth)
         account.trader_pts = stats["trader_pts"]
         account.maker_pts = stats["maker_pts"]
         account.holder_pts = stats["holder_pts"]
         account.uptime_12h = stats["uptime_12h"]
         
         # Read latency stats from log file (by endpoint)
-        account.latency_stats = read_latency_stats(account.config_path)
+        account.latency_stats = await asyncio.to_thread(read_latency_stats, account.config_path)
         
         return True
     except Exception as e:
@@ -358,14 +505,16 @@ def send_status_report(accounts: List[AccountState]):
         pts_str = f"T{acc.trader_pts:.0f}/M{acc.maker_pts:.0f}/H{acc.holder_pts:.0f}"
         uptime_str = f"[{acc.uptime_12h}]"
         
-        # Latency summary (average across all endpoints)
+        # Latency summary (average / worst p99 / max across all endpoints)
         if acc.latency_stats:
-            all_avgs = [avg for avg, _ in acc.latency_stats.values()]
-            all_maxs = [max_val for _, max_val in acc.latency_stats.values()]
+            all_avgs = [s["mean"] for s in acc.latency_stats.values()]
+            all_p99s = [s["p99"] for s in acc.latency_stats.values()]
+            all_maxs = [s["max"] for s in acc.latency_stats.values()]
             avg_overall = sum(all_avgs) / len(all_avgs) if all_avgs else 0
+            p99_overall = max(all_p99s) if all_p99s else 0
             max_overall = max(all_maxs) if all_maxs else 0
             latency_warning = "⚠️" if avg_overall > 200 or max_overall > 1000 else ""
-            latency_str = f"延迟:{avg_overall:.0f}/{max_overall:.0f}ms{latency_warning}"
+            latency_str = f"延迟:{avg_overall:.0f}/{p99_overall:.0f}/{max_overall:.0f}ms{latency_warning}"
         else:
             latency_str = "延迟:-"
         
@@ -394,8 +543,11 @@ def write_status_log(accounts: List[AccountState]):
         # Display latency by endpoint
         if acc.latency_stats:
             lines.append("  Latency:")
-            for endpoint, (avg, max_val) in acc.latency_stats.items():
-                lines.append(f"    {endpoint}: avg {avg:.0f}ms / max {max_val:.0f}ms")
+            for endpoint, s in acc.latency_stats.items():
+                lines.append(
+                    f"    {endpoint}: avg {s['mean']:.0f}ms / p50 {s['p50']:.0f}ms / "
+                    f"p99 {s['p99']:.0f}ms / max {s['max']:.0f}ms ({s['count']})"
+                )
         else:
             lines.append("  Latency:    (no data)")
         lines.append("")
@@ -405,13 +557,35 @@ def write_status_log(accounts: List[AccountState]):
         f.write("\n".join(lines))
 
 
+async def poll_all(accounts: List[AccountState], check_alerts: bool = True):
+    """Poll all accounts concurrently.
+    
+    Each account is bounded by POLL_TIMEOUT_SEC and runs its alert checks
+    as soon as its own poll finishes, so a slow account does not delay
+    the alerts of the others.
+    """
+    async def poll_one(account: AccountState) -> bool:
+        try:
+            success = await asyncio.wait_for(poll_account(account), POLL_TIMEOUT_SEC)
+        except asyncio.TimeoutError:
+            logger.error(f"Failed to poll {account.config_path}: timed out after {POLL_TIMEOUT_SEC}s")
+            return False
+        if success and check_alerts:
+            check_equity_alert(account)
+            check_position_alert(account)
+        return success
+    
+    start = time.time()
+    results = await asyncio.gather(*(poll_one(account) for account in accounts))
+    logger.info(f"Polled {sum(results)}/{len(accounts)} accounts in {time.time() - start:.1f}s")
+
+
 async def monitor_loop(accounts: List[AccountState]):
     """Main monitoring loop."""
     last_report_time = 0
     
     # Poll all accounts first to get points
-    for account in accounts:
-        await poll_account(account)
+    await poll_all(accounts, check_alerts=False)
     
     # Send initial status report and write log
     send_status_report(accounts)
@@ -420,11 +594,7 @@ async def monitor_loop(accounts: List[AccountState]):
     
     while True:
         # Poll all accounts
-        for account in accounts:
-            success = await poll_account(account)
-            if success:
-                check_equity_alert(account)
-                check_position_alert(account)
+        await poll_all(accounts)
         
         # Write status log after each poll
         write_status_log(accounts)
@@ -459,17 +629,18 @@ async def main(config_paths: List[str]):
     
     logger.info(f"Starting monitor for {len(config_paths)} accounts")
     
-    # Initialize all accounts
+    # Initialize all accounts (concurrently)
     accounts = []
-    for path in config_paths:
-        try:
-            account = await init_account(path)
-            accounts.append(account)
-        except Exception as e:
-            logger.error(f"Failed to init {path}: {e}")
+    results = await asyncio.gather(*(init_account(path) for path in config_paths), return_exceptions=True)
+    for path, result in zip(config_paths, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to init {path}: {result}")
+        else:
+            accounts.append(result)
     
     if not accounts:
         logger.error("No accounts initialized, exiting")
+        await close_http_client()
         return
     
     logger.info(f"Monitoring {len(accounts)} accounts, poll interval {POLL_INTERVAL_SEC}s")
@@ -478,6 +649,9 @@ async def main(config_paths: List[str]):
         await monitor_loop(accounts)
     except KeyboardInterrupt:
         logger.info("Monitor stopped")
+    finally:
+        await close_http_client()
+        await get_notifier().close()
 
 
 def parse_args():
@@ -0,0 +1,297 @@
+"""Asynchronous notification dispatcher.
+
+Notifications are queued without blocking and sent by a background task
+on a shared HTTP client, so a slow or dead notify endpoint never stalls
+the trading loop.
+
+- Bounded queue: when full, messages are dropped and counted
+- Per-key deduplication within a time window
+- Token-bucket rate limiting
+- Bursts on the same channel are batched into one message
+- Callers without an event loop (e.g. the multi-process supervisor) are
+  served by a private loop in a daemon thread
+
+Requires environment variables:
+    NOTIFY_URL: Notification service URL (e.g., http://localhost:8000/notify)
+    NOTIFY_API_KEY: API key for the notification service
+
+See: https://github.com/frozen-cherry/tg-notify
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Optional, List, Dict
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+
+PRIORITY_ORDER = {"low": 0, "normal": 1, "high": 2, "critical": 3}
+
+
+class Notifier:
+    """Non-blocking notification queue drained by a background task."""
+
+    def __init__(
+        self,
+        url: str = "",
+        api_key: str = "",
+        max_queue: int = 100,
+        rate_per_min: int = 20,
+        dedup_sec: float = 60.0,
+        batch_window_sec: float = 1.0,
+        timeout: float = 10.0,
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.max_queue = max_queue
+        self.rate_per_min = rate_per_min
+        self.dedup_sec = dedup_sec
+        self.batch_window_sec = batch_window_sec
+        self.timeout = timeout
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._thread: Optional[threading.Thread] = None  # runs _loop for callers without a loop
+        self._last_sent: Dict[str, float] = {}  # dedup key -> last successful enqueue time
+        self._lock = threading.Lock()
+
+        # Token bucket
+        self._tokens = float(rate_per_min)
+        self._last_refill = time.monotonic()
+
+        # Counters
+        self.stats = {"queued": 0, "sent": 0, "dropped": 0, "deduped": 0, "failed": 0}
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "Notifier":
+        """Create a notifier configured from NOTIFY_URL / NOTIFY_API_KEY."""
+        return cls(
+            url=os.environ.get("NOTIFY_URL", ""),
+            api_key=os.environ.get("NOTIFY_API_KEY", ""),
+            **kwargs,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+
+    def notify(
+        self,
+        title: str,
+        message: str,
+        channel: str = "alert",
+        priority: str = "normal",
+        key: Optional[str] = None,
+    ) -> bool:
+        """
+        Queue a notification without blocking.
+
+        Safe to call from the event loop or from other threads.
+
+        Args:
+            key: Deduplication key, defaults to title + message
+
+        Returns:
+            True if queued, False if disabled, deduplicated or dropped
+        """
+        if not self.enabled:
+            return False
+
+        key = key or f"{title}|{message}"
+        if self._is_duplicate(key, time.monotonic()):
+            return False
+
+        item = {"title": title, "message": message, "channel": channel, "priority": priority, "key": key}
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None and (self._loop is None or self._loop is loop or self._loop.is_closed()):
+            self._ensure_started(loop)
+            return self._enqueue(item)
+
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                # No event loop in this thread or process: start a private one
+                self._start_thread_loop()
+        # Hand over to the owning loop (another thread's or the private one)
+        self._loop.call_soon_threadsafe(self._enqueue, item)
+        return True
+
+    def _start_thread_loop(self):
+        """Run a private event loop in a daemon thread. Caller must hold the lock."""
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        self._queue = None
+        self._task = None
+        self._thread = threading.Thread(target=loop.run_forever, name="notifier", daemon=True)
+        self._thread.start()
+        loop.call_soon_threadsafe(self._ensure_started, loop)
+
+    def _ensure_started(self, loop: asyncio.AbstractEventLoop):
+        """Create the queue and the background sender on first use."""
+        if self._loop is not loop or self._queue is None:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run(), name="notifier")
+
+    def _is_duplicate(self, key: str, now: float) -> bool:
+        """Check whether key was queued within dedup_sec, counting it if so."""
+        with self._lock:
+            last = self._last_sent.get(key)
+            if last is not None and now - last < self.dedup_sec:
+                self.stats["deduped"] += 1
+                return True
+            return False
+
+    def _enqueue(self, item: dict) -> bool:
+        """Queue an item; its dedup key is only recorded once it is actually queued."""
+        key = item.pop("key")
+        now = time.monotonic()
+        if self._is_duplicate(key, now):
+            return False  # same key queued from another thread meanwhile
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.warning(f"Notification queue full, dropped: {item['title']}")
+            return False
+        self.stats["queued"] += 1
+        with self._lock:
+            self._last_sent[key] = now
+            if len(self._last_sent) > 1000:
+                cutoff = now - self.dedup_sec
+                self._last_sent = {k: t for k, t in self._last_sent.items() if t >= cutoff}
+        return True
+
+    async def _acquire_token(self):
+        """Wait for a token from the rate limiter."""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(
+                float(self.rate_per_min),
+                self._tokens + (now - self._last_refill) * self.rate_per_min / 60.0,
+            )
+            self._last_refill = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) * 60.0 / self.rate_per_min)
+
+    async def _run(self):
+        """Drain the queue, batching bursts into one message per channel."""
+        self._client = httpx.AsyncClient(timeout=self.timeout)
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                # Collect the rest of the burst
+                deadline = time.monotonic() + self.batch_window_sec
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                for merged in self._merge(batch):
+                    await self._acquire_token()
+                    await self._send(merged)
+                for _ in batch:
+                    self._queue.task_done()
+        finally:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _merge(batch: List[dict]) -> List[dict]:
+        """Merge items with the same channel into one, keeping the highest priority."""
+        groups: Dict[str, List[dict]] = {}
+        for item in batch:
+            groups.setdefault(item["channel"], []).append(item)
+
+        merged = []
+        for channel, items in groups.items():
+            if len(items) == 1:
+                merged.append(items[0])
+                continue
+            priority = max((i["priority"] for i in items), key=lambda p: PRIORITY_ORDER.get(p, 1))
+            merged.append({
+                "title": f"{items[0]['title']} (+{len(items) - 1})",
+                "message": "\n".join(f"[{i['title']}] {i['message']}" for i in items),
+                "channel": channel,
+                "priority": priority,
+            })
+        return merged
+
+    async def _send(self, item: dict):
+        headers = {}
+        if self.api_key:
+            headers["X-API-Key"] = self.api_key
+        try:
+            await self._client.post(self.url, json=item, headers=headers)
+            self.stats["sent"] += 1
+            logger.info(f"Notification sent: [{item['priority']}] {item['title']}")
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"Failed to send notification: {e}")
+
+    async def close(self, timeout: float = 5.0):
+        """Flush queued notifications (up to timeout) and stop the sender."""
+        if self._thread is not None and self._loop is not asyncio.get_running_loop():
+            # Sender runs on the private thread loop
+            await asyncio.to_thread(self.close_sync, timeout)
+            return
+        if self._task is None:
+            return
+        if self._queue is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Notification flush timed out, {self._queue.qsize()} pending")
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, Exception):
+            pass
+        self._task = None
+
+    def close_sync(self, timeout: float = 5.0):
+        """Flush and stop the private sender thread, for callers without an event loop."""
+        thread, loop = self._thread, self._loop
+        if thread is None or loop is None or loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.close(timeout), loop).result(timeout + 1.0)
+        except Exception as e:
+            logger.warning(f"Notification flush failed: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(1.0)
+        self._thread = None
+
+
+_notifier: Optional[Notifier] = None
+
+
+def get_notifier() -> Notifier:
+    """Get the process-wide notifier, created from the environment on first use."""
+    global _notifier
+    if _notifier is None:
+        _notifier = Notifier.from_env()
+    return _notifier
+
+
+def send_notify(title: str, message: str, priority: str = "normal", channel: str = "alert", key: Optional[str] = None):
+    """Queue a notification on the process-wide notifier. Never blocks."""
+    get_notifier().notify(title, message, channel=channel, priority=priority, key=key)
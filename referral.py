@@ -26,7 +26,7 @@ REFERRAL_URL = f"https://standx.com/referral?code={REFERRAL_CODE}"
 
 async def check_if_referred(auth: StandXAuth) -> bool:
     """Check if account is already referred by querying points."""
-    url = "https://api.standx.com/v1/offchain/perps-campaign/points"
+    url = f"{auth.base_url}/v1/offchain/perps-campaign/points"
     headers = {"Authorization": f"Bearer {auth.token}", "Accept": "application/json"}
     
     async with httpx.AsyncClient(timeout=30.0) as client:
@@ -41,7 +41,7 @@ async def check_if_referred(auth: StandXAuth) -> bool:
 
 async def apply_referral(auth: StandXAuth, referral_code: str) -> dict:
     """Apply referral code to the account."""
-    url = "https://api.standx.com/v1/offchain/referral"
+    url = f"{auth.base_url}/v1/offchain/referral"
     
     body = json.dumps({"referralCode": referral_code}, separators=(',', ':'))
     
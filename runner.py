@@ -0,0 +1,435 @@
+"""StandX Maker Bot - Multi-account runner.
+
+Hosts many wallets in one process and one event loop instead of one
+``main.py`` per config file. All accounts share one market data stream
+(one subscription per symbol); each account keeps its own login, HTTP
+client and user stream. A crashing account is stopped, its orders are
+cancelled and it is restarted with backoff, without touching the others.
+
+With ``--workers N`` the accounts are sharded across N worker processes
+(each running the loop above) so JSON parsing, request signing and
+logging use several cores. The parent process only supervises: it
+restarts crashed workers with backoff, forwards shutdown signals so every
+worker cancels its orders, and merges the health reports of all workers
+into ``runner_status.json``.
+
+Usage:
+    python runner.py -c config-bot1.yaml config-bot2.yaml config-bot3.yaml
+    python runner.py -c config-bot*.yaml --workers 4
+"""
+import os
+import json
+import time
+import signal
+import asyncio
+import logging
+import argparse
+import multiprocessing as mp
+from queue import Empty
+from typing import List, Optional, Dict
+
+from config import load_configs
+from api.symbol_info import SymbolInfoCache
+from api.ws_client import MarketWSClient
+from core.account import MarketFeed, AccountRunner
+from notify import get_notifier, send_notify
+from log_sink import close_all_sinks
+from tape import TapeRecorder
+from tracing import tracer
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+
+RESTART_DELAY_SEC = 5.0
+MAX_RESTART_DELAY_SEC = 300.0
+STABLE_RUN_SEC = 600.0  # 运行超过此时间后重启延迟重置
+STATUS_INTERVAL_SEC = 5.0  # worker 上报健康状态间隔
+STATUS_FILE = "runner_status.json"
+WORKER_SHUTDOWN_TIMEOUT_SEC = 30.0  # 等待 worker 撤单退出的最长时间
+
+
+async def supervise(account: AccountRunner, shutdown_event: asyncio.Event):
+    """
+    Run one account until shutdown, restarting it with backoff on failure.
+
+    Every attempt ends with stop() + cleanup(), so open orders of a failed
+    account are cancelled before it is restarted.
+    """
+    loop = asyncio.get_running_loop()
+    delay = RESTART_DELAY_SEC
+
+    while not shutdown_event.is_set():
+        started_at = loop.time()
+        run_task = None
+        stop_task = asyncio.create_task(shutdown_event.wait())
+        try:
+            await account.start()
+            run_task = asyncio.create_task(account.run())
+            await asyncio.wait({run_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+            if run_task.done():
+                # Raises if the account failed
+                run_task.result()
+                raise RuntimeError("account stopped unexpectedly")
+        except Exception as e:
+            account.last_error = f"{type(e).__name__}: {e}"
+            logger.error(f"[{account.name}] Account failed: {account.last_error}")
+        finally:
+            stop_task.cancel()
+            if run_task and not run_task.done():
+                run_task.cancel()
+            try:
+                await account.stop()
+            except Exception as e:
+                logger.error(f"[{account.name}] Failed to stop: {e}")
+            await account.cleanup()
+
+        if shutdown_event.is_set():
+            break
+
+        if loop.time() - started_at >= STABLE_RUN_SEC:
+            delay = RESTART_DELAY_SEC
+        account.restarts += 1
+        send_notify(
+            "账户重启",
+            f"{account.name} 异常退出，{delay:.0f} 秒后重启: {account.last_error}",
+            priority="high",
+            key=f"restart:{account.name}",
+        )
+        logger.info(f"[{account.name}] Restarting in {delay:.0f}s (restart #{account.restarts})")
+        try:
+            await asyncio.wait_for(shutdown_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        delay = min(delay * 2, MAX_RESTART_DELAY_SEC)
+
+
+async def report_status(accounts: List[AccountRunner], status_queue, worker_id: int):
+    """Periodically send account health to the supervising process."""
+    while True:
+        report = {
+            "worker": worker_id,
+            "pid": os.getpid(),
+            "ts": time.time(),
+            "accounts": [account.status() for account in accounts],
+            "latency_trace": tracer.snapshot() if tracer.enabled else None,
+        }
+        try:
+            status_queue.put_nowait(report)
+        except Exception as e:
+            logger.debug(f"Status report dropped: {e}")
+        await asyncio.sleep(STATUS_INTERVAL_SEC)
+
+
+async def run(config_paths: List[str], status_queue=None, worker_id: int = 0, tape_dir: Optional[str] = None):
+    """
+    Run all accounts until shutdown.
+
+    Args:
+        config_paths: One config file per account
+        status_queue: multiprocessing.Queue to report health to (worker mode)
+        worker_id: Worker index used in reports
+        tape_dir: Record the market stream to this directory
+    """
+
+    # Load all configs up front so a typo fails fast
+    accounts_configs = []
+    for path in config_paths:
+        logger.info(f"Loading config from {path}")
+        accounts_configs.append((path, load_configs(path)))
+
+    # Shared market stream and symbol metadata
+    market_ws = MarketWSClient()
+    feed = MarketFeed(market_ws)
+    symbols = SymbolInfoCache()
+    accounts = [AccountRunner(path, configs, feed, symbols) for path, configs in accounts_configs]
+    logger.info(f"Running {len(accounts)} accounts")
+
+    recorder = None
+    if tape_dir:
+        recorder = TapeRecorder(tape_dir)
+        recorder.attach(market_ws)
+        logger.info(f"Recording market data to: {tape_dir}")
+
+    # Setup shutdown handler
+    shutdown_event = asyncio.Event()
+
+    def handle_shutdown(sig, frame):
+        logger.info(f"Received signal {sig}, shutting down...")
+        shutdown_event.set()
+
+    signal.signal(signal.SIGINT, handle_shutdown)
+    signal.signal(signal.SIGTERM, handle_shutdown)
+
+    # kill -USR1 <pid> writes the tick profiles (profile_ticks: true)
+    # and latency traces (trace_latency: true, one file per process)
+    def handle_export(sig, frame):
+        for account in accounts:
+            account.export_profiles()
+        if tracer.enabled:
+            tracer.export(f"latency_trace_worker{worker_id}.json")
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, handle_export)
+
+    try:
+        await market_ws.connect()
+
+        market_task = asyncio.create_task(market_ws.run(), name="market_ws")
+        supervisors = [
+            asyncio.create_task(supervise(account, shutdown_event), name=f"account:{account.name}")
+            for account in accounts
+        ]
+
+        reporter = None
+        if status_queue is not None:
+            reporter = asyncio.create_task(report_status(accounts, status_queue, worker_id), name="status")
+
+        logger.info("Runner started, press Ctrl+C to stop")
+
+        # Accounts handle their own failures; stop on shutdown or if the
+        # shared market stream exits
+        shutdown_task = asyncio.create_task(shutdown_event.wait(), name="shutdown")
+        await asyncio.wait({market_task, shutdown_task}, return_when=asyncio.FIRST_COMPLETED)
+        shutdown_event.set()
+
+        # Each supervisor stops its account and cancels its orders
+        await asyncio.gather(*supervisors, return_exceptions=True)
+        if reporter:
+            reporter.cancel()
+
+        await market_ws.close()
+        market_task.cancel()
+        await asyncio.wait({market_task}, timeout=3.0)
+
+    finally:
+        logger.info("Cleaning up...")
+        # No-op for accounts already cleaned up by their supervisor
+        for account in accounts:
+            await account.cleanup()
+        if recorder:
+            await asyncio.to_thread(recorder.close)
+        await get_notifier().close()
+        await asyncio.to_thread(close_all_sinks)
+        logger.info("Shutdown complete")
+
+
+def _worker_main(worker_id: int, config_paths: List[str], status_queue, tape_dir: Optional[str] = None):
+    """Entry point of a worker process."""
+    asyncio.run(run(config_paths, status_queue, worker_id, tape_dir))
+
+
+class WorkerSlot:
+    """One worker process and its restart bookkeeping."""
+
+    def __init__(self, worker_id: int, config_paths: List[str]):
+        self.worker_id = worker_id
+        self.config_paths = config_paths
+        self.process: Optional[mp.Process] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.restart_at: Optional[float] = None  # pending restart time
+        self.delay = RESTART_DELAY_SEC
+        self.last_exitcode: Optional[int] = None
+        self.last_report: Optional[dict] = None
+
+
+def supervise_workers(config_paths: List[str], workers: int, tape_dir: Optional[str] = None):
+    """
+    Shard accounts across worker processes and keep them running.
+
+    Crashed workers are restarted with exponential backoff. SIGINT/SIGTERM
+    are forwarded to all workers, which stop their accounts and cancel
+    open orders exactly like a single-process run before exiting.
+
+    Only worker 0 records the tape (tape files must have a single writer);
+    it covers the symbols traded by its accounts.
+    """
+    ctx = mp.get_context("spawn")
+    status_queue = ctx.Queue()
+    workers = max(1, min(workers, len(config_paths)))
+    slots = [WorkerSlot(i, config_paths[i::workers]) for i in range(workers)]
+
+    def start(slot: WorkerSlot):
+        slot.process = ctx.Process(
+            target=_worker_main,
+            args=(slot.worker_id, slot.config_paths, status_queue, tape_dir if slot.worker_id == 0 else None),
+            name=f"maker-worker-{slot.worker_id}",
+        )
+        slot.process.start()
+        slot.started_at = time.monotonic()
+        slot.restart_at = None
+        logger.info(f"Worker {slot.worker_id} started (pid {slot.process.pid}): {', '.join(slot.config_paths)}")
+
+    shutting_down = False
+
+    def handle_shutdown(sig, frame):
+        nonlocal shutting_down
+        if shutting_down:
+            return
+        logger.info(f"Received signal {sig}, stopping workers...")
+        shutting_down = True
+        for slot in slots:
+            if slot.process and slot.process.is_alive():
+                # Worker handles SIGTERM by cancelling its orders and exiting
+                slot.process.terminate()
+
+    signal.signal(signal.SIGINT, handle_shutdown)
+    signal.signal(signal.SIGTERM, handle_shutdown)
+
+    for slot in slots:
+        start(slot)
+
+    last_write = 0.0
+    shutdown_deadline = None
+    try:
+        while True:
+            # Collect health reports
+            try:
+                report = status_queue.get(timeout=1.0)
+                slots[report["worker"]].last_report = report
+                while True:
+                    report = status_queue.get_nowait()
+                    slots[report["worker"]].last_report = report
+            except Empty:
+                pass
+
+            now = time.monotonic()
+            if shutting_down:
+                if shutdown_deadline is None:
+                    shutdown_deadline = now + WORKER_SHUTDOWN_TIMEOUT_SEC
+                alive = [s for s in slots if s.process and s.process.is_alive()]
+                if not alive:
+                    break
+                if now >= shutdown_deadline:
+                    for slot in alive:
+                        logger.error(f"Worker {slot.worker_id} did not exit in time, killing it")
+                        slot.process.kill()
+                    break
+                continue
+
+            for slot in slots:
+                if slot.restart_at is not None:
+                    if now >= slot.restart_at:
+                        start(slot)
+                    continue
+                if slot.process.is_alive():
+                    continue
+
+                # Worker died: schedule a restart with backoff
+                slot.last_exitcode = slot.process.exitcode
+                if now - slot.started_at >= STABLE_RUN_SEC:
+                    slot.delay = RESTART_DELAY_SEC
+                slot.restarts += 1
+                slot.restart_at = now + slot.delay
+                logger.error(
+                    f"Worker {slot.worker_id} exited with code {slot.last_exitcode}, "
+                    f"restarting in {slot.delay:.0f}s (restart #{slot.restarts})"
+                )
+                send_notify(
+                    "Worker 重启",
+                    f"worker {slot.worker_id} 退出 (code {slot.last_exitcode})，{slot.delay:.0f} 秒后重启",
+                    priority="high",
+                    key=f"worker:{slot.worker_id}",
+                )
+                slot.delay = min(slot.delay * 2, MAX_RESTART_DELAY_SEC)
+
+            if now - last_write >= STATUS_INTERVAL_SEC:
+                last_write = now
+                write_status(aggregate_status(slots))
+    finally:
+        for slot in slots:
+            if slot.process:
+                slot.process.join(timeout=1.0)
+        write_status(aggregate_status(slots))
+        get_notifier().close_sync()
+        logger.info("All workers stopped")
+
+
+def aggregate_status(slots: List[WorkerSlot]) -> dict:
+    """Merge the latest report of every worker into one view."""
+    now = time.time()
+    workers = []
+    accounts = []
+    positions: Dict[str, float] = {}
+    orders = 0
+    for slot in slots:
+        report = slot.last_report or {}
+        workers.append({
+            "worker": slot.worker_id,
+            "pid": slot.process.pid if slot.process else None,
+            "alive": bool(slot.process and slot.process.is_alive()),
+            "restarts": slot.restarts,
+            "last_exitcode": slot.last_exitcode,
+            "report_age_sec": round(now - report["ts"], 1) if report else None,
+            "configs": slot.config_paths,
+            "latency_trace": report.get("latency_trace"),
+        })
+        for account in report.get("accounts", []):
+            accounts.append({**account, "worker": slot.worker_id})
+            for symbol, info in account["symbols"].items():
+                positions[symbol] = positions.get(symbol, 0.0) + info["position"]
+                orders += info["orders"]
+    return {
+        "ts": now,
+        "workers": workers,
+        "accounts": accounts,
+        "totals": {
+            "accounts": len(accounts),
+            "running": sum(1 for a in accounts if a["running"]),
+            "open_orders": orders,
+            "positions": positions,
+        },
+    }
+
+
+def write_status(status: dict, path: str = STATUS_FILE):
+    """Atomically write the aggregated status file."""
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(status, f, indent=2)
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.warning(f"Failed to write {path}: {e}")
+    totals = status["totals"]
+    logger.info(
+        f"[Status] {totals['running']}/{totals['accounts']} accounts running, "
+        f"{totals['open_orders']} open orders, positions={totals['positions']}"
+    )
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="StandX Maker Bot - multi-account runner")
+    parser.add_argument(
+        "--config", "-c",
+        nargs="+",
+        required=True,
+        help="Config files, one per account",
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=0,
+        help="Shard accounts across N worker processes (default: 0 = single process)",
+    )
+    parser.add_argument(
+        "--tape",
+        help="Record market data to this directory (see tape.py)",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.workers > 0:
+        supervise_workers(args.config, args.workers, args.tape)
+    else:
+        asyncio.run(run(args.config, tape_dir=args.tape))
@@ -0,0 +1,2 @@
+"""Local StandX exchange simulator for end-to-end latency and load tests."""
+from sim.server import StandXSimulator, PriceFeed, ErrorModel
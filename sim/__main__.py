@@ -0,0 +1,113 @@
+"""Simulator CLI.
+
+Usage:
+    python -m sim
+    python -m sim -s BTC-USD ETH-USD --latency-ms 30 --error-rate 0.01 --throttle-rate 0.01
+    python -m sim -s BTC-USD --ticks BTC-USD=tape/BTC-USD/20261018.tape --speed 10
+
+Then start the bot with the printed environment variables.
+"""
+import signal
+import asyncio
+import logging
+import argparse
+
+from backtest.engine import load_ticks
+from backtest.exchange import LatencyModel, FillModel
+from sim.server import StandXSimulator, PriceFeed, ErrorModel
+
+
+logger = logging.getLogger("sim")
+
+
+STATS_INTERVAL_SEC = 10
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="StandX Maker Bot - local exchange simulator")
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address (default: 127.0.0.1)")
+    parser.add_argument("--http-port", type=int, default=8800, help="HTTP port (default: 8800)")
+    parser.add_argument("--ws-port", type=int, default=8801, help="WebSocket port (default: 8801)")
+    parser.add_argument("--symbols", "-s", nargs="+", default=["BTC-USD"], help="Symbols to quote")
+    parser.add_argument("--ticks", nargs="+", default=[], help="SYMBOL=file (.tape or CSV) replayed instead of the random walk")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (default: 1)")
+    parser.add_argument("--tick-interval", type=float, default=0.1, help="Random walk step in seconds (default: 0.1)")
+    parser.add_argument("--step-bps", type=float, default=1.0, help="Random walk step size in bps (default: 1)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="REST round trip (default: 20)")
+    parser.add_argument("--latency-jitter-ms", type=float, default=5.0, help="REST round trip jitter (default: 5)")
+    parser.add_argument("--ws-latency-ms", type=float, default=10.0, help="Order/position push delay (default: 10)")
+    parser.add_argument("--through-bps", type=float, default=0.0, help="Price must trade this far through an order to fill (default: 0)")
+    parser.add_argument("--fill-prob", type=float, default=1.0, help="Fill probability per eligible tick (default: 1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of /api requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of /api requests answered with 429")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Fraction of new orders rejected")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    return parser.parse_args()
+
+
+async def run(args):
+    ticks = {}
+    for spec in args.ticks:
+        symbol, sep, path = spec.partition("=")
+        if not sep:
+            symbol, path = args.symbols[0], spec
+        ticks[symbol] = load_ticks(path)
+    symbols = list(dict.fromkeys(args.symbols + list(ticks)))
+
+    feed = PriceFeed(symbols, args.tick_interval, args.step_bps, ticks, args.speed, args.seed)
+    sim = StandXSimulator(
+        feed,
+        host=args.host,
+        http_port=args.http_port,
+        ws_port=args.ws_port,
+        latency=LatencyModel(
+            rest_ms=args.latency_ms,
+            rest_jitter_ms=args.latency_jitter_ms,
+            ws_ms=args.ws_latency_ms,
+            ws_jitter_ms=args.ws_latency_ms / 4,
+            seed=args.seed,
+        ),
+        fill_model=FillModel(through_bps=args.through_bps, fill_prob=args.fill_prob, seed=args.seed),
+        errors=ErrorModel(args.error_rate, args.throttle_rate, args.reject_rate, seed=args.seed),
+    )
+    await sim.start()
+    print("Point the bot at the simulator:")
+    for name, value in sim.env.items():
+        print(f"  export {name}={value}")
+
+    shutdown_event = asyncio.Event()
+
+    def handle_shutdown(sig, frame):
+        logger.info(f"Received signal {sig}, shutting down...")
+        shutdown_event.set()
+
+    signal.signal(signal.SIGINT, handle_shutdown)
+    signal.signal(signal.SIGTERM, handle_shutdown)
+
+    feed_task = asyncio.create_task(feed.run())
+    try:
+        while not shutdown_event.is_set():
+            try:
+                await asyncio.wait_for(shutdown_event.wait(), timeout=STATS_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                pass
+            prices = ", ".join(f"{s} {p:.2f}" for s, p in feed.prices.items())
+            logger.info(f"{prices} | {sim.stats()}")
+    finally:
+        feed_task.cancel()
+        await sim.close()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,541 @@
+"""Local stand-in for the StandX HTTP and WebSocket APIs.
+
+Implements the endpoints the bot uses so it can run end-to-end on one
+machine (point it here with the STANDX_* URL variables):
+
+    HTTP  /v1/offchain/prepare-signin, /v1/offchain/login,
+          /v1/offchain/perps-campaign/points, /v1/offchain/referral,
+          /api/new_order, /api/cancel_order, /api/cancel_orders,
+          /api/query_open_orders, /api/query_positions, /api/query_balance,
+          /api/query_symbol_info, /api/query_symbol_price
+    WS    /ws-stream/v1  price channel
+          /ws-api/v1     auth:login, order and position channels
+
+Every bearer token is its own account with one SimExchange (the backtest
+matching engine) per symbol, so fills race cancels the same way. Prices
+come from a random walk or replayed tick files. REST latency, jitter and
+error injection (500 / 429 / order rejects) are configurable; request
+signatures are not verified.
+"""
+import json
+import time
+import uuid
+import random
+import base64
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+import websockets
+
+from api.symbol_info import default_symbol_info
+from backtest.exchange import SimExchange, LatencyModel, FillModel
+
+
+logger = logging.getLogger(__name__)
+
+
+# Random walk start prices; other symbols start at DEFAULT_START_PRICE
+START_PRICES = {"BTC-USD": 100000.0, "ETH-USD": 3000.0, "SOL-USD": 150.0}
+DEFAULT_START_PRICE = 100.0
+
+INITIAL_BALANCE = 10000.0
+MAX_REQUEST_BYTES = 1024 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+@dataclass
+class ErrorModel:
+    """Injected failures, as probabilities per request."""
+    error_rate: float = 0.0  # HTTP 500 on /api/*
+    throttle_rate: float = 0.0  # HTTP 429 on /api/*
+    reject_rate: float = 0.0  # new_order answered with code 400
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def http_status(self) -> int:
+        """Status to inject for an /api/* request, or 200."""
+        roll = self._rng.random()
+        if roll < self.error_rate:
+            return 500
+        if roll < self.error_rate + self.throttle_rate:
+            return 429
+        return 200
+
+    def rejects(self) -> bool:
+        return self.reject_rate > 0 and self._rng.random() < self.reject_rate
+
+
+def _jwt(payload: dict) -> str:
+    """Unsigned JWT, enough for StandXAuth._parse_jwt."""
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(payload)}.sim"
+
+
+def _jwt_payload(token: str) -> dict:
+    part = token.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(part + "=" * (-len(part) % 4)))
+
+
+class PriceFeed:
+    """Last prices of all symbols: a random walk, or ticks replayed in real time."""
+
+    def __init__(
+        self,
+        symbols: List[str],
+        interval: float = 0.1,
+        step_bps: float = 1.0,
+        ticks: Optional[Dict[str, List[Tuple[float, float]]]] = None,
+        speed: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            symbols: Symbols to quote
+            interval: Seconds between random walk steps
+            step_bps: Standard deviation of one random walk step
+            ticks: symbol -> [(ts, price)] to replay instead of the walk (looped)
+            speed: Replay speed multiplier
+            seed: Random seed of the walk
+        """
+        self.interval = interval
+        self.step_bps = step_bps
+        self.ticks = ticks or {}
+        self.speed = speed
+        self._rng = random.Random(seed)
+        self.prices: Dict[str, float] = {}
+        for symbol in symbols:
+            series = self.ticks.get(symbol)
+            self.prices[symbol] = series[0][1] if series else START_PRICES.get(symbol, DEFAULT_START_PRICE)
+        self._listeners = []
+
+    def on_tick(self, callback):
+        """Register callback(symbol, price)."""
+        self._listeners.append(callback)
+
+    def _publish(self, symbol: str, price: float):
+        self.prices[symbol] = price
+        for callback in self._listeners:
+            try:
+                callback(symbol, price)
+            except Exception as e:
+                logger.error(f"Price listener error: {e}")
+
+    async def run(self):
+        tasks = [asyncio.create_task(self._replay(symbol, series)) for symbol, series in self.ticks.items()]
+        walk = [symbol for symbol in self.prices if symbol not in self.ticks]
+        try:
+            while walk:
+                await asyncio.sleep(self.interval)
+                for symbol in walk:
+                    price = self.prices[symbol] * (1 + self._rng.gauss(0, self.step_bps) / 10000)
+                    self._publish(symbol, round(price, 2))
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _replay(self, symbol: str, series: List[Tuple[float, float]]):
+        while True:
+            start_ts, start = series[0][0], time.monotonic()
+            for ts, price in series:
+                delay = (ts - start_ts) / self.speed - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._publish(symbol, price)
+            logger.info(f"Replay of {symbol} finished, looping")
+
+
+class SimAccount:
+    """One bearer token: per-symbol exchanges and the user streams to notify."""
+
+    def __init__(self, token: str):
+        self.token = token
+        self.exchanges: Dict[str, SimExchange] = {}
+        self.streams: Set = set()  # authenticated ws-api connections
+        self.referred = False
+        self.next_order_id = 1
+        self.order_ids: Dict[str, int] = {}  # cl_ord_id -> id
+
+    def send(self, message: dict):
+        data = json.dumps(message)
+        for ws in list(self.streams):
+            asyncio.ensure_future(_send(ws, data))
+
+
+async def _send(ws, data: str):
+    try:
+        await ws.send(data)
+    except Exception:
+        pass  # closed; dropped from the set by its handler
+
+
+class StandXSimulator:
+    """HTTP + WebSocket server emulating the StandX endpoints the bot uses."""
+
+    def __init__(
+        self,
+        feed: PriceFeed,
+        host: str = "127.0.0.1",
+        http_port: int = 8800,
+        ws_port: int = 8801,
+        latency: Optional[LatencyModel] = None,
+        fill_model: Optional[FillModel] = None,
+        errors: Optional[ErrorModel] = None,
+    ):
+        self.feed = feed
+        self.host = host
+        self.http_port = http_port
+        self.ws_port = ws_port
+        self.latency = latency or LatencyModel()
+        self.fill_model = fill_model or FillModel()
+        self.errors = errors or ErrorModel()
+
+        self.accounts: Dict[str, SimAccount] = {}
+        self._market_streams: Dict[str, Set] = {}  # symbol -> subscribed connections
+        self._http_server = None
+        self._ws_server = None
+        self.requests = 0
+        self.injected = 0
+
+        self._routes = {
+            ("POST", "/v1/offchain/prepare-signin"): self._prepare_signin,
+            ("POST", "/v1/offchain/login"): self._login,
+            ("GET", "/v1/offchain/perps-campaign/points"): self._points,
+            ("POST", "/v1/offchain/referral"): self._referral,
+            ("POST", "/api/new_order"): self._new_order,
+            ("POST", "/api/cancel_order"): self._cancel_order,
+            ("POST", "/api/cancel_orders"): self._cancel_orders,
+            ("GET", "/api/query_open_orders"): self._query_open_orders,
+            ("GET", "/api/query_positions"): self._query_positions,
+            ("GET", "/api/query_balance"): self._query_balance,
+            ("GET", "/api/query_symbol_info"): self._query_symbol_info,
+            ("GET", "/api/query_symbol_price"): self._query_symbol_price,
+        }
+        feed.on_tick(self._on_tick)
+
+    @property
+    def env(self) -> Dict[str, str]:
+        """Environment variables pointing the bot at this server."""
+        http = f"http://{self.host}:{self.http_port}"
+        ws = f"ws://{self.host}:{self.ws_port}"
+        return {
+            "STANDX_API_URL": http,
+            "STANDX_PERPS_URL": http,
+            "STANDX_WS_STREAM_URL": f"{ws}/ws-stream/v1",
+            "STANDX_WS_API_URL": f"{ws}/ws-api/v1",
+        }
+
+    async def start(self):
+        self._http_server = await asyncio.start_server(self._serve_http, self.host, self.http_port)
+        self._ws_server = await websockets.serve(self._serve_ws, self.host, self.ws_port)
+        logger.info(f"Simulator listening: HTTP {self.host}:{self.http_port}, WS {self.host}:{self.ws_port}")
+
+    async def close(self):
+        for server in (self._http_server, self._ws_server):
+            if server:
+                server.close()
+                await server.wait_closed()
+
+    # -- accounts and matching ----------------------------------------------
+
+    def _account(self, token: str) -> SimAccount:
+        account = self.accounts.get(token)
+        if account is None:
+            account = self.accounts[token] = SimAccount(token)
+        return account
+
+    def _exchange(self, account: SimAccount, symbol: str) -> SimExchange:
+        exchange = account.exchanges.get(symbol)
+        if exchange is None:
+            exchange = SimExchange(symbol, self.latency, self.fill_model)
+            exchange.last_price = self.feed.prices.get(symbol)
+            exchange.on_order(account.send)
+            exchange.on_position(account.send)
+            account.exchanges[symbol] = exchange
+        return exchange
+
+    def _on_tick(self, symbol: str, price: float):
+        for account in self.accounts.values():
+            exchange = account.exchanges.get(symbol)
+            if exchange:
+                exchange.on_price(price)
+        streams = self._market_streams.get(symbol)
+        if streams:
+            data = json.dumps({
+                "channel": "price",
+                "symbol": symbol,
+                "data": {
+                    "symbol": symbol,
+                    "last_price": str(price),
+                    "mark_price": str(price),
+                    "index_price": str(price),
+                    "time": int(time.time() * 1000),
+                },
+            })
+            for ws in list(streams):
+                asyncio.ensure_future(_send(ws, data))
+
+    # -- HTTP ---------------------------------------------------------------
+
+    async def _serve_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1 with keep-alive and Content-Length bodies."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_REQUEST_BYTES:
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self._dispatch(method, target, headers, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, headers: dict, body: bytes) -> Tuple[int, object]:
+        self.requests += 1
+        url = urlsplit(target)
+        handler = self._routes.get((method, url.path))
+        if handler is None:
+            return 404, {"code": 404, "message": f"{method} {url.path} not found"}
+
+        is_api = url.path.startswith("/api/")
+        half = self.latency.rest() / 2 if is_api else 0.0
+        if half:
+            await asyncio.sleep(half)
+
+        if is_api:
+            status = self.errors.http_status()
+            if status != 200:
+                self.injected += 1
+                await asyncio.sleep(half)
+                return status, {"code": status, "message": "simulated error"}
+
+        token = headers.get("authorization", "").removeprefix("Bearer ").strip()
+        try:
+            params = dict(parse_qsl(url.query))
+            payload = json.loads(body) if body else {}
+            status, result = handler(token, params, payload)
+        except (KeyError, ValueError, TypeError) as e:
+            status, result = 400, {"code": 400, "message": f"bad request: {e}"}
+        if half:
+            await asyncio.sleep(half)
+        return status, result
+
+    def _authorized(self, token: str) -> Optional[SimAccount]:
+        return self._account(token) if token and token != "None" else None
+
+    # Offchain auth ----------------------------------------------------------
+
+    def _prepare_signin(self, token, params, payload):
+        message = f"StandX simulator sign-in\naddress: {payload['address']}\nnonce: {uuid.uuid4().hex}"
+        return 200, {"success": True, "signedData": _jwt({"message": message, "address": payload["address"]})}
+
+    def _login(self, token, params, payload):
+        address = _jwt_payload(payload["signedData"]).get("address", "")
+        token = f"sim-{uuid.uuid4().hex}"
+        self._account(token)
+        logger.info(f"Login {address} -> account {token[:12]}")
+        return 200, {"token": token, "address": address}
+
+    def _points(self, token, params, payload):
+        account = self._authorized(token)
+        if account is None:
+            return 401, {"code": 401, "message": "unauthorized"}
+        return 200, {"refer_at": "2026-01-01T00:00:00Z" if account.referred else None}
+
+    def _referral(self, token, params, payload):
+        account = self._authorized(token)
+        if account is None:
+            return 401, {"code": 401, "message": "unauthorized"}
+        account.referred = True
+        return 200, {"code": 0, "message": "success"}
+
+    # Trading ----------------------------------------------------------------
+
+    def _new_order(self, token, params, payload):
+        account = self._authorized(token)
+        if account is None:
+            return 401, {"code": 401, "message": "unauthorized"}
+        if self.errors.rejects():
+            return 200, {"code": 400, "message": "simulated reject"}
+        exchange = self._exchange(account, payload["symbol"])
+        cl_ord_id = payload["cl_ord_id"]
+        result = exchange.new_order(
+            payload["side"], float(payload["qty"]), float(payload.get("price") or 0),
+            cl_ord_id, payload.get("order_type", "limit"), bool(payload.get("reduce_only")),
+        )
+        if result.get("code") == 0:
+            account.order_ids[cl_ord_id] = account.next_order_id
+            account.next_order_id += 1
+        return 200, result
+
+    def _cancel(self, account: SimAccount, cl_ord_ids: List[str]) -> dict:
+        results, remaining = [], list(cl_ord_ids)
+        for exchange in account.exchanges.values():
+            mine = [i for i in remaining if i in exchange.orders]
+            if mine:
+                results += exchange.cancel(mine)["result"]
+                remaining = [i for i in remaining if i not in mine]
+        # Unknown or already filled
+        results += [{"cl_ord_id": i, "code": 404} for i in remaining]
+        return {"code": 0, "result": results}
+
+    def _cancel_order(self, token, params, payload):
+        account = self._authorized(token)
+        if account is None:
+            return 401, {"code": 401, "message": "unauthorized"}
+        return 200, self._cancel(account, [payload["cl_ord_id"]])
+
+    def _cancel_orders(self, token, params, payload):
+        account = self._authorized(token)
+        if account is None:
+            return 401, {"code": 401, "message": "unauthorized"}
+        return 200, self._cancel(account, list(payload["cl_ord_id_list"]))
+
+    def _query_open_orders(self, token, params, payload):
+        account = self._authorized(token)
+        if account is None:
+            return 401, {"code": 401, "message": "unauthorized"}
+        symbol = params.get("symbol")
+        orders = [
+            {
+                "id": account.order_ids.get(o.cl_ord_id, 0), "cl_ord_id": o.cl_ord_id, "side": o.side,
+                "price": str(o.price), "qty": str(o.qty), "status": "new", "symbol": exchange.symbol,
+            }
+            for exchange in account.exchanges.values() if symbol in (None, exchange.symbol)
+            for o in exchange.orders.values()
+        ]
+        return 200, {"result": orders}
+
+    @staticmethod
+    def _upnl(exchange: SimExchange) -> float:
+        if not exchange.position or exchange.last_price is None:
+            return 0.0
+        return (exchange.last_price - exchange.entry_price) * exchange.position
+
+    def _query_positions(self, token, params, payload):
+        account = self._authorized(token)
+        if account is None:
+            return 401, {"code": 401, "message": "unauthorized"}
+        symbol = params.get("symbol")
+        return 200, [
+            {
+                "symbol": exchange.symbol, "qty": str(exchange.position),
+                "entry_price": str(exchange.entry_price), "upnl": str(self._upnl(exchange)),
+            }
+            for exchange in account.exchanges.values()
+            if exchange.position and symbol in (None, exchange.symbol)
+        ]
+
+    def _query_balance(self, token, params, payload):
+        account = self._authorized(token)
+        if account is None:
+            return 401, {"code": 401, "message": "unauthorized"}
+        balance = INITIAL_BALANCE + sum(e.realized_pnl for e in account.exchanges.values())
+        upnl = sum(self._upnl(e) for e in account.exchanges.values())
+        return 200, {"balance": str(balance), "upnl": str(upnl), "equity": str(balance + upnl)}
+
+    def _query_symbol_info(self, token, params, payload):
+        symbols = [params["symbol"]] if "symbol" in params else list(self.feed.prices)
+        items = []
+        for symbol in symbols:
+            info = default_symbol_info(symbol)
+            items.append({
+                "symbol": symbol,
+                "price_tick_decimals": info.price_decimals,
+                "qty_tick_decimals": info.qty_decimals,
+                "min_order_qty": str(info.lot_size),
+            })
+        return 200, items
+
+    def _query_symbol_price(self, token, params, payload):
+        symbol = params["symbol"]
+        price = self.feed.prices.get(symbol)
+        if price is None:
+            return 404, {"code": 404, "message": f"unknown symbol {symbol}"}
+        return 200, {"symbol": symbol, "last_price": str(price), "mark_price": str(price), "index_price": str(price)}
+
+    # -- WebSocket ----------------------------------------------------------
+
+    async def _serve_ws(self, ws, path: Optional[str] = None):
+        # websockets < 14 passes the path, newer versions expose ws.request
+        path = path or getattr(ws, "path", None) or ws.request.path
+        if path.rstrip("/").endswith("/ws-stream/v1"):
+            await self._serve_market(ws)
+        elif path.rstrip("/").endswith("/ws-api/v1"):
+            await self._serve_user(ws)
+        else:
+            await ws.close(code=4004, reason="unknown path")
+
+    async def _serve_market(self, ws):
+        subscribed = []
+        try:
+            async for message in ws:
+                sub = json.loads(message).get("subscribe", {})
+                symbol = sub.get("symbol")
+                if sub.get("channel") == "price" and symbol in self.feed.prices:
+                    self._market_streams.setdefault(symbol, set()).add(ws)
+                    subscribed.append(symbol)
+        except (websockets.ConnectionClosed, ValueError):
+            pass
+        finally:
+            for symbol in subscribed:
+                self._market_streams.get(symbol, set()).discard(ws)
+
+    async def _serve_user(self, ws):
+        account = None
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                if data.get("method") == "auth:login":
+                    token = json.loads(data.get("params") or "{}").get("token")
+                    if not token:
+                        await ws.send(json.dumps({"code": 401, "message": "missing token"}))
+                        continue
+                    account = self._account(token)
+                    account.streams.add(ws)
+                    await ws.send(json.dumps({"code": 0, "request_id": data.get("request_id")}))
+                # order / position subscriptions: every update goes to authenticated streams
+        except (websockets.ConnectionClosed, ValueError):
+            pass
+        finally:
+            if account:
+                account.streams.discard(ws)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "injected_errors": self.injected,
+            "accounts": len(self.accounts),
+            "open_orders": sum(len(e.orders) for a in self.accounts.values() for e in a.exchanges.values()),
+            "fills": sum(len(e.fills) for a in self.accounts.values() for e in a.exchanges.values()),
+        }
+
@@ -0,0 +1,333 @@
+"""Market data tape: record price messages to compact binary files.
+
+Layout: ``<dir>/<symbol>/<YYYYMMDD>.tape`` (UTC day of receipt), a plain
+array of fixed-width little-endian records without header::
+
+    recv_ts  f8  local receive time, epoch seconds
+    exch_ts  f8  exchange timestamp, epoch seconds (NaN if absent)
+    last     f8  last_price
+    mark     f8  mark_price (NaN if absent)
+    index    f8  index_price (NaN if absent)
+
+The recorder packs records into an in-memory buffer from the receive
+callback. A background thread takes the buffers over every
+flush_interval (or early when one is full) and appends them to disk, so
+the WebSocket loop never touches a file and a quiet symbol is still
+written out on time. A torn record at the end of a file (crash
+mid-write) is ignored by the reader and cut off before the next
+recorder appends to that file, so later records stay aligned.
+
+Readers memory-map the files as NumPy structured arrays (NumPy is only
+needed for reading).
+
+Usage:
+    python tape.py record -s BTC-USD ETH-USD -d tape
+    python tape.py info tape/BTC-USD/20261018.tape
+"""
+import os
+import glob
+import time
+import struct
+import asyncio
+import logging
+import argparse
+import calendar
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # only needed by the reader
+    np = None
+
+
+logger = logging.getLogger(__name__)
+
+
+RECORD = struct.Struct("<5d")
+RECORD_FIELDS = ("recv_ts", "exch_ts", "last", "mark", "index")
+TAPE_SUFFIX = ".tape"
+NAN = float("nan")
+
+
+def _float(value) -> float:
+    return float(value) if value not in (None, "") else NAN
+
+
+def _exchange_ts(value) -> float:
+    """Exchange timestamp (epoch s/ms or ISO string) to epoch seconds."""
+    if value in (None, ""):
+        return NAN
+    try:
+        ts = float(value)
+        return ts / 1000 if ts > 1e11 else ts
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return NAN
+
+
+class TapeRecorder:
+    """Buffered writer of price messages, one file per symbol per UTC day."""
+
+    def __init__(self, directory: str = "tape", flush_interval: float = 1.0, max_buffer: int = 4096):
+        """
+        Args:
+            directory: Root directory of the tape
+            flush_interval: Seconds between handoffs to the writer thread
+            max_buffer: Records per symbol buffered before an early flush
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._max_bytes = max_buffer * RECORD.size
+
+        self._buffers: Dict[str, bytearray] = {}  # symbol -> packed records
+        self._paths: Dict[str, str] = {}  # symbol -> current file
+        self._day_end = 0.0  # UTC midnight ending the current day
+        self._day = ""
+        # Guards buffers/paths/day: records are added by the receiving thread
+        # and handed off by the writer thread on its timer
+        self._lock = threading.Lock()
+
+        self._pending: deque = deque()  # (path, bytes) handed to the writer
+        self._aligned: set = set()  # files checked for a torn tail (writer thread only)
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.records = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="tape-writer", daemon=True)
+        self._thread.start()
+
+    def attach(self, market_ws):
+        """Record every price message of a MarketWSClient."""
+        market_ws.on_price(self.on_price)
+
+    def on_price(self, data: dict):
+        """MarketWSClient price callback."""
+        price_data = data.get("data", {})
+        last_price = price_data.get("last_price")
+        if not last_price:
+            return
+        symbol = data.get("symbol") or price_data.get("symbol") or "unknown"
+        exch_ts = price_data.get("time") or price_data.get("timestamp") or price_data.get("ts")
+        self.record(
+            symbol,
+            time.time(),
+            _exchange_ts(exch_ts),
+            float(last_price),
+            _float(price_data.get("mark_price")),
+            _float(price_data.get("index_price")),
+        )
+
+    def record(self, symbol: str, recv_ts: float, exch_ts: float, last: float, mark: float = NAN, index: float = NAN):
+        """Append one record to the symbol's buffer. Never does file IO."""
+        packed = RECORD.pack(recv_ts, exch_ts, last, mark, index)
+        with self._lock:
+            if self._closed:
+                self.dropped += 1
+                return
+            if recv_ts >= self._day_end:
+                self._rotate(recv_ts)
+            buffer = self._buffers.get(symbol)
+            if buffer is None:
+                buffer = self._buffers[symbol] = bytearray()
+                self._paths[symbol] = self._path(symbol)
+            buffer += packed
+            self.records += 1
+            full = len(buffer) >= self._max_bytes
+        if full:
+            self._wakeup.set()
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.directory, symbol, f"{self._day}{TAPE_SUFFIX}")
+
+    def _rotate(self, ts: float):
+        """Start a new UTC day: flush old-day buffers to their old files. Caller holds the lock."""
+        for symbol in list(self._buffers):
+            self._handoff(symbol)
+        day = time.gmtime(ts)
+        self._day = time.strftime("%Y%m%d", day)
+        self._day_end = calendar.timegm((day.tm_year, day.tm_mon, day.tm_mday, 0, 0, 0)) + 86400
+        self._paths = {symbol: self._path(symbol) for symbol in self._paths}
+
+    def _handoff(self, symbol: str):
+        buffer = self._buffers.get(symbol)
+        if buffer:
+            self._pending.append((self._paths[symbol], bytes(buffer)))
+            buffer.clear()
+
+    def _run(self):
+        # Take the buffers over on a timer (or when one is full), then write
+        # outside the lock so recording never waits on the disk
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush_buffers()
+            self._drain()
+        # Closed: no record can be added any more, take the rest
+        self.flush_buffers()
+        self._drain()
+
+    def flush_buffers(self):
+        """Hand all buffered records to the writer (safe from any thread)."""
+        with self._lock:
+            for symbol in list(self._buffers):
+                self._handoff(symbol)
+
+    def _drain(self):
+        """Append queued chunks, one open/write per file."""
+        chunks: Dict[str, List[bytes]] = {}
+        pending = self._pending
+        while pending:
+            path, data = pending.popleft()
+            chunks.setdefault(path, []).append(data)
+        for path, parts in chunks.items():
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if path not in self._aligned:
+                    _truncate_torn(path)
+                    self._aligned.add(path)
+                with open(path, "ab") as f:
+                    f.write(b"".join(parts))
+            except Exception as e:
+                self.dropped += sum(len(p) for p in parts) // RECORD.size
+                logger.warning(f"Tape write failed for {path}: {e}")
+
+    def close(self, timeout: float = 2.0):
+        """Flush everything and stop the writer thread (blocks up to timeout: use asyncio.to_thread from async code)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+
+
+def _truncate_torn(path: str):
+    """Cut a partial record off the end of an existing tape file."""
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return
+    torn = size % RECORD.size
+    if torn:
+        os.truncate(path, size - torn)
+        logger.warning(f"Tape {path}: dropped {torn} bytes of a torn record")
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Reading tapes requires numpy (pip install numpy)")
+
+
+def record_dtype():
+    """NumPy dtype of one tape record."""
+    _require_numpy()
+    return np.dtype([(name, "<f8") for name in RECORD_FIELDS])
+
+
+def open_tape(path: str):
+    """
+    Memory-map one tape file as a read-only structured array.
+
+    Fields: recv_ts, exch_ts, last, mark, index (see module docstring).
+    """
+    dtype = record_dtype()
+    count = os.path.getsize(path) // dtype.itemsize
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+def tape_files(directory: str, symbol: str) -> List[str]:
+    """Tape files of a symbol in chronological order."""
+    return sorted(glob.glob(os.path.join(directory, symbol, f"*{TAPE_SUFFIX}")))
+
+
+def load_tape(directory: str, symbol: str, start: Optional[float] = None, end: Optional[float] = None):
+    """
+    Records of a symbol across daily files, optionally limited to [start, end).
+
+    Returns a single memory-mapped array when one file matches, else a
+    concatenated copy.
+    """
+    _require_numpy()
+    parts = []
+    for path in tape_files(directory, symbol):
+        records = open_tape(path)
+        if start is not None or end is not None:
+            ts = records["recv_ts"]
+            lo = np.searchsorted(ts, start) if start is not None else 0
+            hi = np.searchsorted(ts, end) if end is not None else len(records)
+            records = records[lo:hi]
+        if len(records):
+            parts.append(records)
+    if not parts:
+        return np.empty(0, dtype=record_dtype())
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+async def _record(symbols: List[str], directory: str):
+    """Standalone recorder: subscribe to symbols and record until stopped."""
+    from api.ws_client import MarketWSClient
+
+    market_ws = MarketWSClient()
+    recorder = TapeRecorder(directory)
+    recorder.attach(market_ws)
+    try:
+        await market_ws.connect()
+        for symbol in symbols:
+            await market_ws.subscribe_price(symbol)
+        logger.info(f"Recording {', '.join(symbols)} to {directory}, press Ctrl+C to stop")
+        await market_ws.run()
+    finally:
+        await market_ws.close()
+        await asyncio.to_thread(recorder.close)
+        logger.info(f"Recorded {recorder.records} messages ({recorder.dropped} dropped)")
+
+
+def _info(paths: List[str]):
+    for path in paths:
+        records = open_tape(path)
+        if not len(records):
+            print(f"{path}: empty")
+            continue
+        ts = records["recv_ts"]
+        last = records["last"]
+        print(
+            f"{path}: {len(records)} records, "
+            f"{datetime.fromtimestamp(ts[0]):%Y-%m-%d %H:%M:%S} - {datetime.fromtimestamp(ts[-1]):%H:%M:%S}, "
+            f"last {last.min():.2f} - {last.max():.2f}"
+        )
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="StandX market data tape")
+    sub = parser.add_subparsers(dest="command", required=True)
+    record = sub.add_parser("record", help="Record price messages")
+    record.add_argument("--symbols", "-s", nargs="+", default=["BTC-USD"], help="Symbols to record")
+    record.add_argument("--dir", "-d", default="tape", help="Tape directory (default: tape)")
+    info = sub.add_parser("info", help="Summarize tape files")
+    info.add_argument("paths", nargs="+", help="Tape files")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    args = parse_args()
+    if args.command == "record":
+        try:
+            asyncio.run(_record(args.symbols, args.dir))
+        except KeyboardInterrupt:
+            pass
+    else:
+        _info(args.paths)
@@ -0,0 +1,239 @@
+"""Tick-to-trade latency tracing.
+
+Follows a price message from the market stream to the order requests it
+caused and their confirmation on the user stream:
+
+    recv      MarketWSClient.run received the message
+    dispatch  decoded, price callbacks about to run
+    tick      Maker._tick started (woken by that price)
+    sent      StandXHTTPClient._post sends the request (after rate limit and signing)
+    acked     REST response received
+    confirmed UserWSClient.run received the order update settling the request
+
+Order requests are traced per cl_ord_id and action (new / cancel /
+reduce). Each segment is recorded into its own rolling histogram as soon
+as both ends are known, e.g. ``cancel.tick_to_trade`` (recv -> sent) or
+``new.rest_rtt`` (sent -> acked); ticks not woken by a price (timeouts,
+order updates) only get the segments from ``tick`` on. Completed traces
+are kept in a ring for inspection (``traces()``).
+
+Tracing is off by default (``trace_latency`` in the config); every call
+site checks ``tracer.enabled`` first, so a disabled tracer costs one
+attribute lookup per message or request. One process-wide ``tracer`` is
+shared by the WS clients, HTTP clients and makers.
+"""
+import json
+import time
+import logging
+import contextvars
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+from histogram import RollingHistogram, summaries
+
+
+logger = logging.getLogger(__name__)
+
+
+# Order statuses that settle a cancel / market order (see core.state)
+FINAL_STATUSES = ("filled", "cancelled", "canceled", "rejected", "expired")
+
+# (PriceTrace or None, tick start) of the running Maker._tick
+tick_context: contextvars.ContextVar = contextvars.ContextVar("tick_context", default=None)
+
+
+class PriceTrace:
+    """Timestamps of one price message."""
+
+    __slots__ = ("symbol", "wall", "recv", "dispatch")
+
+    def __init__(self, symbol: str, recv: float, dispatch: float):
+        self.symbol = symbol
+        self.wall = time.time()
+        self.recv = recv
+        self.dispatch = dispatch
+
+
+class OrderTrace:
+    """Timestamps of one order request (perf_counter seconds)."""
+
+    __slots__ = (
+        "cl_ord_id", "action", "price", "tick", "sent", "acked",
+        "ack_status", "confirmed", "confirm_status", "wall",
+    )
+
+    def __init__(self, cl_ord_id: str, action: str, price: Optional[PriceTrace], tick: Optional[float], sent: float):
+        self.cl_ord_id = cl_ord_id
+        self.action = action
+        self.price = price
+        self.tick = tick
+        self.sent = sent
+        self.acked: Optional[float] = None
+        self.ack_status: Optional[int] = None
+        self.confirmed: Optional[float] = None
+        self.confirm_status: Optional[str] = None
+        self.wall = time.time()
+
+    def to_dict(self) -> dict:
+        """Trace with every known segment in milliseconds."""
+        def ms(a, b):
+            return round((b - a) * 1000, 3) if a is not None and b is not None else None
+
+        price = self.price
+        recv = price.recv if price else None
+        return {
+            "cl_ord_id": self.cl_ord_id,
+            "action": self.action,
+            "symbol": price.symbol if price else None,
+            "ts": self.wall,
+            "ack_status": self.ack_status,
+            "confirm_status": self.confirm_status,
+            "segments_ms": {
+                "decode": ms(recv, price.dispatch if price else None),
+                "dispatch_to_tick": ms(price.dispatch if price else None, self.tick),
+                "tick_to_send": ms(self.tick, self.sent),
+                "rest_rtt": ms(self.sent, self.acked),
+                "send_to_confirm": ms(self.sent, self.confirmed),
+                "tick_to_trade": ms(recv, self.sent),
+                "recv_to_confirm": ms(recv, self.confirmed),
+            },
+        }
+
+
+class Tracer:
+    """Segment histograms and recent traces of order requests."""
+
+    MAX_PENDING = 5000  # traces waiting for their confirmation
+    RECENT = 500  # finished traces kept for traces()
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, window_sec: float = 300.0):
+        self.enabled = False
+        self.window_sec = window_sec
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.current_price: Optional[PriceTrace] = None  # set while price callbacks run
+        self._pending: OrderedDict = OrderedDict()  # (cl_ord_id, action) -> OrderTrace
+        self._recent: deque = deque(maxlen=self.RECENT)
+
+    def _record(self, segment: str, start: Optional[float], end: Optional[float]):
+        if start is None or end is None:
+            return
+        hist = self.histograms.get(segment)
+        if hist is None:
+            hist = self.histograms[segment] = RollingHistogram(self.window_sec)
+        hist.record((end - start) * 1e6)
+
+    # -- hooks --------------------------------------------------------------
+
+    def price_dispatch(self, data: dict, recv: float) -> PriceTrace:
+        """Market stream: a price message received at ``recv`` is about to be dispatched."""
+        symbol = data.get("symbol") or data.get("data", {}).get("symbol") or ""
+        trace = PriceTrace(symbol, recv, self.clock())
+        self._record("price.decode", recv, trace.dispatch)
+        self.current_price = trace
+        return trace
+
+    def request_sent(self, path: str, payload: dict) -> List[OrderTrace]:
+        """HTTP client: an order request is being sent."""
+        if path == "/api/new_order":
+            action = "reduce" if payload.get("reduce_only") else "new"
+            ids = [payload.get("cl_ord_id")]
+        elif path == "/api/cancel_order":
+            action, ids = "cancel", [payload.get("cl_ord_id")]
+        elif path == "/api/cancel_orders":
+            action, ids = "cancel", payload.get("cl_ord_id_list") or []
+        else:
+            return []
+
+        now = self.clock()
+        context = tick_context.get()
+        price, tick = context if context else (None, None)
+        traces = []
+        for cl_ord_id in ids:
+            if not cl_ord_id:
+                continue
+            trace = OrderTrace(cl_ord_id, action, price, tick, now)
+            key = (cl_ord_id, action)
+            self._pending.pop(key, None)
+            self._pending[key] = trace
+            traces.append(trace)
+        while len(self._pending) > self.MAX_PENDING:
+            _, stale = self._pending.popitem(last=False)
+            self._recent.append(stale)
+
+        if traces:
+            self._record(f"{action}.tick_to_send", tick, now)
+            if price:
+                self._record(f"{action}.dispatch_to_tick", price.dispatch, tick)
+                self._record(f"{action}.tick_to_trade", price.recv, now)
+        return traces
+
+    def request_acked(self, traces: List[OrderTrace], status_code: int):
+        """HTTP client: response received for traces returned by request_sent."""
+        if not traces:
+            return
+        now = self.clock()
+        for trace in traces:
+            trace.acked = now
+            trace.ack_status = status_code
+        self._record(f"{traces[0].action}.rest_rtt", traces[0].sent, now)
+
+    def order_update(self, order_data: dict, recv: float):
+        """User stream: an order update received at ``recv``."""
+        cl_ord_id = order_data.get("cl_ord_id")
+        if not cl_ord_id:
+            return
+        status = order_data.get("status")
+        final = status in FINAL_STATUSES
+        for action in ("new", "reduce", "cancel"):
+            # Any update confirms a new order; cancels and market orders settle on a final status
+            if action != "new" and not final:
+                continue
+            trace = self._pending.pop((cl_ord_id, action), None)
+            if trace is None:
+                continue
+            trace.confirmed = recv
+            trace.confirm_status = status
+            self._record(f"{action}.send_to_confirm", trace.sent, recv)
+            if trace.price:
+                self._record(f"{action}.recv_to_confirm", trace.price.recv, recv)
+            self._recent.append(trace)
+
+    # -- queries ------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Per-segment count/mean/min/max/p50/p90/p99/p999 in milliseconds over the window."""
+        return summaries(dict(sorted(self.histograms.items())), scale=1000)
+
+    def traces(self, limit: int = 20, cl_ord_id: Optional[str] = None, pending: bool = False) -> List[dict]:
+        """
+        Recent traces, newest first.
+
+        Args:
+            limit: Maximum number of traces
+            cl_ord_id: Only traces of this order
+            pending: Include traces still waiting for their confirmation
+        """
+        source = list(self._recent)
+        if pending:
+            source += list(self._pending.values())
+        source.sort(key=lambda t: t.sent, reverse=True)
+        result = []
+        for trace in source:
+            if cl_ord_id is None or trace.cl_ord_id == cl_ord_id:
+                result.append(trace.to_dict())
+                if len(result) >= limit:
+                    break
+        return result
+
+    def export(self, path: str, limit: int = 100) -> dict:
+        """Write segment summaries and recent traces to a JSON file."""
+        data = {"ts": time.time(), "segments": self.snapshot(), "traces": self.traces(limit, pending=True)}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        logger.info(f"Latency traces written to {path}")
+        return data
+
+
+tracer = Tracer()
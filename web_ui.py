@@ -4,6 +4,7 @@ Usage:
     python web_ui.py
 """
 import gradio as gr
+import time
 import asyncio
 import threading
 import logging
@@ -18,9 +19,11 @@ from typing import Optional, List
 from config import Config
 from api.auth import StandXAuth
 from api.http_client import StandXHTTPClient
+from api.rate_limiter import RateLimiter
 from api.ws_client import MarketWSClient, UserWSClient
-from core.state import State, OpenOrder
+from core.state import State
 from core.maker import Maker
+from notify import get_notifier
 from referral import check_if_referred, apply_referral
 
 
@@ -601,7 +604,12 @@ class BotController:
                 logger.warning(f"Referral check/apply failed: {e}")
 
             # Initialize clients
-            self.http_client = StandXHTTPClient(self.auth)
+            self.http_client = StandXHTTPClient(
+                self.auth,
+                rate_limiter=RateLimiter(
+                    rate_per_sec=self.config.rate_limit_per_sec, burst=self.config.rate_limit_burst
+                ),
+            )
             self.market_ws = MarketWSClient()
             self.user_ws = UserWSClient(self.auth)
 
@@ -681,12 +689,7 @@ class BotController:
 
             logger.info(f"Order update: {side} {status}")
 
-            if status in ("filled", "cancelled", "rejected"):
-                if side in ("buy", "sell"):
-                    current_order = self.state.get_order(side)
-                    if current_order and current_order.cl_ord_id == cl_ord_id:
-                        self.state.set_order(side, None)
-                        self.maker._pending_check.set()
+            self.maker.on_order_update(cl_ord_id, status)
 
             # Update order display
             self._update_order_display()
@@ -698,9 +701,10 @@ class BotController:
             pos_data = data.get("data", {})
             qty = float(pos_data.get("qty", 0))
             symbol = pos_data.get("symbol", "")
+            entry_price = pos_data.get("entry_price")
 
             if symbol == self.config.symbol:
-                self.state.update_position(qty)
+                self.maker.on_position_update(qty, float(entry_price) if entry_price else None)
                 self.status_data["position"] = qty
 
         self.user_ws.on_position(on_position)
@@ -765,33 +769,15 @@ class BotController:
                 # Query positions
                 positions = await self.http_client.query_positions(self.config.symbol)
                 if positions:
-                    self.state.update_position(positions[0].qty)
+                    self.state.update_position(positions[0].qty, positions[0].entry_price, synced=True)
                     self.status_data["position"] = positions[0].qty
                     self.status_data["upnl"] = positions[0].upnl
 
-                # Query open orders and update local state
+                # Query open orders and merge them into local state
+                as_of = time.time()
                 orders = await self.http_client.query_open_orders(self.config.symbol)
-
-                # Clear local orders first
-                self.state.set_order("buy", None)
-                self.state.set_order("sell", None)
-
-                # Update from server
-                for order in orders:
-                    if order.side == "buy":
-                        self.state.set_order("buy", OpenOrder(
-                            cl_ord_id=order.cl_ord_id,
-                            side="buy",
-                            price=float(order.price),
-                            qty=float(order.qty),
-                        ))
-                    elif order.side == "sell":
-                        self.state.set_order("sell", OpenOrder(
-                            cl_ord_id=order.cl_ord_id,
-                            side="sell",
-                            price=float(order.price),
-                            qty=float(order.qty),
-                        ))
+                if self.maker.load_orders(orders, as_of=as_of):
+                    self.maker._pending_check.set()
 
                 # Update display
                 self._update_order_display()
@@ -813,11 +799,7 @@ class BotController:
         # Cancel orders
         if self.state and self.http_client:
             try:
-                orders_to_cancel = []
-                if self.state.has_order("buy"):
-                    orders_to_cancel.append(self.state.get_order("buy").cl_ord_id)
-                if self.state.has_order("sell"):
-                    orders_to_cancel.append(self.state.get_order("sell").cl_ord_id)
+                orders_to_cancel = [order.cl_ord_id for order in self.state.get_orders()]
 
                 if orders_to_cancel:
                     logger.info(f"Cancelling {len(orders_to_cancel)} orders on exit")
@@ -829,6 +811,8 @@ class BotController:
         if self.http_client:
             await self.http_client.close()
 
+        await get_notifier().close()
+
     async def _cleanup(self):
         """Cleanup resources."""
         logger.info("Cleaning up...")